@@ -4,8 +4,14 @@ Core generator logic.
 
 import random
 
+import numpy as np
+
 from apps.lotteries.models import Lottery
 from apps.stats.services.calculator import StatsCalculator
+from apps.stats.services.theoretical import (
+    THEORETICAL_METRICS,
+    TheoreticalDistributions,
+)
 
 from .validators import (
     BaseValidator,
@@ -45,6 +51,9 @@ class BaseGenerator:
         games = []
         attempts = 0
 
+        if not self._is_feasible():
+            return games
+
         while len(games) < count and attempts < self.MAX_ATTEMPTS:
             attempts += 1
 
@@ -53,13 +62,17 @@ class BaseGenerator:
 
             # 2. Validate
             if self._validate_candidate(numbers):
-                score = self._calculate_score(numbers)
                 games.append({
                     "numbers": sorted(numbers),
-                    "score": score,
                     "met_rules": [v.get_description() for v in self.validators]
                 })
 
+        # 3. Score all accepted games at once
+        if games:
+            scores = self._calculate_scores(np.array([game["numbers"] for game in games]))
+            for game, score in zip(games, scores, strict=True):
+                game["score"] = score
+
         return games
 
     def _build_validators(self, config: dict) -> list[BaseValidator]:
@@ -132,6 +145,39 @@ class BaseGenerator:
         random_part = random.sample(available_pool, remaining_count)
         return current + random_part
 
+    def _theoretical_tables(self) -> dict | None:
+        """Exact metric distributions, when games follow the lottery rules."""
+        if self.numbers_count != self.lottery.numbers_count:
+            return None
+        return TheoreticalDistributions().get(self.lottery)
+
+    def _is_feasible(self) -> bool:
+        """
+        Check the sum/even/prime ranges against the exact distributions.
+
+        A range no combination of the whole lottery can reach cannot be met
+        by any candidate either, so there is no point sampling for it.
+        """
+        tables = self._theoretical_tables()
+        if tables is None:
+            return True
+
+        ranges = {
+            "sum": (self.config.get("min_sum"), self.config.get("max_sum")),
+            "evens": (self.config.get("min_even"), self.config.get("max_even")),
+            "primes": (self.config.get("min_primes"), self.config.get("max_primes")),
+        }
+        for metric, (low, high) in ranges.items():
+            offset, counts = tables[metric]
+            if not counts:
+                # No table for this lottery: nothing to rule out
+                continue
+            start = 0 if low is None else max(low - offset, 0)
+            end = len(counts) if high is None else max(high - offset + 1, 0)
+            if not any(counts[start:end]):
+                return False
+        return True
+
     def _validate_candidate(self, numbers: list[int]) -> bool:
         """Run all validators."""
         for validator in self.validators:
@@ -139,16 +185,31 @@ class BaseGenerator:
                 return False
         return True
 
-    def _calculate_score(self, numbers: list[int]) -> float:
-        """Calculate a heuristic score (0-10) for the game."""
-        # Simple heuristic: balance
-        # Better implementation would use StatsService to check historical probability
+    def _calculate_scores(self, games: np.ndarray) -> list[float]:
+        """
+        Calculate a heuristic score (0-10) for each game (one game per row).
+
+        Each theoretical metric contributes how likely the game's value is
+        relative to the most likely value; the score is their average.
+        Metrics without a table are left out, and a lottery without any
+        gets the neutral score 10 for every game.
+        """
+        tables = self._theoretical_tables()
+        if tables is None:
+            return np.full(len(games), 10.0).tolist()
 
-        StatsCalculator.calculate_metrics(numbers)
+        metrics = StatsCalculator.calculate_metrics_batch(games)
 
-        score = 10.0
+        typicality = []
+        for metric, field in THEORETICAL_METRICS.items():
+            offset, probabilities = TheoreticalDistributions.probabilities(tables[metric])
+            if not len(probabilities) or not probabilities.max():
+                continue
+            index = np.clip(metrics[field] - offset, 0, len(probabilities) - 1)
+            typicality.append(probabilities[index] / probabilities.max())
 
-        # Penalty for too many evens/odds (if not strictly validated)
-        # Only apply soft penalties here
+        if not typicality:
+            return np.full(len(games), 10.0).tolist()
 
-        return score
+        scores = 10.0 * np.mean(typicality, axis=0)
+        return np.round(scores, 2).tolist()
@@ -2,11 +2,13 @@
 Tests for generator app.
 """
 
+import numpy as np
 import pytest
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from apps.generator.engine.core import BaseGenerator
 from apps.generator.engine.validators import (
     EvenOddValidator,
     ExclusionValidator,
@@ -14,6 +16,10 @@ from apps.generator.engine.validators import (
 )
 from apps.generator.models import GeneratorRun, Preset
 from apps.lotteries.models import Lottery
+from apps.stats.services.theoretical import (
+    THEORETICAL_METRICS,
+    TheoreticalDistributions,
+)
 
 User = get_user_model()
 
@@ -143,3 +149,41 @@ class TestGeneratorAPI:
         data = response.json()
         # Should be empty or successful if randomness somehow found a bug (unlikely)
         assert len(data["result"]) == 0
+
+
+@pytest.mark.django_db
+class TestTheoreticalScoring:
+    """Test scoring and feasibility against the theoretical tables."""
+
+    @staticmethod
+    def generator(lottery, config=None):
+        # Built without __init__: only the scoring state is needed
+        generator = BaseGenerator.__new__(BaseGenerator)
+        generator.lottery = lottery
+        generator.config = config or {}
+        generator.numbers_count = lottery.numbers_count
+        return generator
+
+    def test_missing_sum_table_is_skipped(self):
+        """A wide-range lottery without a sum table still gets scored and generated."""
+        federal = Lottery.objects.create(
+            name="Federal", slug="federal", api_identifier="federal",
+            numbers_count=5, min_number=0, max_number=99999,
+        )
+        generator = self.generator(federal, {"min_sum": 100, "max_sum": 200})
+
+        scores = generator._calculate_scores(np.array([[1, 20, 300, 4000, 50000]]))
+
+        assert 0 <= scores[0] <= 10
+        assert generator._is_feasible()
+
+    def test_empty_tables_give_neutral_score(self, lottery, monkeypatch):
+        """Without any table every game gets the neutral score."""
+        monkeypatch.setattr(
+            TheoreticalDistributions, "get", lambda self, lottery: {metric: (0, []) for metric in THEORETICAL_METRICS}
+        )
+
+        scores = self.generator(lottery)._calculate_scores(np.array([[1, 2, 3, 4, 5, 6], [7, 8, 9, 10, 11, 12]]))
+
+        assert scores == [10.0, 10.0]
+
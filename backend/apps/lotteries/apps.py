@@ -11,3 +11,7 @@ class LotteriesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.lotteries"
     verbose_name = "Loterias"
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.lotteries.signals  # noqa: F401
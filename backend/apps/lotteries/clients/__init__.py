@@ -2,6 +2,19 @@
 Lotteries clients package.
 """
 
-from .caixa import CaixaLotteryClient
+from .breaker import CircuitBreaker, CircuitOpenError, get_caixa_circuit_breaker
+from .caixa import CaixaLotteryClient, DrawResult, get_caixa_client, parse_draw_result
+from .ratelimit import RateLimiter, TokenBucket, get_caixa_rate_limiter
 
-__all__ = ["CaixaLotteryClient"]
+__all__ = [
+    "CaixaLotteryClient",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DrawResult",
+    "RateLimiter",
+    "TokenBucket",
+    "get_caixa_circuit_breaker",
+    "get_caixa_client",
+    "get_caixa_rate_limiter",
+    "parse_draw_result",
+]
@@ -0,0 +1,159 @@
+"""
+Circuit breaker for the CAIXA API.
+
+State lives in the Django cache, so every worker stops calling the API as
+soon as one of them sees it failing.
+"""
+
+import logging
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+    def __init__(self, name: str, retry_at: float):
+        self.retry_at = retry_at
+        until = datetime.fromtimestamp(retry_at, tz=UTC).isoformat()
+        super().__init__(f"Circuit breaker {name} is open until {until}")
+
+
+class CircuitBreaker:
+    """
+    Shared closed / open / half-open circuit breaker.
+
+    - closed: calls go through; failures are counted over `failure_window`
+      seconds and `failure_threshold` of them open the circuit.
+    - open: calls raise CircuitOpenError for `cooldown` seconds.
+    - half-open: after the cooldown a single call is let through as a
+      probe; its success closes the circuit, its failure opens it again.
+
+    If the cache is unreachable the breaker lets every call through.
+
+    Usage:
+        breaker.allow()  # raises CircuitOpenError while open
+        try:
+            response = send()
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    """
+
+    KEY_PREFIX = "caixa:breaker"
+    PROBE_TIMEOUT = 120  # seconds before another worker may probe
+
+    def __init__(self, name: str, failure_threshold: int, failure_window: int, cooldown: int):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.cooldown = cooldown
+
+    def allow(self):
+        """
+        Check whether a call may be sent.
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or half-open with
+                another worker's probe in flight
+        """
+        try:
+            opened_at = cache.get(self._key("opened_at"))
+            if opened_at is None:
+                return
+            retry_at = opened_at + self.cooldown
+            if time.time() >= retry_at and cache.add(self._key("probe"), 1, self.PROBE_TIMEOUT):
+                logger.info(f"Circuit breaker {self.name} half-open: probing")
+                return
+        except Exception as exc:
+            logger.warning(f"Circuit breaker {self.name} unavailable: {exc}")
+            return
+        raise CircuitOpenError(self.name, retry_at)
+
+    def is_open(self) -> bool:
+        """Whether calls are currently refused (open and still cooling down)."""
+        return self.state()["state"] == "open"
+
+    def record_success(self):
+        """Close the circuit if a probe succeeded."""
+        try:
+            if cache.get(self._key("opened_at")) is not None:
+                cache.delete_many([self._key("opened_at"), self._key("probe"), self._key("failures")])
+                logger.info(f"Circuit breaker {self.name} closed")
+        except Exception as exc:
+            logger.warning(f"Circuit breaker {self.name} unavailable: {exc}")
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit past the threshold or on a failed probe."""
+        try:
+            if cache.get(self._key("opened_at")) is not None:
+                self._trip()
+                return
+            key = self._key("failures")
+            cache.add(key, 0, self.failure_window)
+            if cache.incr(key) >= self.failure_threshold:
+                self._trip()
+        except Exception as exc:
+            logger.warning(f"Circuit breaker {self.name} unavailable: {exc}")
+
+    def state(self) -> dict:
+        """Get the current state, recent failure count and trip count (closed if the cache is unreachable)."""
+        try:
+            values = cache.get_many([self._key(name) for name in ("opened_at", "failures", "probe", "trips")])
+        except Exception as exc:
+            logger.warning(f"Circuit breaker {self.name} unavailable: {exc}")
+            values = {}
+        opened_at = values.get(self._key("opened_at"))
+
+        if opened_at is None:
+            state = "closed"
+        elif time.time() < opened_at + self.cooldown:
+            state = "open"
+        else:
+            state = "half_open"
+
+        return {
+            "state": state,
+            "failures": values.get(self._key("failures"), 0),
+            "failure_threshold": self.failure_threshold,
+            "opened_at": _isoformat(opened_at),
+            "retry_at": _isoformat(opened_at + self.cooldown) if opened_at is not None else None,
+            "probing": self._key("probe") in values,
+            "trips": values.get(self._key("trips"), 0),
+        }
+
+    def _trip(self):
+        cache.set(self._key("opened_at"), time.time(), None)
+        cache.delete_many([self._key("probe"), self._key("failures")])
+        cache.add(self._key("trips"), 0, None)
+        cache.incr(self._key("trips"))
+        logger.warning(f"Circuit breaker {self.name} open for {self.cooldown}s")
+
+    def _key(self, suffix: str) -> str:
+        return f"{self.KEY_PREFIX}:{self.name}:{suffix}"
+
+
+def _isoformat(timestamp: float | None) -> str | None:
+    return datetime.fromtimestamp(timestamp, tz=UTC).isoformat() if timestamp is not None else None
+
+
+_caixa_circuit_breaker: CircuitBreaker | None = None
+
+
+def get_caixa_circuit_breaker() -> CircuitBreaker:
+    """Get the breaker shared by every CAIXA API caller (settings.CAIXA_BREAKER_*)."""
+    global _caixa_circuit_breaker
+    if _caixa_circuit_breaker is None:
+        _caixa_circuit_breaker = CircuitBreaker(
+            "caixa",
+            failure_threshold=settings.CAIXA_BREAKER_THRESHOLD,
+            failure_window=settings.CAIXA_BREAKER_WINDOW,
+            cooldown=settings.CAIXA_BREAKER_COOLDOWN,
+        )
+    return _caixa_circuit_breaker
@@ -6,14 +6,20 @@ API Base: https://servicebus2.caixa.gov.br/portaldeloterias/api/
 """
 
 import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Any
 
 import requests
+from django.conf import settings
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from .breaker import CircuitBreaker, get_caixa_circuit_breaker
+from .ratelimit import RateLimiter, TokenBucket, get_caixa_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -42,26 +48,64 @@ class CaixaLotteryClient:
     """
     HTTP client for fetching lottery results from CAIXA API.
 
+    Responses carrying an ETag or Last-Modified header are kept in a small
+    LRU cache; the next request for the same URL is conditional, and a 304
+    answer returns the cached result without downloading or parsing JSON.
+
+    Every request takes a token from the shared rate limit and goes through
+    the shared circuit breaker: while CAIXA keeps failing, calls raise
+    CircuitOpenError without touching the network.
+
+    The client is thread-safe: tasks share one instance per process through
+    get_caixa_client(), reusing its kept-alive connections.
+
     Usage:
-        client = CaixaLotteryClient()
+        client = get_caixa_client()
         result = client.get_latest_result("megasena")
-        result = client.get_result_by_number("megasena", 2954)
+        result = client.get_result_by_number("megasena", 2954, lane="backfill")
     """
 
     BASE_URL = "https://servicebus2.caixa.gov.br/portaldeloterias/api"
     TIMEOUT = 30  # seconds
 
-    def __init__(self):
-        """Initialize the client with retry configuration."""
-        self.session = requests.Session()
+    def __init__(
+        self,
+        pool_maxsize: int | None = None,
+        cache_size: int | None = None,
+        archive: Callable[[str, int, bytes], Any] | None = None,
+        rate_limiter: RateLimiter | TokenBucket | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        """
+        Initialize the client and its connection pool.
 
-        # Configure retries
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+        Args:
+            pool_maxsize: Connections kept alive per host (default: CAIXA_POOL_MAXSIZE)
+            cache_size: Responses kept for conditional requests (default:
+                CAIXA_RESPONSE_CACHE_SIZE)
+            archive: Called with (lottery_slug, contest number, body) for
+                every response fetched and parsed
+            rate_limiter: Limiter taken before each request (default:
+                get_caixa_rate_limiter())
+            breaker: Circuit breaker around each request (default:
+                get_caixa_circuit_breaker())
+        """
+        self.session = requests.Session()
+        self.archive = archive
+        self.rate_limiter = rate_limiter or get_caixa_rate_limiter()
+        self.breaker = breaker or get_caixa_circuit_breaker()
+        self.cache_size = settings.CAIXA_RESPONSE_CACHE_SIZE if cache_size is None else cache_size
+        self._responses: OrderedDict[str, tuple[dict[str, str], DrawResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # All requests go to one host: one pool, sized for concurrent callers.
+        # No transport retries: a resent request would skip the rate limit and
+        # the breaker, so retrying is left to the callers (task retries)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize or settings.CAIXA_POOL_MAXSIZE,
+            max_retries=0,
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
 
@@ -71,139 +115,239 @@ class CaixaLotteryClient:
             "User-Agent": "CebolaLoterias/1.0",
         })
 
-    def get_latest_result(self, lottery_slug: str) -> DrawResult:
+    def get_latest_result(self, lottery_slug: str, lane: str = "sync") -> DrawResult:
         """
         Fetch the latest draw result for a lottery.
 
         Args:
             lottery_slug: API identifier for the lottery (e.g., "megasena")
+            lane: Rate limit lane of the caller ("sync" or "backfill")
 
         Returns:
             Parsed DrawResult object
 
         Raises:
+            CircuitOpenError: If the circuit breaker is open
             requests.RequestException: If the API request fails
             ValueError: If the response cannot be parsed
         """
         url = f"{self.BASE_URL}/{lottery_slug}"
-        return self._fetch_and_parse(url, lottery_slug)
+        return self._fetch_and_parse(url, lottery_slug, lane)
 
-    def get_result_by_number(self, lottery_slug: str, number: int) -> DrawResult:
+    def get_result_by_number(self, lottery_slug: str, number: int, lane: str = "sync") -> DrawResult:
         """
         Fetch a specific draw result by contest number.
 
         Args:
             lottery_slug: API identifier for the lottery
             number: Contest number
+            lane: Rate limit lane of the caller ("sync" or "backfill")
 
         Returns:
             Parsed DrawResult object
         """
         url = f"{self.BASE_URL}/{lottery_slug}/{number}"
-        return self._fetch_and_parse(url, lottery_slug)
+        return self._fetch_and_parse(url, lottery_slug, lane)
 
-    def _fetch_and_parse(self, url: str, lottery_slug: str) -> DrawResult:
-        """Fetch data from URL and parse into DrawResult."""
+    def _fetch_and_parse(self, url: str, lottery_slug: str, lane: str = "sync") -> DrawResult:
+        """Fetch data from URL and parse into DrawResult, revalidating cached results."""
+        self.breaker.allow()
+        self.rate_limiter.acquire(lane)
         logger.info(f"Fetching lottery data from: {url}")
 
-        response = self.session.get(url, timeout=self.TIMEOUT)
+        with self._lock:
+            cached = self._responses.get(url)
+
+        headers = {}
+        if cached is not None:
+            validators, _ = cached
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.TIMEOUT)
+        except requests.RequestException:
+            # Connection errors and timeouts
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        if response.status_code == 304 and cached is not None:
+            logger.debug(f"Not modified: {url}")
+            with self._lock:
+                self._responses.move_to_end(url)
+            return cached[1]
+
         response.raise_for_status()
 
         data = response.json()
         logger.debug(f"Received data for contest {data.get('numero')}")
 
-        return self._parse_response(data, lottery_slug)
+        result = self._parse_response(data, lottery_slug)
+        self._remember(url, response, result)
+
+        if self.archive is not None:
+            try:
+                self.archive(lottery_slug, result.number, response.content)
+            except Exception:
+                logger.exception(f"Could not archive response from {url}")
+
+        return result
+
+    def _remember(self, url: str, response: requests.Response, result: DrawResult):
+        """Keep a parsed result for conditional requests, if the response has validators."""
+        validators = {
+            header: response.headers[header]
+            for header in ("ETag", "Last-Modified")
+            if response.headers.get(header)
+        }
+        if not validators or self.cache_size < 1:
+            return
+
+        with self._lock:
+            self._responses[url] = (validators, result)
+            self._responses.move_to_end(url)
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
 
     def _parse_response(self, data: dict[str, Any], lottery_slug: str) -> DrawResult:
         """Parse CAIXA API response into DrawResult."""
-        # Parse numbers
-        numbers = self._parse_numbers(data.get("listaDezenas", []))
-
-        # Special handling for Federal
-        if lottery_slug == "federal" and not numbers:
-            # Federal doesn't have "listaDezenas", we extract from prize tiers (bilhetes)
-            # Usually order is 1st to 5th prize
-            prizes = data.get("listaRateioPremio", [])
-            numbers = []
-            for prize in prizes:
-                ticket = prize.get("numeroBilhete")
-                # Sometimes ticket comes as integer or string
-                if ticket:
-                    # Clean and ensure int
-                    try:
-                        clean_ticket = int(str(ticket).replace(".", "").strip())
-                        numbers.append(clean_ticket)
-                    except (ValueError, TypeError):
-                        continue
-            # Sort or keep order? Federal prizes have hierarchy, but Draw.numbers usually expects sorted
-            # for matching. However, for Federal, matching rules are specific.
-            # We'll store them as is (usually 5 numbers).
-
-        numbers_draw_order = self._parse_numbers(
-            data.get("dezenasSorteadasOrdemSorteio", [])
-        )
+        return parse_draw_result(data, lottery_slug)
 
-        # Special handling for Super Sete (cols) is usually automatic via listaDezenas
-
-        # Parse dates
-        draw_date = self._parse_date(data.get("dataApuracao", ""))
-        next_draw_date = self._parse_date(data.get("dataProximoConcurso", ""))
-
-        # Parse prize tiers
-        prize_tiers = self._parse_prize_tiers(data.get("listaRateioPremio", []))
-
-        # Clean location string (may contain null characters)
-        city_state = data.get("nomeMunicipioUFSorteio", "")
-        if city_state:
-            city_state = city_state.replace("\x00", "").strip()
-
-        # Create result object
-        return DrawResult(
-            number=data.get("numero", 0),
-            draw_date=draw_date,
-            numbers=numbers,
-            numbers_draw_order=numbers_draw_order if numbers_draw_order else None,
-            is_accumulated=data.get("acumulado", False),
-            accumulated_value=Decimal(str(data.get("valorAcumuladoProximoConcurso", 0))),
-            next_draw_estimate=Decimal(str(data.get("valorEstimadoProximoConcurso", 0))),
-            total_revenue=Decimal(str(data.get("valorArrecadado", 0))),
-            location=data.get("localSorteio", ""),
-            city_state=city_state,
-
-            next_draw_number=data.get("numeroConcursoProximo"),
-            next_draw_date=next_draw_date,
-            prize_tiers=prize_tiers,
-            raw_data=data,
-        )
 
-    def _parse_date(self, date_str: str) -> date | None:
-        """Parse date string from DD/MM/YYYY format."""
-        if not date_str:
-            return None
-        try:
-            return datetime.strptime(date_str, "%d/%m/%Y").date()
-        except ValueError:
-            logger.warning(f"Could not parse date: {date_str}")
-            return None
-
-    def _parse_numbers(self, numbers: list[str]) -> list[int]:
-        """Parse list of number strings into integers."""
-        if not numbers:
-            return []
-        try:
-            return [int(n) for n in numbers]
-        except (ValueError, TypeError):
-            logger.warning(f"Could not parse numbers: {numbers}")
-            return []
-
-    def _parse_prize_tiers(self, tiers: list[dict]) -> list[dict[str, Any]]:
-        """Parse prize tier data."""
-        parsed = []
-        for tier in tiers or []:
-            parsed.append({
-                "tier": tier.get("faixa", 0),
-                "description": tier.get("descricaoFaixa", ""),
-                "winners_count": tier.get("numeroDeGanhadores", 0),
-                "prize_value": Decimal(str(tier.get("valorPremio", 0))),
-            })
-        return parsed
+def parse_draw_result(data: dict[str, Any], lottery_slug: str) -> DrawResult:
+    """
+    Parse a CAIXA API payload into a DrawResult.
+
+    Needs no client, so stored payloads (imports, archived responses) are
+    parsed exactly like live responses.
+
+    Args:
+        data: Decoded CAIXA API payload
+        lottery_slug: API identifier of the lottery (e.g., "megasena")
+
+    Returns:
+        Parsed DrawResult object
+    """
+    # Parse numbers
+    numbers = _parse_numbers(data.get("listaDezenas", []))
+
+    # Special handling for Federal
+    if lottery_slug == "federal" and not numbers:
+        # Federal doesn't have "listaDezenas", we extract from prize tiers (bilhetes)
+        # Usually order is 1st to 5th prize
+        prizes = data.get("listaRateioPremio", [])
+        numbers = []
+        for prize in prizes:
+            ticket = prize.get("numeroBilhete")
+            # Sometimes ticket comes as integer or string
+            if ticket:
+                # Clean and ensure int
+                try:
+                    clean_ticket = int(str(ticket).replace(".", "").strip())
+                    numbers.append(clean_ticket)
+                except (ValueError, TypeError):
+                    continue
+        # Sort or keep order? Federal prizes have hierarchy, but Draw.numbers usually expects sorted
+        # for matching. However, for Federal, matching rules are specific.
+        # We'll store them as is (usually 5 numbers).
+
+    numbers_draw_order = _parse_numbers(
+        data.get("dezenasSorteadasOrdemSorteio", [])
+    )
+
+    # Special handling for Super Sete (cols) is usually automatic via listaDezenas
+
+    # Parse dates
+    draw_date = _parse_date(data.get("dataApuracao", ""))
+    next_draw_date = _parse_date(data.get("dataProximoConcurso", ""))
+
+    # Parse prize tiers
+    prize_tiers = _parse_prize_tiers(data.get("listaRateioPremio", []))
+
+    # Clean location string (may contain null characters)
+    city_state = data.get("nomeMunicipioUFSorteio", "")
+    if city_state:
+        city_state = city_state.replace("\x00", "").strip()
+
+    # Create result object
+    return DrawResult(
+        number=data.get("numero", 0),
+        draw_date=draw_date,
+        numbers=numbers,
+        numbers_draw_order=numbers_draw_order if numbers_draw_order else None,
+        is_accumulated=data.get("acumulado", False),
+        accumulated_value=Decimal(str(data.get("valorAcumuladoProximoConcurso", 0))),
+        next_draw_estimate=Decimal(str(data.get("valorEstimadoProximoConcurso", 0))),
+        total_revenue=Decimal(str(data.get("valorArrecadado", 0))),
+        location=data.get("localSorteio", ""),
+        city_state=city_state,
+
+        next_draw_number=data.get("numeroConcursoProximo"),
+        next_draw_date=next_draw_date,
+        prize_tiers=prize_tiers,
+        raw_data=data,
+    )
+
+def _parse_date(date_str: str) -> date | None:
+    """Parse date string from DD/MM/YYYY format."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, "%d/%m/%Y").date()
+    except ValueError:
+        logger.warning(f"Could not parse date: {date_str}")
+        return None
+
+def _parse_numbers(numbers: list[str]) -> list[int]:
+    """Parse list of number strings into integers."""
+    if not numbers:
+        return []
+    try:
+        return [int(n) for n in numbers]
+    except (ValueError, TypeError):
+        logger.warning(f"Could not parse numbers: {numbers}")
+        return []
+
+def _parse_prize_tiers(tiers: list[dict]) -> list[dict[str, Any]]:
+    """Parse prize tier data."""
+    parsed = []
+    for tier in tiers or []:
+        parsed.append({
+            "tier": tier.get("faixa", 0),
+            "description": tier.get("descricaoFaixa", ""),
+            "winners_count": tier.get("numeroDeGanhadores", 0),
+            "prize_value": Decimal(str(tier.get("valorPremio", 0))),
+        })
+    return parsed
+
+
+_caixa_client: CaixaLotteryClient | None = None
+_caixa_client_lock = threading.Lock()
+
+
+def get_caixa_client() -> CaixaLotteryClient:
+    """
+    Get the process-wide CAIXA client.
+
+    Created on first use, so each forked worker process builds its own
+    connection pool instead of inheriting the parent's sockets.
+    """
+    global _caixa_client
+    if _caixa_client is None:
+        with _caixa_client_lock:
+            if _caixa_client is None:
+                archive = None
+                if settings.CAIXA_ARCHIVE_RESPONSES:
+                    # Imported here: the services package depends on the clients
+                    from apps.lotteries.services.archive import archive_response
+
+                    archive = archive_response
+                _caixa_client = CaixaLotteryClient(archive=archive)
+    return _caixa_client
@@ -0,0 +1,144 @@
+"""
+Rate limiting for outgoing CAIXA API requests.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly at no more than `rate` per second.
+
+    Usage:
+        limiter = RateLimiter(rate=10)
+        limiter.acquire()  # blocks until the next slot
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self, lane: str = "sync"):
+        """Block until the caller may send one request (lanes are not told apart)."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class TokenBucket:
+    """
+    Rate limit shared by every worker process through the Django cache.
+
+    Tokens are counted in fixed windows with atomic cache increments, so
+    the limit holds across Celery workers as long as the cache is shared
+    (Redis in production). Each window holds `rate` tokens per second.
+
+    Lanes listed in `shares` may only take that fraction of each window,
+    leaving the rest to the other lanes: a long backfill cannot starve the
+    regular sync. If the cache is unreachable the bucket degrades to a
+    per-process RateLimiter.
+
+    Usage:
+        bucket = TokenBucket(rate=10, shares={"backfill": 0.8})
+        bucket.acquire("backfill")  # blocks until a token is available
+    """
+
+    KEY_PREFIX = "caixa:ratelimit"
+
+    def __init__(self, rate: float, shares: dict[str, float] | None = None, name: str = "caixa"):
+        self.rate = rate
+        self.window = max(1.0, 1.0 / rate) if rate > 0 else 1.0
+        self.capacity = max(1, int(rate * self.window)) if rate > 0 else 0
+        self.shares = shares or {}
+        self.name = name
+        self._fallback = RateLimiter(rate)
+
+    def acquire(self, lane: str = "sync"):
+        """Block until the caller may send one request in the given lane."""
+        if self.capacity == 0:
+            return
+
+        while True:
+            now = time.time()
+            window = int(now // self.window)
+            try:
+                taken = self._take(window, lane)
+            except Exception as exc:
+                logger.warning(f"Shared rate limit unavailable, limiting per process: {exc}")
+                self._fallback.acquire()
+                return
+
+            if taken:
+                return
+            self._count(f"throttled:{lane}")
+            time.sleep((window + 1) * self.window - now)
+
+    def metrics(self) -> dict:
+        """Get the configured limit, the tokens used in the current window and throttled waits per lane."""
+        window = int(time.time() // self.window)
+        lanes = {"sync", *self.shares}
+        keys = [self._key(window), *(self._key(f"throttled:{lane}") for lane in lanes)]
+        values = cache.get_many(keys)
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "shares": self.shares,
+            "used": values.get(self._key(window), 0),
+            "throttled": {lane: values.get(self._key(f"throttled:{lane}"), 0) for lane in sorted(lanes)},
+        }
+
+    def _take(self, window: int, lane: str) -> bool:
+        """Take a token from the window, within the lane's share."""
+        timeout = int(self.window) + 5
+        share = self.shares.get(lane)
+        if share is not None:
+            lane_key = self._key(f"{window}:{lane}")
+            cache.add(lane_key, 0, timeout)
+            if cache.incr(lane_key) > max(1, int(self.capacity * share)):
+                return False
+
+        key = self._key(window)
+        cache.add(key, 0, timeout)
+        return cache.incr(key) <= self.capacity
+
+    def _count(self, counter: str):
+        try:
+            key = self._key(counter)
+            cache.add(key, 0, None)
+            cache.incr(key)
+        except Exception:
+            pass
+
+    def _key(self, suffix) -> str:
+        return f"{self.KEY_PREFIX}:{self.name}:{suffix}"
+
+
+_caixa_rate_limiter: TokenBucket | None = None
+
+
+def get_caixa_rate_limiter() -> TokenBucket:
+    """
+    Get the limiter shared by every CAIXA API caller.
+
+    Allows settings.CAIXA_RATE_LIMIT requests per second across all
+    workers; backfills may use up to settings.CAIXA_BACKFILL_SHARE of them.
+    """
+    global _caixa_rate_limiter
+    if _caixa_rate_limiter is None:
+        _caixa_rate_limiter = TokenBucket(
+            settings.CAIXA_RATE_LIMIT,
+            shares={"backfill": settings.CAIXA_BACKFILL_SHARE},
+        )
+    return _caixa_rate_limiter
@@ -0,0 +1,102 @@
+"""
+Conditional GET support for public read endpoints.
+
+Public lottery data only changes when a new draw is synced, so responses
+are identified by the lottery data version: a matching If-None-Match or
+If-Modified-Since is answered with 304 before the view runs. The slug is
+first checked against the active lotteries (cached per catalog version, so
+without a query), so unknown or inactive slugs get a 404 without validators.
+
+Validators describe the current version, so a view that answers with data
+computed at an older version (stale-while-revalidate) marks its response
+with mark_outdated(): it is sent with no-cache and without validators.
+"""
+
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import Lottery
+from .services import get_catalog_version, get_lottery_version
+
+
+def lottery_etag(request, slug, *args, **kwargs) -> str:
+    """ETag derived from (lottery, latest draw number, data version)."""
+    version = get_lottery_version(slug)
+    return f"{slug}-{version.token}-v{settings.API_DATA_VERSION}"
+
+
+def lottery_last_modified(request, slug, *args, **kwargs) -> datetime | None:
+    """Last-Modified from the time the lottery version was published."""
+    version = get_lottery_version(slug)
+    if not version.draw_number:
+        return None
+    return datetime.fromtimestamp(version.published_at, tz=UTC)
+
+
+def catalog_etag(request, *args, **kwargs) -> str:
+    """ETag for endpoints covering every lottery."""
+    return f"catalog-{get_catalog_version()}-v{settings.API_DATA_VERSION}"
+
+
+# Only successful answers may be kept by shared caches, never errors
+CACHEABLE_STATUSES = {200, 304}
+
+
+def mark_outdated(response):
+    """Mark a response whose body predates the current version: no-cache, no validators."""
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _cache_control(view_func):
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if "no-cache" in response.get("Cache-Control", ""):
+            # The ETag and Last-Modified were computed for a newer body
+            del response["ETag"]
+            del response["Last-Modified"]
+        elif response.status_code in CACHEABLE_STATUSES:
+            patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+        return response
+
+    return wrapper
+
+
+ACTIVE_SLUGS_TTL = 60 * 60  # bounds how long a deleted lottery keeps answering
+
+
+def _active_lottery_slugs() -> frozenset[str]:
+    """Slugs of the active lotteries; saving a lottery bumps the catalog version."""
+    cache_key = f"lotteries:active_slugs:{get_catalog_version()}"
+    slugs = cache.get(cache_key)
+    if slugs is None:
+        slugs = frozenset(Lottery.objects.filter(is_active=True).values_list("slug", flat=True))
+        cache.set(cache_key, slugs, ACTIVE_SLUGS_TTL)
+    return slugs
+
+
+def _require_active_lottery(view_func):
+    def wrapper(request, slug, *args, **kwargs):
+        if slug not in _active_lottery_slugs():
+            raise Http404("No Lottery matches the given query.")
+        return view_func(request, slug, *args, **kwargs)
+
+    return wrapper
+
+
+def conditional_lottery_get(view_class):
+    """Class decorator: conditional GET keyed on the active lottery in the `slug` URL kwarg."""
+    decorator = condition(etag_func=lottery_etag, last_modified_func=lottery_last_modified)
+    return method_decorator([_cache_control, _require_active_lottery, decorator], name="get")(view_class)
+
+
+def conditional_catalog_get(view_class):
+    """Class decorator: conditional GET keyed on the catalog of all lotteries."""
+    decorator = condition(etag_func=catalog_etag)
+    return method_decorator([_cache_control, decorator], name="get")(view_class)
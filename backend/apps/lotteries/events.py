@@ -0,0 +1,124 @@
+"""
+Draw change events.
+
+A small in-process event bus that collects draw-changed events during a
+database transaction and dispatches them, grouped by lottery, once the
+transaction commits.
+"""
+
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DrawChangedHandler = Callable[[int, list[int]], None]
+
+
+class _PendingBatch:
+    """Events collected during one transaction, flushed by a single on_commit."""
+
+    def __init__(self, bus: "DrawEventBus"):
+        self.bus = bus
+        self.events: dict[int, set[int]] = {}
+        self.dispatched = False
+
+    def __call__(self):
+        self.dispatched = True
+        self.bus._dispatch(self.events)
+
+
+class DrawEventBus:
+    """
+    Coalesces draw-changed events and dispatches them after commit.
+
+    Events published inside one transaction are deduplicated per lottery,
+    so a bulk import of thousands of draws reaches each handler as a
+    single (lottery_id, draw_ids) call. Outside a transaction events are
+    dispatched immediately; events of rolled back transactions are dropped.
+
+    Usage:
+        draw_events.subscribe(handler)  # handler(lottery_id, draw_ids)
+        draw_events.publish(draw.lottery_id, [draw.id])
+
+        with draw_events.muted():  # the caller publishes the draws itself
+            Draw.objects.create(...)
+    """
+
+    def __init__(self):
+        self._handlers: list[DrawChangedHandler] = []
+        self._local = threading.local()
+
+    def subscribe(self, handler: DrawChangedHandler):
+        """Register a handler called with (lottery_id, draw_ids) after commit."""
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def publish(
+        self, lottery_id: int, draw_ids: Iterable[int], using: str = DEFAULT_DB_ALIAS
+    ):
+        """
+        Queue draw-changed events until the current transaction commits.
+
+        Args:
+            lottery_id: Lottery the draws belong to
+            draw_ids: IDs of the created/updated draws
+            using: Database alias of the transaction
+        """
+        if getattr(self._local, "muted", False):
+            return
+
+        batch = self._current_batch(using)
+        batch.events.setdefault(lottery_id, set()).update(draw_ids)
+
+        if not connections[using].in_atomic_block:
+            # Autocommit: nothing to wait for
+            batch()
+
+    @contextmanager
+    def muted(self):
+        """Drop the events published by this thread inside the block."""
+        previous = getattr(self._local, "muted", False)
+        self._local.muted = True
+        try:
+            yield
+        finally:
+            self._local.muted = previous
+
+    def _current_batch(self, using: str) -> _PendingBatch:
+        """Get the batch of the running transaction, registering a new one if needed."""
+        if not hasattr(self._local, "batches"):
+            self._local.batches = {}
+
+        batch = self._local.batches.get(using)
+        connection = connections[using]
+        # A batch is still open while its callback is queued on the connection;
+        # a rollback discards the callback, and with it the batch.
+        if (
+            batch is None
+            or batch.dispatched
+            or not connection.in_atomic_block
+            or not any(entry[1] is batch for entry in connection.run_on_commit)
+        ):
+            batch = _PendingBatch(self)
+            self._local.batches[using] = batch
+            if connection.in_atomic_block:
+                transaction.on_commit(batch, using=using)
+
+        return batch
+
+    def _dispatch(self, events: dict[int, set[int]]):
+        for lottery_id, draw_ids in events.items():
+            for handler in self._handlers:
+                try:
+                    handler(lottery_id, sorted(draw_ids))
+                except Exception:
+                    logger.exception(
+                        f"Draw event handler {handler!r} failed for lottery {lottery_id}"
+                    )
+
+
+draw_events = DrawEventBus()
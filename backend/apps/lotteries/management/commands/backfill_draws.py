@@ -0,0 +1,47 @@
+"""
+Backfill the missing contests of one or more lotteries.
+
+Usage:
+    python manage.py backfill_draws megasena --up-to 2900
+    python manage.py backfill_draws  # all active lotteries
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lotteries.clients import CircuitOpenError
+from apps.lotteries.models import Lottery
+from apps.lotteries.services import DrawBackfiller
+
+
+class Command(BaseCommand):
+    help = "Fetch and store every missing contest of the given lotteries from the CAIXA API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Lottery slugs (default: all active lotteries)")
+        parser.add_argument("--up-to", type=int, help="Last contest to backfill (default: latest)")
+        parser.add_argument("--workers", type=int, help="Concurrent fetches (default: CAIXA_BACKFILL_WORKERS)")
+
+    def handle(self, *args, **options):
+        lotteries = Lottery.objects.filter(is_active=True)
+        if options["slugs"]:
+            lotteries = lotteries.filter(slug__in=options["slugs"])
+            unknown = set(options["slugs"]) - set(lotteries.values_list("slug", flat=True))
+            if unknown:
+                raise CommandError(f"Unknown or inactive lotteries: {', '.join(sorted(unknown))}")
+
+        backfiller = DrawBackfiller(max_workers=options["workers"])
+        for lottery in lotteries:
+            try:
+                summary = backfiller.run(lottery, options["up_to"])
+            except CircuitOpenError as exc:
+                raise CommandError(f"CAIXA API unavailable: {exc}") from exc
+            self.stdout.write(
+                f"{lottery.slug}: {summary['created']}/{summary['missing']} missing contests stored"
+                f" up to #{summary['up_to']}"
+            )
+            if summary["failed"]:
+                self.stderr.write(f"{lottery.slug}: failed contests {summary['failed']}")
+            if summary["interrupted"]:
+                raise CommandError("CAIXA API unavailable: circuit breaker opened during the backfill")
+
+        self.stdout.write(self.style.SUCCESS("Backfill finished."))
@@ -0,0 +1,48 @@
+"""
+Import a historical dump of draws.
+
+Usage:
+    python manage.py import_draws megasena.csv --lottery megasena
+    python manage.py import_draws dump.zip --lottery lotofacil
+
+Accepts CAIXA JSON payloads (.json with one object or a list, .jsonl/.ndjson
+with one object per line), CSV exports (.csv) and zip archives of those.
+CSV exports give the numbers only: their draws are created without prize
+tiers.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lotteries.models import Lottery
+from apps.lotteries.services import DrawImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import draws from CAIXA JSON, CSV or zip files. "
+        "CSV imports create draws without prize tiers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files to import")
+        parser.add_argument("--lottery", required=True, help="Slug of the lottery the files belong to")
+
+    def handle(self, *args, **options):
+        try:
+            lottery = Lottery.objects.get(slug=options["lottery"])
+        except Lottery.DoesNotExist as exc:
+            raise CommandError(f"Unknown lottery: {options['lottery']}") from exc
+
+        importer = DrawImporter()
+        for path in options["paths"]:
+            try:
+                summary = importer.run(lottery, path)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not import {path}: {exc}") from exc
+
+            self.stdout.write(
+                f"{path}: {summary['created']} of {summary['read']} contests imported"
+                f" ({summary['unparseable']} unparseable)"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Import finished."))
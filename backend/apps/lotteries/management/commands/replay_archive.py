@@ -0,0 +1,40 @@
+"""
+Rebuild draws from the archived CAIXA responses, without network access.
+
+Usage:
+    python manage.py replay_archive megasena
+    python manage.py replay_archive --dry-run  # all lotteries, parse only
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lotteries.models import Lottery
+from apps.lotteries.services import ArchiveReplayer
+
+
+class Command(BaseCommand):
+    help = "Parse the archived CAIXA responses again and rewrite Draw and PrizeTier rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Lottery slugs (default: all lotteries)")
+        parser.add_argument("--dry-run", action="store_true", help="Parse the archive without writing")
+
+    def handle(self, *args, **options):
+        lotteries = Lottery.objects.all()
+        if options["slugs"]:
+            lotteries = lotteries.filter(slug__in=options["slugs"])
+            unknown = set(options["slugs"]) - set(lotteries.values_list("slug", flat=True))
+            if unknown:
+                raise CommandError(f"Unknown lotteries: {', '.join(sorted(unknown))}")
+
+        replayer = ArchiveReplayer()
+        for lottery in lotteries:
+            summary = replayer.run(lottery, dry_run=options["dry_run"])
+            self.stdout.write(
+                f"{lottery.slug}: {summary['replayed']} contests replayed, "
+                f"{summary['updated']} updated, {summary['created']} created"
+            )
+            if summary["failed"]:
+                self.stderr.write(f"{lottery.slug}: unparseable contests {summary['failed']}")
+
+        self.stdout.write(self.style.SUCCESS("Replay finished."))
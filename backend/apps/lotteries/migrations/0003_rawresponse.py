@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='Hash SHA-256 do corpo da resposta', max_length=64, unique=True, verbose_name='SHA-256')),
+                ('api_identifier', models.CharField(max_length=50, verbose_name='Identificador API')),
+                ('number', models.PositiveIntegerField(verbose_name='Número do concurso')),
+                ('body', models.BinaryField(help_text='Resposta JSON comprimida com zlib', verbose_name='Corpo comprimido')),
+                ('size', models.PositiveIntegerField(help_text='Tamanho em bytes da resposta descomprimida', verbose_name='Tamanho original')),
+                ('fetched_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Resposta da API',
+                'verbose_name_plural': 'Respostas da API',
+                'ordering': ['api_identifier', 'number', 'fetched_at'],
+                'indexes': [models.Index(fields=['api_identifier', 'number'], name='lotteries_r_api_ide_d9f59b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:02
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def raw_data_digest(raw_data):
+    # Frozen copy of apps.lotteries.models.raw_data_digest
+    canonical = json.dumps(raw_data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def fill_raw_data_hash(apps, schema_editor):
+    Draw = apps.get_model("lotteries", "Draw")
+    batch = []
+    for draw in Draw.objects.only("id", "raw_data").iterator(chunk_size=BATCH_SIZE):
+        draw.raw_data_hash = raw_data_digest(draw.raw_data)
+        batch.append(draw)
+        if len(batch) >= BATCH_SIZE:
+            Draw.objects.bulk_update(batch, ["raw_data_hash"])
+            batch = []
+    if batch:
+        Draw.objects.bulk_update(batch, ["raw_data_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0003_rawresponse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draw',
+            name='raw_data_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 de raw_data, para detectar correções da CAIXA', max_length=64, verbose_name='Hash dos dados brutos'),
+        ),
+        migrations.RunPython(fill_raw_data_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+SCHEDULER_TASK = "apps.lotteries.tasks.schedule_lottery_syncs"
+SCHEDULER_NAME = "Sincronização pelo calendário de sorteios"
+FIXED_INTERVAL_TASKS = [
+    "apps.lotteries.tasks.sync_all_active_lotteries",
+    "apps.lotteries.tasks.sync_lottery_results",
+]
+
+
+def schedule_calendar_syncs(apps, schema_editor):
+    """Replace fixed-interval sync polling with the calendar scheduler."""
+    IntervalSchedule = apps.get_model("django_celery_beat", "IntervalSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    PeriodicTask.objects.filter(task__in=FIXED_INTERVAL_TASKS, enabled=True).update(enabled=False)
+
+    interval, _ = IntervalSchedule.objects.get_or_create(every=5, period="minutes")
+    PeriodicTask.objects.update_or_create(
+        name=SCHEDULER_NAME,
+        defaults={"task": SCHEDULER_TASK, "interval": interval, "enabled": True},
+    )
+
+
+def unschedule_calendar_syncs(apps, schema_editor):
+    """Restore the fixed-interval sync polling."""
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name=SCHEDULER_NAME).delete()
+    PeriodicTask.objects.filter(task__in=FIXED_INTERVAL_TASKS, enabled=False).update(enabled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0004_draw_raw_data_hash'),
+        ('django_celery_beat', '0018_improve_crontab_helptext'),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_calendar_syncs, unschedule_calendar_syncs),
+    ]
@@ -1,12 +1,23 @@
 """
 Models for lotteries app.
 
-Defines Lottery, Draw, and PrizeTier models for storing lottery results.
+Defines Lottery, Draw, and PrizeTier models for storing lottery results,
+and RawResponse for archiving the CAIXA API responses they came from.
 """
 
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
+def raw_data_digest(raw_data) -> str:
+    """SHA-256 of a CAIXA payload, independent of key order."""
+    canonical = json.dumps(raw_data, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class Lottery(models.Model):
     """
     Represents a lottery type (e.g., Mega-Sena, Quina, Lotofácil).
@@ -143,6 +154,13 @@ class Draw(models.Model):
         verbose_name="Dados brutos",
         help_text="Resposta completa da API da CAIXA",
     )
+    raw_data_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name="Hash dos dados brutos",
+        help_text="SHA-256 de raw_data, para detectar correções da CAIXA",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -163,73 +181,25 @@ class Draw(models.Model):
         """
         Valida consistência dos números sorteados conforme regras da loteria.
         Implementa validações do DS CAIXA para garantir qualidade de dados.
+
+        As regras ficam em DrawBatchValidator, que valida lotes inteiros na
+        ingestão em massa; aqui elas rodam sobre um lote de um sorteio.
         """
         from django.core.exceptions import ValidationError
 
+        from apps.lotteries.services.validation import DrawBatchValidator
+
         super().clean()
 
-        # Validação 1: numbers deve ser uma lista
-        if not isinstance(self.numbers, list):
-            raise ValidationError({
-                'numbers': 'Números devem ser uma lista.'
-            })
-
-        # Validação 2: Quantidade de números correto
-        expected_count = self.lottery.numbers_count
-        if len(self.numbers) != expected_count:
-            raise ValidationError({
-                'numbers': f'{self.lottery.name} requer exatamente {expected_count} números, '
-                          f'mas foram fornecidos {len(self.numbers)}.'
-            })
-
-        # Validação 3: Todos os números devem ser inteiros
-        for num in self.numbers:
-            if not isinstance(num, int):
-                raise ValidationError({
-                    'numbers': f'Número inválido: {num}. Todos os números devem ser inteiros.'
-                })
-
-        # Validação 4: Números dentro do range permitido
-        min_num = self.lottery.min_number
-        max_num = self.lottery.max_number
-        
-        for num in self.numbers:
-            if num < min_num or num > max_num:
-                raise ValidationError({
-                    'numbers': f'Número {num} fora do intervalo permitido '
-                              f'[{min_num}-{max_num}] para {self.lottery.name}.'
-                })
-
-        # Validação 5: Sem números duplicados
-        if len(set(self.numbers)) != len(self.numbers):
-            duplicates = [num for num in self.numbers if self.numbers.count(num) > 1]
-            raise ValidationError({
-                'numbers': f'Números duplicados não são permitidos. '
-                          f'Duplicatas encontradas: {set(duplicates)}'
-            })
-
-        # Validação 6: Validar numbers_draw_order se fornecido
-        if self.numbers_draw_order is not None:
-            if not isinstance(self.numbers_draw_order, list):
-                raise ValidationError({
-                    'numbers_draw_order': 'Deve ser uma lista.'
-                })
-            
-            if len(self.numbers_draw_order) != expected_count:
-                raise ValidationError({
-                    'numbers_draw_order': f'Deve conter exatamente {expected_count} números.'
-                })
-            
-            # Deve conter os mesmos números (só ordem diferente)
-            if set(self.numbers_draw_order) != set(self.numbers):
-                raise ValidationError({
-                    'numbers_draw_order': 'Deve conter os mesmos números que o campo numbers.'
-                })
+        errors = DrawBatchValidator(self.lottery).check(self)
+        if errors:
+            raise ValidationError(errors)
 
     def save(self, *args, **kwargs):
         """
         Override save para garantir validação antes de salvar.
         """
+        self.raw_data_hash = raw_data_digest(self.raw_data)
         self.full_clean()
         super().save(*args, **kwargs)
 
@@ -281,3 +251,46 @@ class PrizeTier(models.Model):
 
     def __str__(self):
         return f"{self.draw} - {self.description}"
+
+
+class RawResponse(models.Model):
+    """
+    A CAIXA API response body, zlib-compressed and addressed by its SHA-256.
+
+    Identical responses are stored once; a contest corrected by CAIXA after
+    the draw keeps one row per distinct version.
+    """
+
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="SHA-256",
+        help_text="Hash SHA-256 do corpo da resposta",
+    )
+    api_identifier = models.CharField(
+        max_length=50,
+        verbose_name="Identificador API",
+    )
+    number = models.PositiveIntegerField(
+        verbose_name="Número do concurso",
+    )
+    body = models.BinaryField(
+        verbose_name="Corpo comprimido",
+        help_text="Resposta JSON comprimida com zlib",
+    )
+    size = models.PositiveIntegerField(
+        verbose_name="Tamanho original",
+        help_text="Tamanho em bytes da resposta descomprimida",
+    )
+    fetched_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Resposta da API"
+        verbose_name_plural = "Respostas da API"
+        ordering = ["api_identifier", "number", "fetched_at"]
+        indexes = [
+            models.Index(fields=["api_identifier", "number"]),
+        ]
+
+    def __str__(self):
+        return f"{self.api_identifier} #{self.number} ({self.digest[:12]})"
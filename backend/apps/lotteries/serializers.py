@@ -120,3 +120,41 @@ class SyncResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
     draw_number = serializers.IntegerField(required=False)
     draw_id = serializers.IntegerField(required=False)
+
+
+class DrawGapSerializer(serializers.Serializer):
+    """Serializer for the stored history health of a lottery."""
+
+    lottery = serializers.CharField()
+    latest_number = serializers.IntegerField(allow_null=True)
+    missing_count = serializers.IntegerField()
+    missing_numbers = serializers.ListField(child=serializers.IntegerField())
+
+
+class CircuitBreakerStateSerializer(serializers.Serializer):
+    """Serializer for the state of the CAIXA API circuit breaker."""
+
+    state = serializers.ChoiceField(choices=["closed", "open", "half_open"])
+    failures = serializers.IntegerField()
+    failure_threshold = serializers.IntegerField()
+    opened_at = serializers.DateTimeField(allow_null=True)
+    retry_at = serializers.DateTimeField(allow_null=True)
+    probing = serializers.BooleanField()
+    trips = serializers.IntegerField()
+
+
+class RateLimitMetricsSerializer(serializers.Serializer):
+    """Serializer for the usage of the shared CAIXA API rate limit."""
+
+    rate = serializers.FloatField()
+    capacity = serializers.IntegerField()
+    shares = serializers.DictField(child=serializers.FloatField())
+    used = serializers.IntegerField()
+    throttled = serializers.DictField(child=serializers.IntegerField())
+
+
+class CaixaStatusSerializer(serializers.Serializer):
+    """Serializer for the CAIXA API client health."""
+
+    breaker = CircuitBreakerStateSerializer()
+    rate_limit = RateLimitMetricsSerializer()
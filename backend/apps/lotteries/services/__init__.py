@@ -0,0 +1,44 @@
+"""
+Lotteries services package.
+"""
+
+from .archive import ArchiveReplayer, archive_response, iter_archived_payloads
+from .backfill import DrawBackfiller
+from .calendar import DrawCalendar, SyncPlan
+from .gaps import find_missing_numbers, find_missing_numbers_by_lottery, get_gap_report
+from .importer import DrawImporter, iter_payloads
+from .ingest import UpsertResult, bulk_insert_draws, upsert_draws, validate_results
+from .latest import get_latest_draw_payload
+from .validation import DrawBatchValidator
+from .versioning import (
+    LotteryVersion,
+    get_catalog_version,
+    get_lottery_version,
+    next_lottery_version,
+    publish_lottery_version,
+)
+
+__all__ = [
+    "ArchiveReplayer",
+    "DrawBackfiller",
+    "DrawBatchValidator",
+    "DrawCalendar",
+    "DrawImporter",
+    "LotteryVersion",
+    "SyncPlan",
+    "UpsertResult",
+    "archive_response",
+    "bulk_insert_draws",
+    "find_missing_numbers",
+    "find_missing_numbers_by_lottery",
+    "get_catalog_version",
+    "get_gap_report",
+    "get_latest_draw_payload",
+    "get_lottery_version",
+    "iter_archived_payloads",
+    "iter_payloads",
+    "next_lottery_version",
+    "publish_lottery_version",
+    "upsert_draws",
+    "validate_results",
+]
@@ -0,0 +1,185 @@
+"""
+Raw CAIXA response archive.
+
+Every response fetched from the API is stored compressed and addressed by
+its SHA-256, so the whole history can be parsed again offline: a parser
+fix is rolled out by replaying the archive instead of refetching.
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from collections.abc import Iterator
+
+from django.db import transaction
+
+from apps.lotteries.clients import DrawResult, parse_draw_result
+from apps.lotteries.events import draw_events
+from apps.lotteries.models import Draw, Lottery, PrizeTier, RawResponse
+
+from .ingest import (
+    DRAW_RESULT_FIELDS,
+    build_prize_tiers,
+    bulk_insert_draws,
+    validate_results,
+)
+from .versioning import publish_lottery_version
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = 6
+
+# Draw fields rewritten from a replayed payload
+REPLAYED_FIELDS = [*DRAW_RESULT_FIELDS, "raw_data_hash"]
+
+
+def archive_response(api_identifier: str, number: int, body: bytes) -> str:
+    """
+    Store a response body unless an identical one is already archived.
+
+    Args:
+        api_identifier: CAIXA identifier of the lottery
+        number: Contest number of the response
+        body: Raw response body
+
+    Returns:
+        SHA-256 hex digest of the body
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    RawResponse.objects.bulk_create(
+        [
+            RawResponse(
+                digest=digest,
+                api_identifier=api_identifier,
+                number=number,
+                body=zlib.compress(body, COMPRESSION_LEVEL),
+                size=len(body),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    return digest
+
+
+def iter_archived_payloads(api_identifier: str) -> Iterator[tuple[int, dict]]:
+    """
+    Stream the latest archived payload of every contest, ascending.
+
+    Yields:
+        (contest number, decoded JSON payload) pairs
+    """
+    rows = (
+        RawResponse.objects.filter(api_identifier=api_identifier)
+        .order_by("number", "fetched_at", "id")
+        .values_list("number", "body")
+        .iterator(chunk_size=1000)
+    )
+
+    current = None
+    for number, body in rows:
+        if current is not None and number != current[0]:
+            yield current[0], _decode(current[1])
+        current = (number, body)
+
+    if current is not None:
+        yield current[0], _decode(current[1])
+
+
+def _decode(body) -> dict:
+    return json.loads(zlib.decompress(bytes(body)))
+
+
+class ArchiveReplayer:
+    """
+    Rebuilds Draw and PrizeTier rows by parsing archived responses again.
+
+    No request is sent: payloads go through parse_draw_result and the same
+    validation as live ingestion; contests that fail either are reported in
+    the summary and left untouched. Draws are rewritten with bulk_update and
+    their prize tiers replaced in bulk; contests in the archive but not in
+    the database are inserted.
+
+    Usage:
+        summary = ArchiveReplayer().run(lottery)
+    """
+
+    BATCH_SIZE = 500
+
+    def run(self, lottery: Lottery, dry_run: bool = False) -> dict:
+        """
+        Replay the archive of a lottery.
+
+        Args:
+            lottery: Lottery to rebuild
+            dry_run: Parse everything but write nothing
+
+        Returns:
+            Dict with the replayed, updated and created counts, and the
+            contest numbers that failed parsing or validation
+        """
+        summary = {"lottery": lottery.slug, "replayed": 0, "updated": 0, "created": 0, "failed": []}
+
+        batch: list[DrawResult] = []
+        for number, payload in iter_archived_payloads(lottery.api_identifier):
+            try:
+                batch.append(parse_draw_result(payload, lottery.api_identifier))
+            except Exception as exc:
+                logger.warning(f"Could not parse archived {lottery.slug} #{number}: {exc}")
+                summary["failed"].append(number)
+                continue
+
+            if len(batch) >= self.BATCH_SIZE:
+                self._apply(lottery, batch, summary, dry_run)
+                batch = []
+
+        if batch:
+            self._apply(lottery, batch, summary, dry_run)
+
+        logger.info(
+            f"Replayed {summary['replayed']} archived contests of {lottery.slug}: "
+            f"{summary['updated']} updated, {summary['created']} created"
+        )
+        return summary
+
+    def _apply(self, lottery: Lottery, results: list[DrawResult], summary: dict, dry_run: bool):
+        pairs, errors = validate_results(lottery, results)
+        summary["failed"].extend(errors)
+        summary["replayed"] += len(pairs)
+        if dry_run or not pairs:
+            return
+
+        existing = {
+            draw.number: draw
+            for draw in Draw.objects.filter(lottery=lottery, number__in=[draw.number for draw, _ in pairs])
+        }
+        new_results = [result for draw, result in pairs if draw.number not in existing]
+
+        with transaction.atomic():
+            draws, tiers, renumbered = [], [], []
+            for parsed, result in pairs:
+                draw = existing.get(parsed.number)
+                if draw is None:
+                    continue
+
+                if draw.numbers != parsed.numbers or draw.numbers_draw_order != parsed.numbers_draw_order:
+                    renumbered.append(draw.id)
+                for name in REPLAYED_FIELDS:
+                    setattr(draw, name, getattr(parsed, name))
+                draws.append(draw)
+
+                tiers.extend(build_prize_tiers(draw, result))
+
+            if draws:
+                Draw.objects.bulk_update(draws, REPLAYED_FIELDS, batch_size=self.BATCH_SIZE)
+                PrizeTier.objects.filter(draw__in=draws).delete()
+                PrizeTier.objects.bulk_create(tiers, batch_size=self.BATCH_SIZE)
+                if renumbered:
+                    draw_events.publish(lottery.id, renumbered)
+                if len(renumbered) < len(draws):
+                    transaction.on_commit(lambda: publish_lottery_version(lottery.slug))
+
+            created = bulk_insert_draws(lottery, new_results) if new_results else []
+
+        summary["updated"] += len(draws)
+        summary["created"] += len(created)
@@ -0,0 +1,118 @@
+"""
+Historical backfill service.
+
+Finds the contests missing for a lottery, fetches them concurrently from
+the CAIXA API in the backfill lane of the shared rate limit and inserts
+them in batches.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from apps.lotteries.clients import (
+    CaixaLotteryClient,
+    CircuitOpenError,
+    DrawResult,
+    get_caixa_client,
+)
+from apps.lotteries.models import Lottery
+
+from .gaps import find_missing_numbers
+from .ingest import bulk_insert_draws
+
+logger = logging.getLogger(__name__)
+
+
+class DrawBackfiller:
+    """
+    Loads the missing history of a lottery.
+
+    Contests are fetched by a thread pool through the process-wide client
+    (and its connection pool), in the "backfill" lane of the shared rate
+    limit. Results are inserted by the calling thread in batches while the
+    workers keep fetching. If the circuit breaker opens, the contests not
+    fetched yet are cancelled and reported as failed.
+
+    Usage:
+        summary = DrawBackfiller().run(lottery)
+    """
+
+    BATCH_SIZE = 200
+
+    LANE = "backfill"
+
+    def __init__(self, max_workers: int | None = None, client: CaixaLotteryClient | None = None):
+        self.max_workers = max_workers or settings.CAIXA_BACKFILL_WORKERS
+        self.client = client or get_caixa_client()
+
+    def run(self, lottery: Lottery, up_to: int | None = None) -> dict:
+        """
+        Fetch and store every missing contest of a lottery.
+
+        Args:
+            lottery: Lottery to backfill
+            up_to: Last contest to backfill (default: latest published contest)
+
+        Returns:
+            Dict with the missing, created and failed contest counts
+        """
+        batch: list[DrawResult] = []
+        if up_to is None:
+            latest = self._fetch(lottery.api_identifier, None)
+            up_to = latest.number
+            batch.append(latest)
+
+        fetched = {result.number for result in batch}
+        missing = find_missing_numbers(lottery, up_to)
+        to_fetch = [number for number in missing if number not in fetched]
+        logger.info(f"Backfilling {len(missing)} contests of {lottery.slug} up to #{up_to}")
+
+        created = 0
+        failed = []
+        interrupted = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._fetch, lottery.api_identifier, number): number
+                for number in to_fetch
+            }
+            for future in as_completed(futures):
+                try:
+                    if future.cancelled():
+                        failed.append(futures[future])
+                        continue
+                    batch.append(future.result())
+                except CircuitOpenError as exc:
+                    failed.append(futures[future])
+                    if not interrupted:
+                        logger.warning(f"Stopping backfill of {lottery.slug}: {exc}")
+                        interrupted = True
+                        for pending in futures:
+                            pending.cancel()
+                except Exception as exc:
+                    logger.warning(f"Failed to fetch {lottery.slug} #{futures[future]}: {exc}")
+                    failed.append(futures[future])
+
+                if len(batch) >= self.BATCH_SIZE:
+                    created += len(bulk_insert_draws(lottery, batch))
+                    batch = []
+
+        if batch:
+            created += len(bulk_insert_draws(lottery, batch))
+
+        logger.info(f"Backfilled {created} contests of {lottery.slug} ({len(failed)} failed)")
+        return {
+            "lottery": lottery.slug,
+            "up_to": up_to,
+            "missing": len(missing),
+            "created": created,
+            "failed": sorted(failed),
+            "interrupted": interrupted,
+        }
+
+    def _fetch(self, api_identifier: str, number: int | None) -> DrawResult:
+        """Fetch one contest (or the latest) in the backfill lane."""
+        if number is None:
+            return self.client.get_latest_result(api_identifier, lane=self.LANE)
+        return self.client.get_result_by_number(api_identifier, number, lane=self.LANE)
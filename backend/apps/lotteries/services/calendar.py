@@ -0,0 +1,166 @@
+"""
+Draw-calendar-aware sync planning.
+
+Each stored draw announces the next contest (next_draw_number and
+next_draw_date). The planner only polls the CAIXA API for a lottery once
+that contest is expected to have a result, backing off between attempts,
+and otherwise only polls a few times after a result lands, to pick up
+CAIXA's corrections.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.lotteries.models import Draw, Lottery
+
+PLAN_TTL = 60 * 60 * 24 * 14  # state of a contest nobody polled for two weeks is stale
+
+
+@dataclass
+class SyncPlan:
+    """
+    Polling decision for one lottery.
+
+    Attributes:
+        due: Whether the lottery should be synced now
+        target: Contest number being waited for
+        reason: "waiting" (result not expected yet), "followup" (checking
+            the stored result for corrections), "polling" (inside the
+            window after the expected draw time), "overdue" (window
+            elapsed or no draw date known) or "backoff" (polled recently)
+        next_check: Earliest time a poll can become due
+    """
+
+    due: bool
+    target: int
+    reason: str
+    next_check: datetime
+
+
+class DrawCalendar:
+    """
+    Decides when each lottery needs a sync.
+
+    After the expected draw time (next_draw_date at CAIXA_DRAW_TIME) plus
+    CAIXA_RESULT_DELAY, the lottery is polled with an interval doubling
+    from CAIXA_POLL_MIN_INTERVAL up to CAIXA_POLL_MAX_INTERVAL. Once
+    CAIXA_POLL_WINDOW has elapsed without a result (or when no draw date is
+    known) it falls back to CAIXA_POLL_OVERDUE_INTERVAL. Attempts are kept
+    in cache per lottery and reset when a new contest is stored.
+
+    While waiting, the latest stored contest gets CAIXA_FOLLOWUP_POLLS
+    follow-up polls, the first CAIXA_FOLLOWUP_INTERVAL after it was stored
+    and each later one twice as far from the previous.
+
+    Usage:
+        plan = DrawCalendar().plan(lottery)
+        if plan.due:
+            sync_lottery_results.delay(lottery.slug)
+    """
+
+    def __init__(self):
+        hour, minute = (int(part) for part in settings.CAIXA_DRAW_TIME.split(":"))
+        self.draw_time = time(hour, minute)
+        self.result_delay = timedelta(minutes=settings.CAIXA_RESULT_DELAY)
+        self.min_interval = timedelta(minutes=settings.CAIXA_POLL_MIN_INTERVAL)
+        self.max_interval = timedelta(minutes=settings.CAIXA_POLL_MAX_INTERVAL)
+        self.window = timedelta(hours=settings.CAIXA_POLL_WINDOW)
+        self.overdue_interval = timedelta(minutes=settings.CAIXA_POLL_OVERDUE_INTERVAL)
+        self.followup_polls = settings.CAIXA_FOLLOWUP_POLLS
+        self.followup_interval = timedelta(minutes=settings.CAIXA_FOLLOWUP_INTERVAL)
+        # Doublings after which min_interval reaches max_interval
+        self.max_doublings = (
+            max(0, math.ceil(math.log2(self.max_interval / self.min_interval))) if self.min_interval else 0
+        )
+
+    def plan(self, lottery: Lottery, now: datetime | None = None, record: bool = True) -> SyncPlan:
+        """
+        Decide whether a lottery should be synced now.
+
+        Args:
+            lottery: Lottery to plan
+            now: Current time (default: timezone.now())
+            record: Count a due plan as a poll attempt
+
+        Returns:
+            SyncPlan for the lottery
+        """
+        now = now or timezone.now()
+        latest = (
+            Draw.objects.filter(lottery=lottery)
+            .order_by("-number")
+            .only("number", "next_draw_number", "next_draw_date", "created_at")
+            .first()
+        )
+        target = (latest.next_draw_number or latest.number + 1) if latest else 1
+
+        state = cache.get(_plan_key(lottery.slug))
+        if not state or state["target"] != target:
+            state = {"target": target, "attempts": 0, "last_poll": None, "followups": 0, "last_followup": None}
+
+        expected = self.expected_at(latest)
+        if expected is not None and now < expected + self.result_delay:
+            next_check = expected + self.result_delay
+            followup = self._followup_at(latest, state, now)
+            if followup is None or now < followup:
+                return SyncPlan(False, target, "waiting", min(followup or next_check, next_check))
+
+            if record:
+                state["followups"] = state.get("followups", 0) + 1
+                state["last_followup"] = now.timestamp()
+                cache.set(_plan_key(lottery.slug), state, PLAN_TTL)
+            upcoming = self._followup_at(latest, state, now)
+            return SyncPlan(True, target, "followup", min(upcoming or next_check, next_check))
+
+        overdue = expected is None or now - (expected + self.result_delay) > self.window
+        reason = "overdue" if overdue else "polling"
+
+        if state["last_poll"] is not None:
+            next_poll = datetime.fromtimestamp(state["last_poll"], tz=now.tzinfo) + self._interval(
+                overdue, state["attempts"]
+            )
+            if now < next_poll:
+                return SyncPlan(False, target, "backoff", next_poll)
+
+        if record:
+            state["attempts"] += 1
+            state["last_poll"] = now.timestamp()
+            cache.set(_plan_key(lottery.slug), state, PLAN_TTL)
+
+        return SyncPlan(True, target, reason, now + self._interval(overdue, state["attempts"] or 1))
+
+    def _interval(self, overdue: bool, attempts: int) -> timedelta:
+        """Get the wait after the given number of polls for the awaited contest."""
+        if overdue:
+            return self.overdue_interval
+        # Clamped so long outages cannot overflow timedelta
+        return min(self.min_interval * 2 ** min(attempts - 1, self.max_doublings), self.max_interval)
+
+    def _followup_at(self, latest: Draw | None, state: dict, now: datetime) -> datetime | None:
+        """Get when the next follow-up poll of the latest stored contest is due, if any is left."""
+        done = state.get("followups", 0)
+        if latest is None or done >= self.followup_polls:
+            return None
+        if done and state.get("last_followup") is not None:
+            since = datetime.fromtimestamp(state["last_followup"], tz=now.tzinfo)
+        else:
+            since = latest.created_at
+        return since + self.followup_interval * 2**done
+
+    def expected_at(self, draw: Draw | None) -> datetime | None:
+        """Get the time the result of the contest after a draw is expected."""
+        if draw is None or draw.next_draw_date is None:
+            return None
+        return timezone.make_aware(
+            datetime.combine(draw.next_draw_date, self.draw_time),
+            timezone.get_default_timezone(),
+        )
+
+
+def _plan_key(lottery_slug: str) -> str:
+    return f"lotteries:{lottery_slug}:sync_plan"
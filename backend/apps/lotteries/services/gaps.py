@@ -0,0 +1,135 @@
+"""
+Contest gap detection.
+
+Finds the contest numbers missing from the stored history with one query:
+generate_series produces every expected number and an anti-join against
+Draw(lottery, number) keeps the holes, each probe served by the
+(lottery, -number) index.
+"""
+
+from django.db import connection
+from django.db.models import Max
+
+from apps.lotteries.models import Draw, Lottery
+
+_GAPS_SQL = """
+    SELECT lottery.id, expected.number
+    FROM {lottery_table} AS lottery
+    CROSS JOIN LATERAL generate_series(
+        1,
+        COALESCE(
+            %s,
+            (
+                SELECT draw.number FROM {draw_table} AS draw
+                WHERE draw.lottery_id = lottery.id
+                ORDER BY draw.number DESC LIMIT 1
+            ),
+            0
+        )
+    ) AS expected(number)
+    WHERE lottery.id = ANY(%s)
+      AND NOT EXISTS (
+        SELECT 1 FROM {draw_table} AS draw
+        WHERE draw.lottery_id = lottery.id AND draw.number = expected.number
+      )
+    ORDER BY lottery.id, expected.number
+"""
+
+
+def find_missing_numbers(lottery: Lottery, up_to: int | None = None) -> list[int]:
+    """
+    Get the contest numbers from 1 to up_to that are not stored.
+
+    Args:
+        lottery: Lottery to check
+        up_to: Last contest number expected (default: latest stored contest)
+
+    Returns:
+        Missing contest numbers, ascending
+    """
+    return find_missing_numbers_by_lottery([lottery.id], up_to).get(lottery.id, [])
+
+
+def find_missing_numbers_by_lottery(
+    lottery_ids: list[int], up_to: int | None = None
+) -> dict[int, list[int]]:
+    """
+    Get the missing contest numbers of several lotteries in one query.
+
+    Args:
+        lottery_ids: Lotteries to check
+        up_to: Last contest number expected (default: latest stored contest
+            of each lottery)
+
+    Returns:
+        Dict of lottery id -> missing contest numbers, ascending; lotteries
+        without gaps are left out
+    """
+    if not lottery_ids:
+        return {}
+
+    if connection.vendor != "postgresql":
+        return _find_missing_numbers_python(lottery_ids, up_to)
+
+    sql = _GAPS_SQL.format(
+        lottery_table=connection.ops.quote_name(Lottery._meta.db_table),
+        draw_table=connection.ops.quote_name(Draw._meta.db_table),
+    )
+    missing: dict[int, list[int]] = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [up_to, list(lottery_ids)])
+        for lottery_id, number in cursor.fetchall():
+            missing.setdefault(lottery_id, []).append(number)
+    return missing
+
+
+def get_gap_report(lotteries=None) -> list[dict]:
+    """
+    Summarize the stored history of each lottery for health checks.
+
+    Args:
+        lotteries: Lotteries to check (default: all active lotteries)
+
+    Returns:
+        One dict per lottery with the latest stored contest and its gaps
+    """
+    if lotteries is None:
+        lotteries = Lottery.objects.filter(is_active=True).order_by("name")
+    lotteries = list(lotteries)
+
+    missing = find_missing_numbers_by_lottery([lottery.id for lottery in lotteries])
+    latest = dict(
+        Draw.objects.filter(lottery__in=lotteries)
+        .values("lottery_id")
+        .annotate(latest=Max("number"))
+        .values_list("lottery_id", "latest")
+    )
+
+    return [
+        {
+            "lottery": lottery.slug,
+            "latest_number": latest.get(lottery.id),
+            "missing_count": len(missing.get(lottery.id, [])),
+            "missing_numbers": missing.get(lottery.id, []),
+        }
+        for lottery in lotteries
+    ]
+
+
+def _find_missing_numbers_python(lottery_ids: list[int], up_to: int | None) -> dict[int, list[int]]:
+    """Set-difference fallback for databases without generate_series."""
+    stored: dict[int, set[int]] = {lottery_id: set() for lottery_id in lottery_ids}
+    queryset = Draw.objects.filter(lottery_id__in=lottery_ids)
+    if up_to is not None:
+        queryset = queryset.filter(number__lte=up_to)
+    for lottery_id, number in queryset.values_list("lottery_id", "number"):
+        stored[lottery_id].add(number)
+
+    missing = {}
+    for lottery_id, numbers in stored.items():
+        last = up_to if up_to is not None else max(numbers, default=0)
+        holes = [number for number in range(1, last + 1) if number not in numbers]
+        if holes:
+            missing[lottery_id] = holes
+    return missing
+
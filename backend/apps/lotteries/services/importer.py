@@ -0,0 +1,213 @@
+"""
+Historical draw import from files.
+
+Reads CAIXA JSON payloads (one object, a list of objects or one object per
+line), CSV exports, or a zip archive of such files. Rows are streamed,
+converted to CAIXA payloads, parsed with parse_draw_result and inserted in
+validated batches.
+
+CSV rows only carry the contest, date, numbers and accumulated flag: prize
+columns are ignored, so draws imported from CSV have no prize tiers.
+"""
+
+import csv
+import io
+import json
+import logging
+import re
+import unicodedata
+import zipfile
+from collections.abc import Iterator
+from itertools import chain
+from pathlib import Path
+from typing import TextIO
+
+from apps.lotteries.clients import DrawResult, parse_draw_result
+from apps.lotteries.models import Lottery
+
+from .ingest import bulk_insert_draws
+
+logger = logging.getLogger(__name__)
+
+# Normalized CSV headers accepted for each field
+CSV_NUMBER_HEADERS = {"concurso", "numero", "numeroconcurso"}
+CSV_DATE_HEADERS = {"data", "datasorteio", "dataapuracao", "datadosorteio"}
+CSV_NUMBERS_HEADERS = {"dezenas", "numeros", "dezenassorteadas"}
+CSV_DRAW_ORDER_HEADERS = {
+    "ordemsorteio",
+    "ordemdesorteio",
+    "dezenasordemsorteio",
+    "dezenasemordemdesorteio",
+    "dezenassorteadasordemsorteio",
+}
+CSV_BALL_HEADER = re.compile(r"^(?:bola|coluna|dezena|numero)(\d+)$")
+CSV_ACCUMULATED_HEADERS = {"acumulado", "acumulou"}
+CSV_TRUE_VALUES = {"sim", "s", "true", "1"}
+
+# Lotteries whose numbers are one value per column, kept in column order
+COLUMN_LOTTERIES = {"supersete"}
+
+
+def iter_payloads(path: str | Path, lottery_slug: str = "") -> Iterator[dict]:
+    """
+    Stream the CAIXA payloads stored in a file.
+
+    JSON lines and CSV files are read one row at a time; a .json file is
+    decoded whole, so large dumps should be exported as JSON lines.
+
+    Args:
+        path: .json, .jsonl/.ndjson, .csv or .zip file
+        lottery_slug: API identifier of the lottery, for CSV rows of column
+            lotteries whose numbers must keep their order
+
+    Yields:
+        One CAIXA API payload per contest
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            for name in sorted(archive.namelist()):
+                reader = _READERS.get(Path(name).suffix.lower())
+                if reader is None:
+                    continue
+                with archive.open(name) as member:
+                    yield from reader(io.TextIOWrapper(member, encoding="utf-8-sig"), lottery_slug)
+        return
+
+    reader = _READERS.get(suffix)
+    if reader is None:
+        raise ValueError(f"Unsupported file type: {suffix or path.name}")
+    with path.open(encoding="utf-8-sig") as stream:
+        yield from reader(stream, lottery_slug)
+
+
+def _read_json(stream: TextIO, lottery_slug: str) -> Iterator[dict]:
+    # Not incremental: the whole document is decoded before the first payload
+    data = json.load(stream)
+    yield from data if isinstance(data, list) else [data]
+
+
+def _read_json_lines(stream: TextIO, lottery_slug: str) -> Iterator[dict]:
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _read_csv(stream: TextIO, lottery_slug: str) -> Iterator[dict]:
+    header = stream.readline()
+    if not header:
+        return
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.DictReader(chain([header], stream), delimiter=delimiter)
+    for row in reader:
+        try:
+            yield _csv_payload(row, lottery_slug)
+        except ValueError:
+            logger.warning(f"Skipping CSV line {reader.line_num} without a contest number: {row}")
+
+
+def _csv_payload(row: dict, lottery_slug: str = "") -> dict:
+    """
+    Convert a CSV export row into the CAIXA payload format.
+
+    Ball columns and free-text number lists give the drawn numbers only;
+    the draw order is filled in just when the row has a draw-order column.
+    """
+    fields = {_normalize_header(key): (value or "").strip() for key, value in row.items() if key}
+
+    balls = sorted(
+        (int(match.group(1)), value)
+        for key, value in fields.items()
+        if (match := CSV_BALL_HEADER.match(key)) and value
+    )
+    if balls:
+        numbers = [value for _, value in balls]
+    else:
+        numbers = re.findall(r"\d+", _first(fields, CSV_NUMBERS_HEADERS))
+
+    payload = {
+        "numero": int(_first(fields, CSV_NUMBER_HEADERS)),
+        "dataApuracao": _caixa_date(_first(fields, CSV_DATE_HEADERS)),
+        "listaDezenas": numbers if lottery_slug in COLUMN_LOTTERIES else sorted(numbers, key=int),
+        "acumulado": _first(fields, CSV_ACCUMULATED_HEADERS).lower() in CSV_TRUE_VALUES,
+    }
+    draw_order = re.findall(r"\d+", _first(fields, CSV_DRAW_ORDER_HEADERS))
+    if draw_order:
+        payload["dezenasSorteadasOrdemSorteio"] = draw_order
+    return payload
+
+
+def _normalize_header(header: str) -> str:
+    ascii_header = unicodedata.normalize("NFKD", header).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", ascii_header.lower())
+
+
+def _first(fields: dict, headers: set[str]) -> str:
+    return next((fields[header] for header in headers if fields.get(header)), "")
+
+
+def _caixa_date(value: str) -> str:
+    """Convert ISO dates (YYYY-MM-DD) to the CAIXA format (DD/MM/YYYY)."""
+    match = re.match(r"^(\d{4})-(\d{2})-(\d{2})", value)
+    return f"{match.group(3)}/{match.group(2)}/{match.group(1)}" if match else value
+
+
+_READERS = {
+    ".json": _read_json,
+    ".jsonl": _read_json_lines,
+    ".ndjson": _read_json_lines,
+    ".csv": _read_csv,
+}
+
+
+class DrawImporter:
+    """
+    Imports a historical dump into Draw and PrizeTier.
+
+    Payloads are parsed as they are read and written in batches of
+    BATCH_SIZE through bulk_insert_draws, which validates each batch at
+    once and skips contests already stored.
+
+    Usage:
+        summary = DrawImporter().run(lottery, "megasena.csv")
+    """
+
+    BATCH_SIZE = 1000
+
+    def run(self, lottery: Lottery, path: str | Path) -> dict:
+        """
+        Import every contest of a file.
+
+        Args:
+            lottery: Lottery the file belongs to
+            path: File to import
+
+        Returns:
+            Dict with the read, created and unparseable row counts
+        """
+        summary = {"lottery": lottery.slug, "read": 0, "created": 0, "unparseable": 0}
+
+        batch: list[DrawResult] = []
+        for payload in iter_payloads(path, lottery.api_identifier):
+            summary["read"] += 1
+            try:
+                batch.append(parse_draw_result(payload, lottery.api_identifier))
+            except Exception as exc:
+                logger.warning(f"Could not parse {lottery.slug} row {summary['read']}: {exc}")
+                summary["unparseable"] += 1
+                continue
+
+            if len(batch) >= self.BATCH_SIZE:
+                summary["created"] += len(bulk_insert_draws(lottery, batch))
+                batch = []
+
+        if batch:
+            summary["created"] += len(bulk_insert_draws(lottery, batch))
+
+        logger.info(f"Imported {summary['created']} of {summary['read']} contests of {lottery.slug} from {path}")
+        return summary
@@ -0,0 +1,289 @@
+"""
+Bulk draw ingestion.
+
+The single write path for parsed CAIXA results: the backfill, file
+imports and archive replays insert draws through bulk_insert_draws, which
+validates a whole batch at once and writes Draw and PrizeTier with one
+query per table. Sync tasks go through upsert_draws, which also stores the
+corrections CAIXA publishes after a draw.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.lotteries.clients import DrawResult
+from apps.lotteries.events import draw_events
+from apps.lotteries.models import Draw, Lottery, PrizeTier, raw_data_digest
+
+from .validation import DrawBatchValidator
+from .versioning import publish_lottery_version
+
+logger = logging.getLogger(__name__)
+
+# Draw fields copied as-is from a parsed DrawResult
+DRAW_RESULT_FIELDS = [
+    "draw_date",
+    "numbers",
+    "numbers_draw_order",
+    "is_accumulated",
+    "accumulated_value",
+    "next_draw_estimate",
+    "total_revenue",
+    "location",
+    "city_state",
+    "next_draw_number",
+    "next_draw_date",
+    "raw_data",
+]
+
+PRIZE_TIER_FIELDS = ["description", "matches", "winners_count", "prize_value"]
+
+
+@dataclass
+class UpsertResult:
+    """Outcome of upsert_draws."""
+
+    created: list[Draw] = field(default_factory=list)
+    updated: list[Draw] = field(default_factory=list)
+    dirty: list[Draw] = field(default_factory=list)  # updated draws whose prize data or numbers changed
+    unchanged: list[int] = field(default_factory=list)  # contest numbers
+    errors: dict[int, str] = field(default_factory=dict)
+
+
+def extract_matches(description: str) -> int | None:
+    """Extract number of matches from description string."""
+    if not description:
+        return None
+    # Match patterns like "6 acertos", "5 acertos", etc.
+    match = re.search(r"(\d+)\s*acertos?", description.lower())
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def build_prize_tiers(draw: Draw, result: DrawResult) -> list[PrizeTier]:
+    """Build the (unsaved) prize tiers of a parsed result."""
+    return [
+        PrizeTier(
+            draw=draw,
+            tier=tier_data["tier"],
+            description=tier_data["description"],
+            matches=extract_matches(tier_data["description"]),
+            winners_count=tier_data["winners_count"],
+            prize_value=tier_data["prize_value"],
+        )
+        for tier_data in result.prize_tiers
+    ]
+
+
+def validate_results(
+    lottery: Lottery, results: list[DrawResult]
+) -> tuple[list[tuple[Draw, DrawResult]], dict[int, str]]:
+    """
+    Build unsaved draws from parsed results and validate them as one batch.
+
+    Runs the field checks of Draw.full_clean() per row and the Draw.clean
+    rules over the whole batch, without any query. Repeated contest numbers
+    keep their first result.
+
+    Returns:
+        ((draw, result) pairs that passed, dict of contest number -> error)
+    """
+    pairs = {}
+    errors = {}
+    for result in results:
+        if result.number in pairs or result.number in errors:
+            continue
+
+        draw = Draw(
+            lottery=lottery,
+            number=result.number,
+            raw_data_hash=raw_data_digest(result.raw_data),
+            **{name: getattr(result, name) for name in DRAW_RESULT_FIELDS},
+        )
+        try:
+            draw.clean_fields(exclude=["lottery", "numbers", "numbers_draw_order", "raw_data_hash"])
+        except ValidationError as exc:
+            errors[result.number] = "; ".join(exc.messages)
+            continue
+        pairs[result.number] = (draw, result)
+
+    valid, batch_errors = DrawBatchValidator(lottery).validate([draw for draw, _ in pairs.values()])
+    errors.update(batch_errors)
+
+    for number, message in errors.items():
+        logger.warning(f"Invalid draw {lottery.slug} #{number}: {message}")
+
+    return [pairs[draw.number] for draw in valid], errors
+
+
+def bulk_insert_draws(
+    lottery: Lottery, results: list[DrawResult], publish: bool = True
+) -> list[Draw]:
+    """
+    Insert parsed draws and their prize tiers with one query per table.
+
+    Draws already stored or failing validation are skipped.
+
+    Args:
+        lottery: Lottery the results belong to
+        results: Parsed results
+        publish: Publish the created draws on the draw event bus, once for
+            the whole batch (bulk_create sends no post_save)
+
+    Returns:
+        The created Draw objects
+    """
+    existing = set(
+        Draw.objects.filter(lottery=lottery, number__in=[r.number for r in results]).values_list(
+            "number", flat=True
+        )
+    )
+    pairs, _ = validate_results(lottery, [r for r in results if r.number not in existing])
+    if not pairs:
+        return []
+
+    with transaction.atomic():
+        created = Draw.objects.bulk_create([draw for draw, _ in pairs])
+        PrizeTier.objects.bulk_create([
+            tier for draw, result in pairs for tier in build_prize_tiers(draw, result)
+        ])
+        if publish:
+            draw_events.publish(lottery.id, [draw.id for draw in created])
+
+    return created
+
+
+def upsert_draws(lottery: Lottery, results: list[DrawResult], publish: bool = True) -> UpsertResult:
+    """
+    Insert new draws and store the changes CAIXA made to known ones.
+
+    A stored draw is only touched when the hash of its payload changed;
+    then only the Draw and PrizeTier columns that differ are written, with
+    bulk_update. Updated draws are marked dirty (published on the draw event
+    bus) only when their numbers or prize data changed; other corrections
+    (e.g. accumulated values) just publish a new data version of the lottery
+    so cached payloads refresh.
+
+    Args:
+        lottery: Lottery the results belong to
+        results: Parsed results
+        publish: Publish created and dirty draws on the draw event bus
+
+    Returns:
+        UpsertResult with the created, updated, dirty and unchanged draws
+    """
+    pairs, errors = validate_results(lottery, results)
+    outcome = UpsertResult(errors=errors)
+    if not pairs:
+        return outcome
+
+    stored = {
+        draw.number: draw
+        for draw in Draw.objects.filter(lottery=lottery, number__in=[draw.number for draw, _ in pairs])
+        .defer("raw_data")
+    }
+    new_pairs = [(draw, result) for draw, result in pairs if draw.number not in stored]
+    changed_pairs = []
+    for draw, result in pairs:
+        old = stored.get(draw.number)
+        if old is None:
+            continue
+        if old.raw_data_hash == draw.raw_data_hash:
+            outcome.unchanged.append(draw.number)
+        else:
+            changed_pairs.append((old, draw, result))
+
+    with transaction.atomic():
+        if new_pairs:
+            outcome.created = Draw.objects.bulk_create([draw for draw, _ in new_pairs])
+            PrizeTier.objects.bulk_create([
+                tier for draw, result in new_pairs for tier in build_prize_tiers(draw, result)
+            ])
+
+        if changed_pairs:
+            tiers_changed = _update_prize_tiers(changed_pairs)
+            by_fields = defaultdict(list)
+            for old, new, _ in changed_pairs:
+                fields = [
+                    name
+                    for name in DRAW_RESULT_FIELDS
+                    if name != "raw_data" and getattr(old, name) != getattr(new, name)
+                ]
+                renumbered = "numbers" in fields or "numbers_draw_order" in fields
+                for name in fields:
+                    setattr(old, name, getattr(new, name))
+                old.raw_data = new.raw_data
+                old.raw_data_hash = new.raw_data_hash
+                by_fields[tuple(sorted({*fields, "raw_data", "raw_data_hash"}))].append(old)
+
+                outcome.updated.append(old)
+                if renumbered or old.id in tiers_changed:
+                    outcome.dirty.append(old)
+
+            for fields, draws in by_fields.items():
+                Draw.objects.bulk_update(draws, list(fields))
+
+        if publish and (outcome.created or outcome.dirty):
+            draw_events.publish(lottery.id, [draw.id for draw in outcome.created + outcome.dirty])
+        if outcome.updated and len(outcome.dirty) < len(outcome.updated):
+            transaction.on_commit(lambda: publish_lottery_version(lottery.slug))
+
+    if outcome.updated:
+        logger.info(
+            f"Updated {len(outcome.updated)} draws of {lottery.slug} "
+            f"({len(outcome.dirty)} with new numbers or prize data)"
+        )
+    return outcome
+
+
+def _update_prize_tiers(changed_pairs: list[tuple[Draw, Draw, DrawResult]]) -> set[int]:
+    """
+    Write the prize tier differences of updated draws.
+
+    Returns:
+        IDs of the draws whose prize tiers changed
+    """
+    draws = {old.id: old for old, _, _ in changed_pairs}
+    stored = defaultdict(dict)
+    for tier in PrizeTier.objects.filter(draw_id__in=draws):
+        stored[tier.draw_id][tier.tier] = tier
+
+    changed_draws = set()
+    to_create, to_delete = [], []
+    to_update = defaultdict(list)
+    for old, _, result in changed_pairs:
+        current = stored.get(old.id, {})
+        incoming = {tier.tier: tier for tier in build_prize_tiers(old, result)}
+
+        for number, tier in incoming.items():
+            existing = current.get(number)
+            if existing is None:
+                to_create.append(tier)
+                changed_draws.add(old.id)
+                continue
+            fields = [name for name in PRIZE_TIER_FIELDS if getattr(existing, name) != getattr(tier, name)]
+            if fields:
+                for name in fields:
+                    setattr(existing, name, getattr(tier, name))
+                to_update[tuple(fields)].append(existing)
+                changed_draws.add(old.id)
+
+        removed = [tier.id for number, tier in current.items() if number not in incoming]
+        if removed:
+            to_delete.extend(removed)
+            changed_draws.add(old.id)
+
+    if to_delete:
+        PrizeTier.objects.filter(id__in=to_delete).delete()
+    for fields, tiers in to_update.items():
+        PrizeTier.objects.bulk_update(tiers, list(fields))
+    if to_create:
+        PrizeTier.objects.bulk_create(to_create)
+
+    return changed_draws
@@ -0,0 +1,50 @@
+"""
+Latest draw payload service.
+
+Caches the serialized latest draw of each lottery per data version.
+"""
+
+from django.core.cache import cache
+
+from apps.lotteries.models import Draw
+from apps.lotteries.serializers import DrawSerializer
+
+from .versioning import LotteryVersion, get_lottery_version
+
+LATEST_DRAW_TTL = 60 * 60 * 24  # 1 day; a new version makes entries unreachable
+
+
+def get_latest_draw_payload(
+    lottery_slug: str, version: LotteryVersion | None = None
+) -> dict | None:
+    """
+    Get the serialized latest draw of a lottery.
+
+    Args:
+        lottery_slug: Lottery identifier
+        version: Version to read/stamp the payload with (default: current)
+
+    Returns:
+        DrawSerializer data, or None if the lottery has no draws
+    """
+    if version is None:
+        version = get_lottery_version(lottery_slug)
+
+    cache_key = f"lotteries:{lottery_slug}:latest:{version.token}"
+    payload = cache.get(cache_key)
+    if payload is not None:
+        return payload
+
+    draw = (
+        Draw.objects.filter(lottery__slug=lottery_slug, lottery__is_active=True)
+        .select_related("lottery")
+        .prefetch_related("prize_tiers")
+        .order_by("-number")
+        .first()
+    )
+    if draw is None:
+        return None
+
+    payload = dict(DrawSerializer(draw).data)
+    cache.set(cache_key, payload, LATEST_DRAW_TTL)
+    return payload
@@ -0,0 +1,128 @@
+"""
+Batch validation of draws.
+
+The Draw.clean rules (number count, range, duplicates and draw order
+consistency), applied to a whole batch at once with numpy and with the
+lottery rules resolved once. Draw.clean runs the same checks on a batch
+of one.
+"""
+
+import numpy as np
+
+from apps.lotteries.models import Draw, Lottery
+
+
+class DrawBatchValidator:
+    """
+    Validates many draws of one lottery at once.
+
+    Usage:
+        valid, errors = DrawBatchValidator(lottery).validate(draws)
+        errors  # {contest number: message}
+
+        DrawBatchValidator(lottery).check(draw)  # {field: message} or {}
+    """
+
+    def __init__(self, lottery: Lottery):
+        self.name = lottery.name
+        self.count = lottery.numbers_count
+        self.min_number = lottery.min_number
+        self.max_number = lottery.max_number
+
+    def validate(self, draws: list[Draw]) -> tuple[list[Draw], dict[int, str]]:
+        """
+        Split a batch into valid draws and errors.
+
+        Returns:
+            (valid draws in input order, dict of contest number -> error message)
+        """
+        errors = self.errors(draws)
+        return (
+            [draw for index, draw in enumerate(draws) if index not in errors],
+            {draws[index].number: message for index, (_, message) in errors.items()},
+        )
+
+    def check(self, draw: Draw) -> dict[str, str]:
+        """Validate one draw, returning {field: message} for its first error."""
+        error = self.errors([draw]).get(0)
+        return {error[0]: error[1]} if error else {}
+
+    def errors(self, draws: list[Draw]) -> dict[int, tuple[str, str]]:
+        """
+        Find the first broken rule of each draw.
+
+        Returns:
+            Dict of batch index -> (field, message), for invalid draws only
+        """
+        errors = {}
+        shaped = []
+        for index, draw in enumerate(draws):
+            error = self._shape_error(draw)
+            if error:
+                errors[index] = error
+            else:
+                shaped.append(index)
+
+        if not shaped:
+            return errors
+
+        numbers = np.array([draws[i].numbers for i in shaped], dtype=np.int64).reshape(len(shaped), self.count)
+        out_of_range = (numbers < self.min_number) | (numbers > self.max_number)
+        ordered = np.sort(numbers, axis=1)
+        duplicated = (np.diff(ordered, axis=1) == 0).any(axis=1)
+
+        with_order = [row for row, i in enumerate(shaped) if draws[i].numbers_draw_order is not None]
+        order_mismatch = np.zeros(len(shaped), dtype=bool)
+        if with_order:
+            draw_order = np.sort(
+                np.array([draws[shaped[row]].numbers_draw_order for row in with_order], dtype=np.int64),
+                axis=1,
+            )
+            order_mismatch[with_order] = (draw_order != ordered[with_order]).any(axis=1)
+
+        for row in np.flatnonzero(out_of_range.any(axis=1) | duplicated | order_mismatch):
+            draw = draws[shaped[row]]
+            if out_of_range[row].any():
+                number = int(numbers[row][out_of_range[row]][0])
+                errors[shaped[row]] = (
+                    "numbers",
+                    f"Número {number} fora do intervalo permitido "
+                    f"[{self.min_number}-{self.max_number}] para {self.name}.",
+                )
+            elif duplicated[row]:
+                duplicates = {num for num in draw.numbers if draw.numbers.count(num) > 1}
+                errors[shaped[row]] = (
+                    "numbers",
+                    f"Números duplicados não são permitidos. Duplicatas encontradas: {duplicates}",
+                )
+            else:
+                errors[shaped[row]] = (
+                    "numbers_draw_order",
+                    "Deve conter os mesmos números que o campo numbers.",
+                )
+
+        return errors
+
+    def _shape_error(self, draw: Draw) -> tuple[str, str] | None:
+        """Check the row-level rules that decide whether a draw fits the batch matrix."""
+        if not isinstance(draw.numbers, list):
+            return "numbers", "Números devem ser uma lista."
+        if len(draw.numbers) != self.count:
+            return (
+                "numbers",
+                f"{self.name} requer exatamente {self.count} números, "
+                f"mas foram fornecidos {len(draw.numbers)}.",
+            )
+        for num in draw.numbers:
+            if not isinstance(num, int):
+                return "numbers", f"Número inválido: {num}. Todos os números devem ser inteiros."
+
+        order = draw.numbers_draw_order
+        if order is not None:
+            if not isinstance(order, list):
+                return "numbers_draw_order", "Deve ser uma lista."
+            if len(order) != self.count:
+                return "numbers_draw_order", f"Deve conter exatamente {self.count} números."
+            if not all(isinstance(num, int) for num in order):
+                return "numbers_draw_order", "Deve conter os mesmos números que o campo numbers."
+        return None
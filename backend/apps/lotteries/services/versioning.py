@@ -0,0 +1,179 @@
+"""
+Lottery data versioning.
+
+Tracks a cheap "version" for each lottery's data so caches can be stamped
+with the draw they were computed at and invalidated without key scans.
+
+Revisions come from atomic cache counters seeded from the clock: concurrent
+publishes never share a revision, and a counter lost to eviction restarts
+above every revision it handed out before, so it cannot revive old entries.
+The current version is only replaced under a short per-lottery cache lock,
+so a publish holding an older revision never overwrites a newer one.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+
+from apps.lotteries.models import Draw
+
+CATALOG_VERSION_KEY = "lotteries:catalog:version"
+VERSION_LOCK_TTL = 10  # seconds before a crashed holder's lock expires
+VERSION_LOCK_POLL_INTERVAL = 0.01
+
+
+@dataclass(frozen=True)
+class LotteryVersion:
+    """
+    Version stamp of a lottery's data.
+
+    Attributes:
+        draw_number: Latest contest number stored for the lottery (0 if none)
+        revision: Counter bumped on every publish, so corrections to an
+            existing draw also produce a new version (0 only for a lottery
+            without draws)
+        published_at: Unix timestamp of the publish (or of the cold rebuild)
+    """
+
+    draw_number: int
+    revision: int
+    published_at: float = field(default_factory=time.time, compare=False)
+
+    @property
+    def token(self) -> str:
+        """Compact string form, suitable for cache keys and ETags."""
+        return f"{self.draw_number}.{self.revision}"
+
+    def as_tuple(self) -> tuple[int, int, float]:
+        """Plain tuple form, as stored in cache."""
+        return (self.draw_number, self.revision, self.published_at)
+
+
+def _version_key(lottery_slug: str) -> str:
+    return f"lotteries:{lottery_slug}:version"
+
+
+def _revision_key(lottery_slug: str) -> str:
+    return f"lotteries:{lottery_slug}:revision"
+
+
+def _next_revision(key: str) -> int:
+    """Atomically take the next value of a counter, seeding a missing one from the clock."""
+    while True:
+        cache.add(key, time.time_ns() // 1_000, None)  # microseconds
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(): seed it again
+            continue
+
+
+@contextmanager
+def _version_lock(key: str) -> Iterator[None]:
+    """Hold the lock guarding read-compare-write updates of a version key."""
+    lock_key = f"{key}:lock"
+    while not cache.add(lock_key, 1, VERSION_LOCK_TTL):
+        time.sleep(VERSION_LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def _latest_draw_number(lottery_slug: str) -> int:
+    """Fetch the latest contest number (uses the (lottery, -number) index)."""
+    number = (
+        Draw.objects.filter(lottery__slug=lottery_slug)
+        .order_by("-number")
+        .values_list("number", flat=True)
+        .first()
+    )
+    return number or 0
+
+
+def get_lottery_version(lottery_slug: str) -> LotteryVersion:
+    """
+    Get the current data version of a lottery.
+
+    The version is kept in cache without expiry; on a cold cache it is
+    rebuilt from the latest stored draw with a fresh revision, so entries
+    stamped before the eviction are not mistaken for current ones.
+    """
+    key = _version_key(lottery_slug)
+    cached = cache.get(key)
+    if cached is not None:
+        return LotteryVersion(*cached)
+
+    draw_number = _latest_draw_number(lottery_slug)
+    if not draw_number:
+        # Unknown or empty lottery: don't pin a version for arbitrary slugs
+        return LotteryVersion(0, 0)
+
+    version = LotteryVersion(draw_number, _next_revision(_revision_key(lottery_slug)))
+
+    # Never clobber a version published concurrently
+    with _version_lock(key):
+        if not cache.add(key, version.as_tuple(), None):
+            return LotteryVersion(*cache.get(key, version.as_tuple()))
+    return version
+
+
+def next_lottery_version(
+    lottery_slug: str, draw_number: int | None = None
+) -> LotteryVersion:
+    """
+    Reserve the version that the next publish will make current.
+
+    Lets callers stamp caches with a version before publishing it. The
+    revision is taken from the counter right away, so two callers never
+    build the same version.
+
+    Args:
+        lottery_slug: Lottery identifier
+        draw_number: Latest contest number, looked up when not given
+    """
+    if draw_number is None:
+        draw_number = _latest_draw_number(lottery_slug)
+
+    return LotteryVersion(draw_number, _next_revision(_revision_key(lottery_slug)))
+
+
+def publish_lottery_version(
+    lottery_slug: str, version: LotteryVersion | None = None
+) -> LotteryVersion:
+    """
+    Publish a new data version for a lottery.
+
+    Every cache stamped with an older version becomes stale, and the
+    catalog version (covering all lotteries) is bumped as well.
+
+    Args:
+        lottery_slug: Lottery identifier
+        version: Version to publish (see next_lottery_version), built from
+            the latest stored draw when not given
+
+    Returns:
+        The published LotteryVersion
+    """
+    if version is None:
+        version = next_lottery_version(lottery_slug)
+
+    key = _version_key(lottery_slug)
+    with _version_lock(key):
+        current = cache.get(key)
+        if current is None or current[1] < version.revision:
+            # A publish that reserved its revision earlier must not roll back a newer one
+            cache.set(key, version.as_tuple(), None)
+    _next_revision(CATALOG_VERSION_KEY)
+    return version
+
+
+def get_catalog_version() -> int:
+    """Get the version of the lottery catalog, bumped by every publish."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        return _next_revision(CATALOG_VERSION_KEY)
+    return version
@@ -0,0 +1,32 @@
+"""
+Signals for lotteries app.
+
+Publishes draw-changed events when draws are saved and new data versions
+when lotteries are edited.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.lotteries.events import draw_events
+from apps.lotteries.models import Draw, Lottery
+from apps.lotteries.services import publish_lottery_version
+
+# Fields whose changes affect data derived from a draw
+DERIVED_DATA_FIELDS = {"numbers", "numbers_draw_order", "number", "lottery"}
+
+
+@receiver(post_save, sender=Draw)
+def publish_draw_changed(sender, instance, created, using, update_fields=None, **kwargs):
+    """Publish a draw-changed event, skipping saves of unrelated fields."""
+    if not created and update_fields is not None:
+        if not DERIVED_DATA_FIELDS.intersection(update_fields):
+            return
+
+    draw_events.publish(instance.lottery_id, [instance.id], using=using)
+
+
+@receiver(post_save, sender=Lottery)
+def publish_lottery_changed(sender, instance, **kwargs):
+    """Publish a new version so cached payloads embedding the lottery refresh."""
+    publish_lottery_version(instance.slug)
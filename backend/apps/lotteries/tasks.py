@@ -5,24 +5,30 @@ Background tasks for syncing lottery results from CAIXA API.
 """
 
 import logging
-import re
+from collections import Counter
 
-from celery import shared_task
+from celery import chord, shared_task
 from django.db import transaction
 
-from .clients import CaixaLotteryClient
-from .models import Draw, Lottery, PrizeTier
+from .clients import CircuitOpenError, get_caixa_circuit_breaker, get_caixa_client
+from .events import draw_events
+from .models import Draw, Lottery
+from .services.backfill import DrawBackfiller
+from .services.calendar import DrawCalendar
+from .services.ingest import bulk_insert_draws, upsert_draws
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def sync_lottery_results(self, lottery_slug: str = "megasena") -> dict:
+def sync_lottery_results(self, lottery_slug: str = "megasena", publish_events: bool = True) -> dict:
     """
     Synchronize the latest lottery results from CAIXA API.
 
     Args:
         lottery_slug: Slug of the lottery to sync (default: megasena)
+        publish_events: Publish the new draw on the draw event bus; the
+            fan-out of sync_all_active_lotteries publishes once at the end
 
     Returns:
         Dict with sync status and details
@@ -33,84 +39,148 @@ def sync_lottery_results(self, lottery_slug: str = "megasena") -> dict:
         logger.error(f"Lottery not found: {lottery_slug}")
         return {"status": "error", "message": f"Lottery not found: {lottery_slug}"}
 
-    client = CaixaLotteryClient()
+    client = get_caixa_client()
 
     try:
         result = client.get_latest_result(lottery.api_identifier)
+    except CircuitOpenError as exc:
+        # CAIXA is failing for every worker: don't retry into it
+        logger.warning(f"Skipping sync of {lottery_slug}: {exc}")
+        return {"status": "error", "message": str(exc)}
     except Exception as exc:
         logger.error(f"Failed to fetch lottery results: {exc}")
+        if self.request.retries >= self.max_retries:
+            # Out of retries: report instead of failing the sync_all chord
+            return {"status": "error", "message": f"Failed to fetch {lottery_slug}: {exc}"}
         raise self.retry(exc=exc)
 
-    # Check if draw already exists
-    if Draw.objects.filter(lottery=lottery, number=result.number).exists():
-        logger.info(f"Draw {result.number} already exists for {lottery.name}")
+    outcome = upsert_draws(lottery, [result], publish=publish_events)
+    if outcome.errors:
         return {
-            "status": "skipped",
-            "message": f"Draw {result.number} already exists",
+            "status": "error",
+            "message": f"Draw {result.number} failed validation",
             "draw_number": result.number,
         }
 
-    # Create draw and prize tiers in a transaction
-    with transaction.atomic():
-        draw = Draw.objects.create(
-            lottery=lottery,
-            number=result.number,
-            draw_date=result.draw_date,
-            numbers=result.numbers,
-            numbers_draw_order=result.numbers_draw_order,
-            is_accumulated=result.is_accumulated,
-            accumulated_value=result.accumulated_value,
-            next_draw_estimate=result.next_draw_estimate,
-            total_revenue=result.total_revenue,
-            location=result.location,
-            city_state=result.city_state,
-            next_draw_number=result.next_draw_number,
-            next_draw_date=result.next_draw_date,
-            raw_data=result.raw_data,
-        )
-
-        # Create prize tiers
-        for tier_data in result.prize_tiers:
-            # Extract matches from description (e.g., "6 acertos" -> 6)
-            matches = _extract_matches(tier_data["description"])
-
-            PrizeTier.objects.create(
-                draw=draw,
-                tier=tier_data["tier"],
-                description=tier_data["description"],
-                matches=matches,
-                winners_count=tier_data["winners_count"],
-                prize_value=tier_data["prize_value"],
-            )
-
+    if outcome.created:
+        draw = outcome.created[0]
         logger.info(f"Created draw {draw.number} for {lottery.name}")
+        return {
+            "status": "created",
+            "message": f"Created draw {draw.number}",
+            "draw_number": draw.number,
+            "draw_id": draw.id,
+            "lottery_id": lottery.id,
+        }
+
+    if outcome.updated:
+        draw = outcome.updated[0]
+        logger.info(f"Updated draw {draw.number} for {lottery.name}")
+        return {
+            "status": "updated",
+            "message": f"Updated draw {draw.number}",
+            "draw_number": draw.number,
+            "draw_id": draw.id,
+            "lottery_id": lottery.id,
+            "dirty": bool(outcome.dirty),
+        }
 
+    logger.info(f"Draw {result.number} unchanged for {lottery.name}")
     return {
-        "status": "created",
-        "message": f"Created draw {draw.number}",
-        "draw_number": draw.number,
-        "draw_id": draw.id,
+        "status": "skipped",
+        "message": f"Draw {result.number} unchanged",
+        "draw_number": result.number,
     }
 
 
 @shared_task
 def sync_all_active_lotteries() -> dict:
     """
-    Synchronize results for all active lotteries.
+    Synchronize results for all active lotteries in parallel.
+
+    Each lottery is synced by its own sync_lottery_results task (with its
+    own retries); finish_sync_all aggregates the results once all are done.
 
     Returns:
-        Dict with results for each lottery
+        Dict with the queued lotteries and the id of the aggregating task
     """
-    results = {}
+    slugs = list(Lottery.objects.filter(is_active=True).values_list("slug", flat=True))
+    if not slugs:
+        return {"status": "skipped", "message": "No active lotteries"}
+    if get_caixa_circuit_breaker().is_open():
+        return {"status": "skipped", "message": "CAIXA API circuit breaker is open"}
+
+    result = chord(
+        sync_lottery_results.s(slug, publish_events=False) for slug in slugs
+    )(finish_sync_all.s(slugs))
+
+    return {"status": "queued", "lotteries": slugs, "task_id": result.id}
+
+
+@shared_task
+def schedule_lottery_syncs() -> dict:
+    """
+    Queue a sync for each active lottery whose next result is due.
+
+    Meant to run every few minutes from beat; the draw calendar keeps
+    lotteries without a pending result idle.
+
+    Returns:
+        Dict with the queued lotteries and the plan of every lottery
+    """
+    if get_caixa_circuit_breaker().is_open():
+        # Polls skipped now must not count as attempts of the backoff
+        return {"status": "skipped", "message": "CAIXA API circuit breaker is open"}
+
+    calendar = DrawCalendar()
+    queued = []
+    plans = {}
     for lottery in Lottery.objects.filter(is_active=True):
-        try:
-            result = sync_lottery_results(lottery.slug)
-            results[lottery.slug] = result
-        except Exception as exc:
-            logger.error(f"Failed to sync {lottery.slug}: {exc}")
-            results[lottery.slug] = {"status": "error", "message": str(exc)}
+        plan = calendar.plan(lottery)
+        plans[lottery.slug] = {
+            "target": plan.target,
+            "reason": plan.reason,
+            "next_check": plan.next_check.isoformat(),
+        }
+        if plan.due:
+            sync_lottery_results.delay(lottery.slug)
+            queued.append(lottery.slug)
+
+    if queued:
+        logger.info(f"Queued calendar syncs: {', '.join(queued)}")
+    return {"status": "completed", "queued": queued, "plans": plans}
+
 
-    return results
+@shared_task
+def finish_sync_all(results: list[dict], slugs: list[str]) -> dict:
+    """
+    Aggregate the results of a sync_all_active_lotteries fan-out.
+
+    The new and dirty draws were saved without events: they are published
+    here in one batch, so the downstream pipelines run once per sync round.
+
+    Args:
+        results: sync_lottery_results return values, in the order of slugs
+        slugs: Synced lottery slugs
+
+    Returns:
+        Dict with results for each lottery and counts per status
+    """
+    by_lottery = dict(zip(slugs, results, strict=True))
+
+    changed = [
+        result
+        for result in results
+        if result.get("status") == "created" or result.get("dirty")
+    ]
+    with transaction.atomic():
+        for result in changed:
+            draw_events.publish(result["lottery_id"], [result["draw_id"]])
+
+    counts = dict(Counter(result.get("status") for result in results))
+    logger.info(f"Synced {len(slugs)} lotteries: {counts}")
+
+    return {"status": "completed", "counts": counts, "results": by_lottery}
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -134,52 +204,44 @@ def sync_draw_by_number(self, lottery_slug: str, number: int) -> dict:
     if Draw.objects.filter(lottery=lottery, number=number).exists():
         return {"status": "skipped", "message": f"Draw {number} already exists"}
 
-    client = CaixaLotteryClient()
+    client = get_caixa_client()
 
     try:
         result = client.get_result_by_number(lottery.api_identifier, number)
+    except CircuitOpenError as exc:
+        logger.warning(f"Skipping sync of draw {number}: {exc}")
+        return {"status": "error", "message": str(exc)}
     except Exception as exc:
         logger.error(f"Failed to fetch draw {number}: {exc}")
         raise self.retry(exc=exc)
 
-    with transaction.atomic():
-        draw = Draw.objects.create(
-            lottery=lottery,
-            number=result.number,
-            draw_date=result.draw_date,
-            numbers=result.numbers,
-            numbers_draw_order=result.numbers_draw_order,
-            is_accumulated=result.is_accumulated,
-            accumulated_value=result.accumulated_value,
-            next_draw_estimate=result.next_draw_estimate,
-            total_revenue=result.total_revenue,
-            location=result.location,
-            city_state=result.city_state,
-            next_draw_number=result.next_draw_number,
-            next_draw_date=result.next_draw_date,
-            raw_data=result.raw_data,
-        )
-
-        for tier_data in result.prize_tiers:
-            matches = _extract_matches(tier_data["description"])
-            PrizeTier.objects.create(
-                draw=draw,
-                tier=tier_data["tier"],
-                description=tier_data["description"],
-                matches=matches,
-                winners_count=tier_data["winners_count"],
-                prize_value=tier_data["prize_value"],
-            )
+    created = bulk_insert_draws(lottery, [result])
+    if not created:
+        return {"status": "error", "message": f"Draw {number} failed validation"}
 
+    draw = created[0]
     return {"status": "created", "draw_number": number, "draw_id": draw.id}
 
 
-def _extract_matches(description: str) -> int | None:
-    """Extract number of matches from description string."""
-    if not description:
-        return None
-    # Match patterns like "6 acertos", "5 acertos", etc.
-    match = re.search(r"(\d+)\s*acertos?", description.lower())
-    if match:
-        return int(match.group(1))
-    return None
+@shared_task
+def backfill_lottery(lottery_slug: str, up_to: int | None = None) -> dict:
+    """
+    Fetch and store every missing contest of a lottery.
+
+    Args:
+        lottery_slug: Slug of the lottery
+        up_to: Last contest to backfill (default: latest published contest)
+
+    Returns:
+        Dict with the missing, created and failed contest counts
+    """
+    try:
+        lottery = Lottery.objects.get(slug=lottery_slug, is_active=True)
+    except Lottery.DoesNotExist:
+        return {"status": "error", "message": f"Lottery not found: {lottery_slug}"}
+
+    try:
+        return {"status": "completed", **DrawBackfiller().run(lottery, up_to)}
+    except CircuitOpenError as exc:
+        logger.warning(f"Skipping backfill of {lottery_slug}: {exc}")
+        return {"status": "error", "message": str(exc)}
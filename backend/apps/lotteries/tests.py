@@ -2,12 +2,63 @@
 Tests for lotteries app.
 """
 
+import importlib
+import io
+import json
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
 import pytest
+import requests
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from django.contrib.auth import get_user_model
 from rest_framework import status
+from rest_framework.test import APIClient
 
-from apps.lotteries.clients.caixa import CaixaLotteryClient
+from apps.lotteries.clients import CircuitBreaker, CircuitOpenError, TokenBucket, get_caixa_circuit_breaker
+from apps.lotteries.clients.caixa import (
+    CaixaLotteryClient,
+    DrawResult,
+    _parse_date,
+    _parse_numbers,
+    parse_draw_result,
+)
+from apps.lotteries.events import draw_events
 from django.db import IntegrityError
-from apps.lotteries.models import Draw, Lottery, PrizeTier
+from apps.lotteries.models import Draw, Lottery, PrizeTier, RawResponse, raw_data_digest
+from apps.lotteries.tasks import (
+    finish_sync_all,
+    schedule_lottery_syncs,
+    sync_all_active_lotteries,
+    sync_draw_by_number,
+    sync_lottery_results,
+)
+from apps.lotteries.services import (
+    ArchiveReplayer,
+    DrawBackfiller,
+    DrawBatchValidator,
+    DrawCalendar,
+    DrawImporter,
+    archive_response,
+    find_missing_numbers,
+    find_missing_numbers_by_lottery,
+    get_lottery_version,
+    publish_lottery_version,
+    upsert_draws,
+)
+from apps.lotteries.services.importer import _csv_payload
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Versioned payloads live in cache: start every test from a cold cache."""
+    cache.clear()
+    yield
+    cache.clear()
 
 
 @pytest.fixture
@@ -118,6 +169,65 @@ class TestDrawAPI:
         assert len(response.json()["results"]) == 1
 
 
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Test ETag-based conditional responses."""
+
+    def test_latest_draw_not_modified(self, client, lottery, django_assert_num_queries):
+        """A matching If-None-Match gets a 304 until a new version is published."""
+        Draw.objects.create(
+            lottery=lottery,
+            number=2954,
+            draw_date="2025-12-20",
+            numbers=[1, 9, 37, 39, 42, 44],
+            raw_data={"numero": 2954},
+        )
+        url = f"/api/lotteries/{lottery.slug}/latest/"
+
+        response = client.get(url)
+        etag = response["ETag"]
+        assert response.status_code == status.HTTP_200_OK
+        assert "public" in response["Cache-Control"]
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        publish_lottery_version(lottery.slug)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_errors_are_not_publicly_cacheable(self, client, lottery):
+        """Shared caches may store successful answers only."""
+        response = client.get(f"/api/lotteries/{lottery.slug}/latest/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert "public" not in response.get("Cache-Control", "")
+
+    def test_unknown_or_inactive_lottery_has_no_validators(self, client, lottery, settings):
+        """Unknown and inactive slugs get a 404 before any ETag is computed."""
+        for url in ("/api/stats/nope/", "/api/lotteries/nope/latest/"):
+            response = client.get(url, HTTP_IF_NONE_MATCH=f'"nope-0.0-v{settings.API_DATA_VERSION}"')
+
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            assert "ETag" not in response
+            assert "public" not in response.get("Cache-Control", "")
+
+        lottery.is_active = False
+        lottery.save()
+
+        assert client.get(f"/api/stats/{lottery.slug}/").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_lottery_list_etag_follows_catalog(self, client, lottery):
+        """The lottery list ETag changes whenever any lottery publishes."""
+        etag = client.get("/api/lotteries/")["ETag"]
+        assert client.get("/api/lotteries/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        publish_lottery_version(lottery.slug)
+        assert client.get("/api/lotteries/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
 @pytest.mark.django_db
 class TestModels:
     """Test model methods and properties."""
@@ -152,30 +262,793 @@ class TestCaixaClient:
 
     def test_parse_date(self):
         """Test date parsing."""
-        client = CaixaLotteryClient()
-
-        result = client._parse_date("20/12/2025")
+        result = _parse_date("20/12/2025")
         assert result.year == 2025
         assert result.month == 12
         assert result.day == 20
 
     def test_parse_date_invalid(self):
         """Test invalid date returns None."""
-        client = CaixaLotteryClient()
-
-        result = client._parse_date("invalid")
+        result = _parse_date("invalid")
         assert result is None
 
     def test_parse_numbers(self):
         """Test number parsing."""
-        client = CaixaLotteryClient()
-
-        result = client._parse_numbers(["01", "09", "37", "39", "42", "44"])
+        result = _parse_numbers(["01", "09", "37", "39", "42", "44"])
         assert result == [1, 9, 37, 39, 42, 44]
 
     def test_parse_numbers_empty(self):
         """Test empty list returns empty."""
-        client = CaixaLotteryClient()
-
-        result = client._parse_numbers([])
+        result = _parse_numbers([])
         assert result == []
+
+    @staticmethod
+    def fake_session(client, monkeypatch, responses):
+        """Serve the given (status, headers, body) responses, recording request headers."""
+        sent = []
+
+        def get(url, headers=None, timeout=None):
+            sent.append(headers or {})
+            status_code, response_headers, body = responses.pop(0)
+            response = requests.Response()
+            response.status_code = status_code
+            response.headers.update(response_headers)
+            response._content = json.dumps(body).encode() if body is not None else b""
+            return response
+
+        monkeypatch.setattr(client.session, "get", get)
+        return sent
+
+    def test_not_modified_reuses_parsed_result(self, monkeypatch):
+        """A 304 answer returns the cached result without parsing."""
+        client = CaixaLotteryClient(cache_size=4)
+        body = {"numero": 2954, "listaDezenas": ["01", "09", "37", "39", "42", "44"]}
+        sent = self.fake_session(client, monkeypatch, [
+            (200, {"ETag": '"v1"', "Last-Modified": "Sat, 20 Dec 2025 23:00:00 GMT"}, body),
+            (304, {}, None),
+        ])
+
+        first = client.get_latest_result("megasena")
+        monkeypatch.setattr(client, "_parse_response", lambda *args: pytest.fail("parsed a 304"))
+        second = client.get_latest_result("megasena")
+
+        assert second is first
+        assert sent[0] == {}
+        assert sent[1] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Sat, 20 Dec 2025 23:00:00 GMT",
+        }
+
+    def test_fetched_responses_are_archived(self, monkeypatch):
+        """Every parsed response body is handed to the archive hook."""
+        archived = []
+        client = CaixaLotteryClient(archive=lambda *args: archived.append(args))
+        self.fake_session(client, monkeypatch, [(200, {}, {"numero": 7})])
+
+        client.get_result_by_number("megasena", 7)
+
+        assert archived == [("megasena", 7, b'{"numero": 7}')]
+
+    def test_response_cache_is_bounded(self, monkeypatch):
+        """The least recently used response is evicted beyond cache_size."""
+        client = CaixaLotteryClient(cache_size=1)
+        sent = self.fake_session(client, monkeypatch, [
+            (200, {"ETag": '"a"'}, {"numero": 1}),
+            (200, {"ETag": '"b"'}, {"numero": 2}),
+            (200, {"ETag": '"a2"'}, {"numero": 1}),
+        ])
+
+        client.get_result_by_number("megasena", 1)
+        client.get_result_by_number("megasena", 2)
+        client.get_result_by_number("megasena", 1)
+
+        assert sent[2] == {}
+
+
+def make_result(number: int, numbers: list[int] | None = None) -> DrawResult:
+    """Build a parsed API result for a contest."""
+    numbers = numbers or [number % 50 + offset for offset in range(1, 7)]
+    return DrawResult(
+        number=number,
+        draw_date=date(2025, 1, 1),
+        numbers=sorted(numbers),
+        numbers_draw_order=numbers,
+        is_accumulated=False,
+        accumulated_value=Decimal("0"),
+        next_draw_estimate=Decimal("3000000"),
+        total_revenue=Decimal("0"),
+        location="ESPAÇO DA SORTE",
+        city_state="SÃO PAULO, SP",
+        next_draw_number=number + 1,
+        next_draw_date=None,
+        prize_tiers=[
+            {"tier": 1, "description": "6 acertos", "winners_count": 0, "prize_value": Decimal("0")},
+        ],
+        raw_data={"numero": number},
+    )
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Test the concurrent backfill of missing contests."""
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        """Serve contests 1-10 from the patched client, with contest 7 failing."""
+        fetched = []
+
+        def get_result_by_number(client, slug, number, lane="sync"):
+            assert lane == "backfill"
+            fetched.append(number)
+            if number == 7:
+                raise ValueError("Unavailable")
+            return make_result(number)
+
+        monkeypatch.setattr(CaixaLotteryClient, "get_result_by_number", get_result_by_number)
+        monkeypatch.setattr(CaixaLotteryClient, "get_latest_result", lambda client, slug, lane: make_result(10))
+        return fetched
+
+    def test_backfill_fetches_only_missing(self, lottery, fake_api):
+        """Missing contests are fetched concurrently and inserted with their prize tiers."""
+        Draw.objects.create(
+            lottery=lottery, number=3, draw_date="2025-01-01",
+            numbers=[1, 2, 3, 4, 5, 6], raw_data={"numero": 3},
+        )
+
+        summary = DrawBackfiller(max_workers=4).run(lottery)
+
+        assert summary["up_to"] == 10
+        assert summary["missing"] == 9
+        assert summary["created"] == 8
+        assert summary["failed"] == [7]
+        assert sorted(fake_api) == [1, 2, 4, 5, 6, 7, 8, 9]
+        assert sorted(lottery.draws.values_list("number", flat=True)) == [1, 2, 3, 4, 5, 6, 8, 9, 10]
+        assert PrizeTier.objects.filter(draw__lottery=lottery, matches=6).count() == 8
+
+    def test_backfill_skips_invalid_draws(self, lottery, fake_api, monkeypatch):
+        """Draws failing the model validation are not inserted."""
+        monkeypatch.setattr(
+            CaixaLotteryClient, "get_result_by_number",
+            lambda client, slug, number, lane: make_result(number, [1, 2, 3]),
+        )
+
+        summary = DrawBackfiller(max_workers=2).run(lottery, up_to=4)
+
+        assert summary["created"] == 0
+        assert not lottery.draws.exists()
+
+    def test_backfill_stops_when_breaker_opens(self, lottery, fake_api, monkeypatch):
+        """Once the circuit breaker opens the remaining contests are cancelled."""
+        def get_result_by_number(client, slug, number, lane):
+            raise CircuitOpenError("caixa", 0)
+
+        monkeypatch.setattr(CaixaLotteryClient, "get_result_by_number", get_result_by_number)
+
+        summary = DrawBackfiller(max_workers=1).run(lottery, up_to=20)
+
+        assert summary["interrupted"] is True
+        assert summary["failed"] == list(range(1, 21))
+
+
+@pytest.mark.django_db
+class TestGapDetection:
+    """Test missing contest detection."""
+
+    @pytest.fixture
+    def stored(self, lottery):
+        """Store contests 2, 3 and 5."""
+        for number in (2, 3, 5):
+            Draw.objects.create(
+                lottery=lottery, number=number, draw_date="2025-01-01",
+                numbers=[1, 2, 3, 4, 5, 6], raw_data={"numero": number},
+            )
+
+    def test_missing_up_to_latest_stored(self, lottery, stored):
+        """Without up_to, gaps are searched up to the latest stored contest."""
+        assert find_missing_numbers(lottery) == [1, 4]
+
+    def test_missing_up_to(self, lottery, stored):
+        """Contests after the latest stored one count as missing up to up_to."""
+        assert find_missing_numbers(lottery, 7) == [1, 4, 6, 7]
+
+    def test_missing_by_lottery(self, lottery, stored):
+        """Lotteries without gaps are left out."""
+        other = Lottery.objects.create(
+            name="Quina", slug="quina", api_identifier="quina",
+            numbers_count=5, min_number=1, max_number=80, is_active=True,
+        )
+        assert find_missing_numbers_by_lottery([lottery.id, other.id]) == {lottery.id: [1, 4]}
+
+    def test_gaps_endpoint(self, lottery, stored):
+        """Admins get the gap report of every active lottery."""
+        api = APIClient()
+        api.force_authenticate(user=get_user_model().objects.create_superuser("admin", "a@a.com", "pw"))
+
+        response = api.get("/api/lotteries/gaps/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [
+            {"lottery": "megasena", "latest_number": 5, "missing_count": 2, "missing_numbers": [1, 4]}
+        ]
+
+    def test_gaps_endpoint_requires_admin(self, client, lottery):
+        """Anonymous users cannot see the gap report."""
+        assert client.get("/api/lotteries/gaps/").status_code in (401, 403)
+
+
+@pytest.mark.django_db
+class TestSyncAll:
+    """Test the parallel sync of all active lotteries."""
+
+    def test_sync_all_aggregates_and_publishes_once(
+        self, lottery, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Lotteries sync independently and new draws are published in one batch."""
+        Lottery.objects.create(
+            name="Quina", slug="quina", api_identifier="quina",
+            numbers_count=5, min_number=1, max_number=80, is_active=True,
+        )
+
+        def get_latest_result(client, slug):
+            if slug == "quina":
+                raise ConnectionError("Timeout")
+            return make_result(10)
+
+        published = []
+        monkeypatch.setattr(CaixaLotteryClient, "get_latest_result", get_latest_result)
+        monkeypatch.setattr(draw_events, "_handlers", [lambda *event: published.append(event)])
+
+        # Eager tasks retry inline: fail on the first error instead
+        monkeypatch.setattr(sync_lottery_results, "max_retries", 0)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = sync_all_active_lotteries()
+
+        assert result["status"] == "queued"
+        assert sorted(result["lotteries"]) == ["megasena", "quina"]
+        draw = Draw.objects.get(lottery=lottery, number=10)
+        assert published == [(lottery.id, [draw.id])]
+
+    def test_finish_sync_all_counts_statuses(self):
+        """The callback reports every lottery and the count of each status."""
+        results = [{"status": "created", "draw_id": 1, "lottery_id": 1}, {"status": "skipped"}]
+
+        with draw_events.muted():
+            summary = finish_sync_all(results, ["megasena", "quina"])
+
+        assert summary["counts"] == {"created": 1, "skipped": 1}
+        assert summary["results"]["quina"] == {"status": "skipped"}
+
+
+def caixa_payload(number: int, winners: int = 0, numbers: list[str] | None = None) -> bytes:
+    """Build a CAIXA API response body."""
+    return json.dumps({
+        "numero": number,
+        "dataApuracao": "20/12/2025",
+        "listaDezenas": numbers or ["01", "09", "37", "39", "42", "44"],
+        "listaRateioPremio": [
+            {"faixa": 1, "descricaoFaixa": "6 acertos", "numeroDeGanhadores": winners, "valorPremio": 100.0},
+        ],
+    }).encode()
+
+
+@pytest.mark.django_db
+class TestResponseArchive:
+    """Test the raw response archive and its offline replay."""
+
+    @pytest.fixture
+    def stored_draw(self, lottery):
+        """Store contest 2954 with its top prize tier."""
+        with draw_events.muted():
+            draw = Draw.objects.create(
+                lottery=lottery, number=2954, draw_date="2025-12-20",
+                numbers=[1, 9, 37, 39, 42, 44], raw_data={"numero": 2954},
+            )
+        PrizeTier.objects.create(draw=draw, tier=1, description="6 acertos", matches=6)
+        return draw
+
+    def test_identical_responses_are_stored_once(self, lottery):
+        """Responses are content-addressed: a repeated body adds no row."""
+        first = archive_response("megasena", 1, caixa_payload(1))
+        second = archive_response("megasena", 1, caixa_payload(1))
+        archive_response("megasena", 1, caixa_payload(1, winners=2))
+
+        assert first == second
+        assert RawResponse.objects.count() == 2
+
+    def test_replay_rebuilds_draws(self, lottery, stored_draw, django_capture_on_commit_callbacks, monkeypatch):
+        """The latest archived version of each contest is parsed and written in bulk."""
+        published, versions = [], []
+        monkeypatch.setattr(draw_events, "_handlers", [lambda *event: published.append(event)])
+        monkeypatch.setattr("apps.lotteries.services.archive.publish_lottery_version", versions.append)
+        archive_response("megasena", stored_draw.number, caixa_payload(stored_draw.number))
+        archive_response("megasena", stored_draw.number, caixa_payload(stored_draw.number, winners=3))
+        archive_response("megasena", 3000, caixa_payload(3000, numbers=["02", "04", "06", "08", "10", "12"]))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            summary = ArchiveReplayer().run(lottery)
+
+        assert (summary["replayed"], summary["updated"], summary["created"]) == (2, 1, 1)
+        tiers = list(stored_draw.prize_tiers.values_list("tier", "winners_count", "matches"))
+        assert tiers == [(1, 3, 6)]
+        assert Draw.objects.get(lottery=lottery, number=3000).numbers == [2, 4, 6, 8, 10, 12]
+
+        # Same numbers: only the inserted contest needs its stats recomputed
+        new_draw = Draw.objects.get(lottery=lottery, number=3000)
+        assert published == [(lottery.id, [new_draw.id])]
+        # ...but its cached payloads carry the replayed prize data
+        assert versions == [lottery.slug]
+        stored_draw.refresh_from_db()
+        assert stored_draw.raw_data_hash == raw_data_digest(stored_draw.raw_data)
+        assert stored_draw.raw_data["listaRateioPremio"][0]["numeroDeGanhadores"] == 3
+
+    def test_replay_skips_invalid_payloads(self, lottery, stored_draw):
+        """Archived payloads failing draw validation are reported, not written."""
+        numbers = ["01", "09", "37", "39", "42", "77", "99"]
+        archive_response("megasena", stored_draw.number, caixa_payload(stored_draw.number, numbers=numbers))
+        archive_response("megasena", 3000, caixa_payload(3000, numbers=numbers))
+
+        summary = ArchiveReplayer().run(lottery)
+
+        assert summary["failed"] == [stored_draw.number, 3000]
+        assert (summary["replayed"], summary["updated"], summary["created"]) == (0, 0, 0)
+        stored_draw.refresh_from_db()
+        assert stored_draw.numbers == [1, 9, 37, 39, 42, 44]
+        assert not Draw.objects.filter(lottery=lottery, number=3000).exists()
+
+    def test_replay_dry_run_writes_nothing(self, lottery, stored_draw):
+        """A dry run parses the archive without touching the draws."""
+        archive_response("megasena", stored_draw.number, caixa_payload(stored_draw.number, winners=3))
+
+        summary = ArchiveReplayer().run(lottery, dry_run=True)
+
+        assert summary["replayed"] == 1
+        assert stored_draw.prize_tiers.get(tier=1).winners_count == 0
+
+
+@pytest.mark.django_db
+class TestDrawImport:
+    """Test batch validation and the import_draws command."""
+
+    def test_batch_validator_applies_clean_rules(self, lottery):
+        """Each rule of Draw.clean rejects its row and keeps the others."""
+        rows = {
+            1: ([1, 2, 3, 4, 5, 6], [6, 5, 4, 3, 2, 1]),
+            2: ([1, 2, 3, 4, 5], None),
+            3: ([1, 2, 3, 4, 5, 61], None),
+            4: ([1, 1, 3, 4, 5, 6], None),
+            5: ([1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 7]),
+            6: ([1, 2, 3, 4, 5, "6"], None),
+        }
+        draws = [
+            Draw(lottery=lottery, number=number, numbers=numbers, numbers_draw_order=order)
+            for number, (numbers, order) in rows.items()
+        ]
+
+        valid, errors = DrawBatchValidator(lottery).validate(draws)
+
+        assert [draw.number for draw in valid] == [1]
+        assert sorted(errors) == [2, 3, 4, 5, 6]
+        assert "exatamente 6" in errors[2]
+        assert "intervalo" in errors[3]
+        assert "duplicados" in errors[4]
+
+    def test_save_uses_the_batch_rules(self, lottery):
+        """Draw.save() reports the shared rules per field."""
+        with pytest.raises(ValidationError) as exc_info:
+            Draw.objects.create(
+                lottery=lottery, number=1, draw_date="2025-01-01", raw_data={"numero": 1},
+                numbers=[1, 2, 3, 4, 5, 6], numbers_draw_order=[1, 2, 3, 4, 5, 7],
+            )
+
+        assert exc_info.value.message_dict == {
+            "numbers_draw_order": ["Deve conter os mesmos números que o campo numbers."]
+        }
+
+    def test_sync_draw_by_number_inserts_through_bulk_path(self, lottery, monkeypatch):
+        """Single-draw syncs share the validated bulk insert."""
+        monkeypatch.setattr(
+            CaixaLotteryClient, "get_result_by_number", lambda client, slug, number: make_result(number)
+        )
+
+        result = sync_draw_by_number(lottery.slug, 42)
+
+        assert result["status"] == "created"
+        assert PrizeTier.objects.get(draw_id=result["draw_id"]).matches == 6
+
+    def test_import_csv(self, lottery, tmp_path):
+        """Semicolon CSV exports with one column per ball are imported."""
+        path = tmp_path / "megasena.csv"
+        path.write_text(
+            "Concurso;Data do Sorteio;Bola1;Bola2;Bola3;Bola4;Bola5;Bola6\n"
+            "1;11/03/1996;41;5;4;52;30;33\n"
+            "2;1996-03-18;9;39;37;49;43;41\n"
+            "3;25/03/1996;10;11;29;30;36;61\n",
+            encoding="utf-8",
+        )
+
+        call_command("import_draws", str(path), lottery="megasena", stdout=io.StringIO())
+
+        draws = {draw.number: draw for draw in lottery.draws.all()}
+        assert sorted(draws) == [1, 2]  # contest 3 has a number out of range
+        assert draws[1].numbers == [4, 5, 30, 33, 41, 52]
+        assert draws[1].numbers_draw_order is None  # ball columns do not say they are in draw order
+        assert draws[2].draw_date == date(1996, 3, 18)
+
+    def test_csv_draw_order_only_when_explicit(self):
+        """Only a draw-order column fills the draw order; column lotteries keep their order."""
+        listed = _csv_payload({"Concurso": "1", "Dezenas": "41 05 04 52 30 33"})
+        ordered = _csv_payload({
+            "Concurso": "2",
+            "Dezenas": "04 05 30 33 41 52",
+            "Dezenas em ordem de sorteio": "41-05-04-52-30-33",
+        })
+        columns = _csv_payload({"Concurso": "3", "Dezenas": "7 0 3 3 9 1 0"}, "supersete")
+
+        assert listed["listaDezenas"] == ["04", "05", "30", "33", "41", "52"]
+        assert "dezenasSorteadasOrdemSorteio" not in listed
+        assert ordered["dezenasSorteadasOrdemSorteio"] == ["41", "05", "04", "52", "30", "33"]
+        assert parse_draw_result(ordered, "megasena").numbers_draw_order == [41, 5, 4, 52, 30, 33]
+        assert columns["listaDezenas"] == ["7", "0", "3", "3", "9", "1", "0"]
+
+    def test_csv_super_sete_columns(self):
+        """Super Sete exports have one "Coluna N" header per column, kept in column order."""
+        row = {"Concurso": "1", "Data Sorteio": "21/09/2020"}
+        row.update({f"Coluna {column}": value for column, value in enumerate("9073210", start=1)})
+
+        payload = _csv_payload(row, "supersete")
+
+        assert payload["listaDezenas"] == ["9", "0", "7", "3", "2", "1", "0"]
+        assert parse_draw_result(payload, "supersete").numbers == [9, 0, 7, 3, 2, 1, 0]
+
+    def test_import_zip_of_json(self, lottery, tmp_path):
+        """Zip archives of JSON pages and JSON lines are imported, skipping stored contests."""
+        path = tmp_path / "dump.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("page1.json", "[" + caixa_payload(1).decode() + "," + caixa_payload(2).decode() + "]")
+            archive.writestr("page2.jsonl", caixa_payload(2).decode() + "\n" + caixa_payload(3).decode() + "\n")
+            archive.writestr("README.txt", "ignored")
+
+        summary = DrawImporter().run(lottery, path)
+
+        assert (summary["read"], summary["created"]) == (4, 3)
+        assert PrizeTier.objects.filter(draw__lottery=lottery).count() == 3
+
+    def test_import_unsupported_file(self, lottery, tmp_path):
+        """Unknown file types are rejected."""
+        path = tmp_path / "draws.xlsx"
+        path.write_bytes(b"")
+
+        with pytest.raises(CommandError):
+            call_command("import_draws", str(path), lottery="megasena")
+
+
+@pytest.mark.django_db
+class TestDrawUpsert:
+    """Test storing the corrections CAIXA publishes after a draw."""
+
+    @pytest.fixture
+    def published(self, monkeypatch):
+        events = []
+        monkeypatch.setattr(draw_events, "_handlers", [lambda *event: events.append(event)])
+        return events
+
+    @staticmethod
+    def corrected(number: int, **changes) -> DrawResult:
+        result = make_result(number)
+        tier = dict(result.prize_tiers[0])
+        tier.update(changes.pop("tier", {}))
+        result.prize_tiers = [tier]
+        for name, value in changes.items():
+            setattr(result, name, value)
+        result.raw_data = {"numero": number, **{k: str(v) for k, v in changes.items()}, "tier": str(tier)}
+        return result
+
+    def test_same_payload_is_unchanged(self, lottery, published):
+        """A payload with the stored hash writes nothing."""
+        upsert_draws(lottery, [make_result(5)], publish=False)
+
+        outcome = upsert_draws(lottery, [make_result(5)])
+
+        assert outcome.unchanged == [5]
+        assert not outcome.created and not outcome.updated
+        assert published == []
+
+    def test_migration_fills_hash_of_stored_draws(self, lottery, published):
+        """Draws stored before raw_data_hash existed get it backfilled, so their first sync is not an update."""
+        from django.apps import apps as django_apps
+
+        migration = importlib.import_module("apps.lotteries.migrations.0004_draw_raw_data_hash")
+        upsert_draws(lottery, [make_result(5)], publish=False)
+        Draw.objects.update(raw_data_hash="")
+
+        migration.fill_raw_data_hash(django_apps, None)
+
+        draw = Draw.objects.get(lottery=lottery, number=5)
+        assert draw.raw_data_hash == raw_data_digest(draw.raw_data)
+        assert upsert_draws(lottery, [make_result(5)]).unchanged == [5]
+
+    def test_prize_correction_marks_draw_dirty(self, lottery, published, django_capture_on_commit_callbacks):
+        """New winner counts update the tier and republish the draw."""
+        upsert_draws(lottery, [make_result(5)], publish=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            outcome = upsert_draws(lottery, [self.corrected(5, tier={"winners_count": 2})])
+
+        draw = Draw.objects.get(lottery=lottery, number=5)
+        assert [d.id for d in outcome.updated] == [draw.id]
+        assert [d.id for d in outcome.dirty] == [draw.id]
+        assert draw.prize_tiers.get(tier=1).winners_count == 2
+        assert published == [(lottery.id, [draw.id])]
+
+    def test_accumulated_correction_only_bumps_version(self, lottery, published, django_capture_on_commit_callbacks):
+        """Corrections outside prize data refresh cached payloads without recomputation."""
+        upsert_draws(lottery, [make_result(5)], publish=False)
+        version = get_lottery_version(lottery.slug)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            outcome = upsert_draws(lottery, [self.corrected(5, accumulated_value=Decimal("1000.50"))])
+
+        assert len(outcome.updated) == 1 and outcome.dirty == []
+        assert Draw.objects.get(lottery=lottery, number=5).accumulated_value == Decimal("1000.50")
+        assert published == []
+        assert get_lottery_version(lottery.slug) != version
+
+    def test_sync_stores_corrections(self, lottery, monkeypatch):
+        """sync_lottery_results updates an existing draw instead of skipping it."""
+        upsert_draws(lottery, [make_result(5)])
+        monkeypatch.setattr(
+            CaixaLotteryClient, "get_latest_result",
+            lambda client, slug: self.corrected(5, tier={"prize_value": Decimal("10.00")}),
+        )
+
+        result = sync_lottery_results(lottery.slug)
+
+        assert result["status"] == "updated"
+        assert result["dirty"] is True
+
+
+@pytest.mark.django_db
+class TestDrawCalendar:
+    """Test the calendar-aware sync planning."""
+
+    @pytest.fixture
+    def latest(self, lottery):
+        """Store contest 10, announcing contest 11 for 2025-01-04."""
+        return Draw.objects.create(
+            lottery=lottery, number=10, draw_date="2025-01-01", numbers=[1, 2, 3, 4, 5, 6],
+            next_draw_number=11, next_draw_date="2025-01-04", raw_data={"numero": 10},
+        )
+
+    @staticmethod
+    def at(day: int, hour: int, minute: int = 0) -> datetime:
+        """Build an aware datetime in the project time zone (draws at 20h, first poll at 20h30)."""
+        return timezone.make_aware(datetime(2025, 1, day, hour, minute))
+
+    def test_idle_before_expected_result(self, lottery, latest):
+        """No poll happens before the expected draw time plus the result delay."""
+        plan = DrawCalendar().plan(lottery, now=self.at(4, 20, 10))
+
+        assert not plan.due
+        assert plan.reason == "waiting"
+        assert plan.target == 11
+        assert plan.next_check == self.at(4, 20, 30)
+
+    def test_polls_with_backoff_after_draw(self, lottery, latest):
+        """Inside the window the interval doubles after each poll."""
+        calendar = DrawCalendar()
+        start = self.at(4, 20, 30)
+
+        assert calendar.plan(lottery, now=start).due
+        assert calendar.plan(lottery, now=start + timedelta(minutes=4)).reason == "backoff"
+        assert calendar.plan(lottery, now=start + timedelta(minutes=5)).due
+        # Second interval is 10 minutes
+        assert not calendar.plan(lottery, now=start + timedelta(minutes=14)).due
+        assert calendar.plan(lottery, now=start + timedelta(minutes=15)).due
+
+    def test_new_contest_resets_backoff(self, lottery, latest):
+        """Storing the awaited contest starts planning for the next one."""
+        calendar = DrawCalendar()
+        calendar.plan(lottery, now=self.at(4, 20, 30))
+        Draw.objects.create(
+            lottery=lottery, number=11, draw_date="2025-01-04", numbers=[1, 2, 3, 4, 5, 6],
+            next_draw_number=12, next_draw_date="2025-01-07", raw_data={"numero": 11},
+        )
+
+        plan = calendar.plan(lottery, now=self.at(4, 20, 40))
+
+        assert plan.target == 12
+        assert plan.reason == "waiting"
+
+    def test_overdue_after_window(self, lottery, latest):
+        """Once the window elapses the lottery is polled at the overdue interval."""
+        plan = DrawCalendar().plan(lottery, now=self.at(7, 12))
+
+        assert plan.due
+        assert plan.reason == "overdue"
+
+    def test_backoff_interval_is_clamped(self, settings):
+        """Long outages keep the maximum interval instead of overflowing timedelta."""
+        calendar = DrawCalendar()
+
+        assert calendar._interval(False, 1) == timedelta(minutes=settings.CAIXA_POLL_MIN_INTERVAL)
+        assert calendar._interval(False, 40) == timedelta(minutes=settings.CAIXA_POLL_MAX_INTERVAL)
+        assert calendar._interval(False, 10_000) == timedelta(minutes=settings.CAIXA_POLL_MAX_INTERVAL)
+
+    def test_followup_polls_after_result_lands(self, lottery, latest, settings):
+        """A stored result is polled again at doubling intervals, then left alone."""
+        settings.CAIXA_FOLLOWUP_POLLS = 3
+        settings.CAIXA_FOLLOWUP_INTERVAL = 60
+        landed = self.at(1, 21)
+        Draw.objects.filter(pk=latest.pk).update(created_at=landed)
+        calendar = DrawCalendar()
+
+        assert not calendar.plan(lottery, now=landed + timedelta(minutes=59)).due
+        first = calendar.plan(lottery, now=landed + timedelta(hours=1))
+        assert (first.due, first.reason, first.target) == (True, "followup", 11)
+        assert first.next_check == landed + timedelta(hours=3)
+        assert calendar.plan(lottery, now=landed + timedelta(hours=2, minutes=59)).reason == "waiting"
+        assert calendar.plan(lottery, now=landed + timedelta(hours=3)).due
+        assert calendar.plan(lottery, now=landed + timedelta(hours=7)).due
+
+        plan = calendar.plan(lottery, now=landed + timedelta(days=2))
+        assert (plan.due, plan.reason) == (False, "waiting")
+        assert plan.next_check == self.at(4, 20, 30)
+
+    def test_migration_reverse_restores_fixed_interval_syncs(self, db):
+        """Unapplying the calendar migration re-enables the polling it disabled."""
+        from django.apps import apps as django_apps
+        from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+        migration = importlib.import_module("apps.lotteries.migrations.0005_schedule_calendar_syncs")
+        interval = IntervalSchedule.objects.create(every=30, period="minutes")
+        fixed = PeriodicTask.objects.create(
+            name="Sincronizar loterias", task=migration.FIXED_INTERVAL_TASKS[0], interval=interval
+        )
+
+        migration.schedule_calendar_syncs(django_apps, None)
+        fixed.refresh_from_db()
+        assert not fixed.enabled
+        assert PeriodicTask.objects.filter(name=migration.SCHEDULER_NAME, enabled=True).exists()
+
+        migration.unschedule_calendar_syncs(django_apps, None)
+        fixed.refresh_from_db()
+        assert fixed.enabled
+        assert not PeriodicTask.objects.filter(name=migration.SCHEDULER_NAME).exists()
+
+    def test_schedule_queues_only_due_lotteries(self, lottery, latest, monkeypatch):
+        """The beat task queues syncs only for lotteries with a result due."""
+        Lottery.objects.create(
+            name="Quina", slug="quina", api_identifier="quina",
+            numbers_count=5, min_number=1, max_number=80, is_active=True,
+        )
+        queued = []
+        monkeypatch.setattr(sync_lottery_results, "delay", lambda slug: queued.append(slug))
+        monkeypatch.setattr(timezone, "now", lambda: self.at(4, 10))
+
+        result = schedule_lottery_syncs()
+
+        # Mega-Sena waits for tonight's draw; Quina has no history and is polled
+        assert queued == ["quina"]
+        assert result["queued"] == ["quina"]
+        assert result["plans"]["megasena"]["reason"] == "waiting"
+
+
+class TestTokenBucket:
+    """Test the rate limit shared by every worker."""
+
+    def test_lane_share_leaves_room_for_sync(self):
+        """Backfills take at most their share of a window; syncs may take the rest."""
+        bucket = TokenBucket(rate=4, shares={"backfill": 0.5})
+
+        assert [bucket._take(100, "backfill") for _ in range(3)] == [True, True, False]
+        assert [bucket._take(100, "sync") for _ in range(3)] == [True, True, False]
+        assert bucket._take(101, "backfill")
+
+    def test_zero_rate_is_unlimited(self):
+        """A rate of 0 disables the limit."""
+        bucket = TokenBucket(rate=0)
+
+        for _ in range(100):
+            bucket.acquire()
+
+        assert bucket.metrics()["used"] == 0
+
+
+class TestCircuitBreaker:
+    """Test the shared circuit breaker around the CAIXA API."""
+
+    def test_opens_after_threshold(self):
+        """Failures past the threshold refuse further calls until the cooldown."""
+        breaker = CircuitBreaker("test", failure_threshold=2, failure_window=60, cooldown=300)
+
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        assert breaker.state()["state"] == "open"
+        assert breaker.state()["trips"] == 1
+
+    def test_half_open_allows_one_probe(self):
+        """After the cooldown one probe goes through; its success closes the circuit."""
+        breaker = CircuitBreaker("test", failure_threshold=1, failure_window=60, cooldown=0)
+        breaker.record_failure()
+
+        breaker.allow()
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()  # probe already in flight
+        breaker.record_success()
+
+        assert breaker.state()["state"] == "closed"
+        breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        """A failing probe opens the circuit again."""
+        breaker = CircuitBreaker("test", failure_threshold=1, failure_window=60, cooldown=0)
+        breaker.record_failure()
+        breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state()["trips"] == 2
+
+    def test_client_short_circuits_while_open(self, monkeypatch):
+        """Server errors open the breaker and later calls skip the network."""
+        breaker = CircuitBreaker("test", failure_threshold=2, failure_window=60, cooldown=300)
+        client = CaixaLotteryClient(breaker=breaker, rate_limiter=TokenBucket(rate=0))
+        sent = TestCaixaClient.fake_session(client, monkeypatch, [(503, {}, None), (503, {}, None)])
+
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                client.get_latest_result("megasena")
+        with pytest.raises(CircuitOpenError):
+            client.get_latest_result("megasena")
+
+        assert len(sent) == 2
+
+    def test_no_transport_retries(self):
+        """Retries would bypass the breaker and the rate limit: the adapter sends once."""
+        client = CaixaLotteryClient(rate_limiter=TokenBucket(rate=0))
+
+        assert client.session.get_adapter(CaixaLotteryClient.BASE_URL).max_retries.total == 0
+
+    def test_fails_open_without_cache(self, monkeypatch):
+        """A cache outage reads as a closed circuit."""
+        breaker = CircuitBreaker("test", failure_threshold=1, failure_window=60, cooldown=300)
+
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("cache down")
+
+        monkeypatch.setattr(cache, "get_many", unavailable)
+        monkeypatch.setattr(cache, "get", unavailable)
+
+        assert breaker.state()["state"] == "closed"
+        assert not breaker.is_open()
+        breaker.allow()
+
+    @pytest.mark.django_db
+    def test_tasks_skip_while_open(self, lottery, monkeypatch):
+        """Syncs neither call the API nor retry while the shared breaker is open."""
+        breaker = get_caixa_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        monkeypatch.setattr(sync_lottery_results, "delay", lambda slug: pytest.fail("queued a sync"))
+        monkeypatch.setattr(requests.Session, "get", lambda *args, **kwargs: pytest.fail("called the API"))
+
+        assert sync_lottery_results(lottery.slug)["status"] == "error"
+        assert schedule_lottery_syncs()["status"] == "skipped"
+        assert sync_all_active_lotteries()["status"] == "skipped"
+
+    @pytest.mark.django_db
+    def test_status_endpoint(self):
+        """Admins see the breaker state and the rate limit usage."""
+        api = APIClient()
+        api.force_authenticate(user=get_user_model().objects.create_superuser("admin", "a@a.com", "pw"))
+
+        response = api.get("/api/lotteries/caixa/status/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["breaker"]["state"] == "closed"
+        assert response.data["rate_limit"]["shares"] == {"backfill": 0.8}
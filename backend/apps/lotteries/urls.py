@@ -11,6 +11,8 @@ app_name = "lotteries"
 urlpatterns = [
     # Lottery endpoints
     path("", views.LotteryListView.as_view(), name="lottery-list"),
+    path("gaps/", views.DrawGapsView.as_view(), name="draw-gaps"),
+    path("caixa/status/", views.CaixaStatusView.as_view(), name="caixa-status"),
     path("<slug:slug>/", views.LotteryDetailView.as_view(), name="lottery-detail"),
 
     # Draw endpoints
@@ -12,14 +12,19 @@ from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .clients import get_caixa_circuit_breaker, get_caixa_rate_limiter
+from .conditional import conditional_catalog_get, conditional_lottery_get
 from .models import Draw, Lottery
 from .serializers import (
+    CaixaStatusSerializer,
+    DrawGapSerializer,
     DrawListSerializer,
     DrawSerializer,
     DrawSyncSerializer,
     LotterySerializer,
     SyncResponseSerializer,
 )
+from .services import get_gap_report, get_latest_draw_payload
 from .tasks import sync_draw_by_number, sync_lottery_results
 
 
@@ -30,6 +35,7 @@ from .tasks import sync_draw_by_number, sync_lottery_results
         tags=["Loterias"],
     )
 )
+@conditional_catalog_get
 class LotteryListView(ListAPIView):
     """List all active lotteries."""
 
@@ -62,6 +68,7 @@ class LotteryDetailView(RetrieveAPIView):
         tags=["Sorteios"],
     )
 )
+@conditional_lottery_get
 class LatestDrawView(APIView):
     """Get the latest draw for a lottery."""
 
@@ -69,16 +76,15 @@ class LatestDrawView(APIView):
 
     def get(self, request, slug):
         lottery = get_object_or_404(Lottery, slug=slug, is_active=True)
-        draw = lottery.draws.select_related("lottery").prefetch_related("prize_tiers").first()
+        payload = get_latest_draw_payload(lottery.slug)
 
-        if not draw:
+        if payload is None:
             return Response(
                 {"detail": "Nenhum sorteio encontrado para esta loteria."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        serializer = DrawSerializer(draw)
-        return Response(serializer.data)
+        return Response(payload)
 
 
 @extend_schema_view(
@@ -95,6 +101,7 @@ class LatestDrawView(APIView):
         ],
     )
 )
+@conditional_lottery_get
 class DrawListView(ListAPIView):
     """List all draws for a lottery with pagination."""
 
@@ -163,3 +170,39 @@ class SyncDrawView(APIView):
             "message": f"Sync task queued for {lottery.name}",
             "task_id": result.id,
         })
+
+
+@extend_schema(
+    summary="Lacunas no histórico",
+    description="Lista os concursos ausentes do histórico de cada loteria ativa. Requer autenticação de admin.",
+    tags=["Admin"],
+    responses={200: DrawGapSerializer(many=True)},
+)
+class DrawGapsView(APIView):
+    """Report missing contests of every active lottery (admin only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(DrawGapSerializer(get_gap_report(), many=True).data)
+
+
+@extend_schema(
+    summary="Estado da API da CAIXA",
+    description=(
+        "Estado do circuit breaker e uso do limite de requisições compartilhado com a API da CAIXA. "
+        "Requer autenticação de admin."
+    ),
+    tags=["Admin"],
+    responses={200: CaixaStatusSerializer},
+)
+class CaixaStatusView(APIView):
+    """Report the CAIXA circuit breaker and rate limit state (admin only)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(CaixaStatusSerializer({
+            "breaker": get_caixa_circuit_breaker().state(),
+            "rate_limit": get_caixa_rate_limiter().metrics(),
+        }).data)
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='column_distribution',
+            field=models.JSONField(default=list, help_text='Quantidade de números em cada coluna do volante', verbose_name='Distribuição por coluna'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='decade_distribution',
+            field=models.JSONField(default=list, help_text='Quantidade de números em cada dezena (0-9, 10-19, ...)', verbose_name='Distribuição por dezena'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='fibonacci_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Quantidade de números da sequência de Fibonacci', verbose_name='Fibonacci'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='low_half_ratio',
+            field=models.FloatField(default=0, help_text='Fração dos números na metade inferior do intervalo da loteria', verbose_name='Fração na metade inferior'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='max_consecutive_run',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Tamanho da maior sequência de números consecutivos', verbose_name='Maior sequência'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='mean_gap',
+            field=models.FloatField(default=0, help_text='Distância média entre números vizinhos (em ordem crescente)', verbose_name='Intervalo médio'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='multiples_of_3_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Quantidade de números múltiplos de 3', verbose_name='Múltiplos de 3'),
+        ),
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='row_distribution',
+            field=models.JSONField(default=list, help_text='Quantidade de números em cada linha do volante', verbose_name='Distribuição por linha'),
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['even_count', 'sum_value'], name='stats_draws_even_co_36064d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['sum_value'], name='stats_draws_sum_val_fb590a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['prime_count'], name='stats_draws_prime_c_90948f_idx'),
+        ),
+    ]
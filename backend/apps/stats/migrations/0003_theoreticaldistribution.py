@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+        ('stats', '0002_drawstatistics_extended_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TheoreticalDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('sum', 'Soma'), ('evens', 'Pares'), ('primes', 'Primos'), ('consecutive', 'Consecutivos')], max_length=20, verbose_name='Métrica')),
+                ('signature', models.CharField(help_text='Regras usadas no cálculo (quantidade:mínimo:máximo)', max_length=50, verbose_name='Assinatura')),
+                ('offset', models.IntegerField(help_text='Valor da métrica correspondente à primeira posição de counts', verbose_name='Valor inicial')),
+                ('counts', models.JSONField(help_text='Quantidade de combinações para cada valor da métrica', verbose_name='Contagens')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lottery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='theoretical_distributions', to='lotteries.lottery', verbose_name='Loteria')),
+            ],
+            options={
+                'verbose_name': 'Distribuição Teórica',
+                'verbose_name_plural': 'Distribuições Teóricas',
+                'unique_together': {('lottery', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+        ('stats', '0003_theoreticaldistribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RandomnessAudit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draw_number', models.PositiveIntegerField(default=0, help_text='Último concurso incluído na auditoria', verbose_name='Último concurso')),
+                ('draws_analyzed', models.PositiveIntegerField(default=0, verbose_name='Sorteios analisados')),
+                ('results', models.JSONField(default=dict, help_text='Resultado de cada teste estatístico', verbose_name='Resultados')),
+                ('state', models.JSONField(default=dict, help_text='Contadores acumulados para atualização incremental', verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lottery', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='randomness_audit', to='lotteries.lottery', verbose_name='Loteria')),
+            ],
+            options={
+                'verbose_name': 'Auditoria de Aleatoriedade',
+                'verbose_name_plural': 'Auditorias de Aleatoriedade',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+        ('stats', '0004_randomnessaudit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrequentItemset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numbers', models.JSONField(help_text='Números do conjunto, em ordem crescente', verbose_name='Números')),
+                ('size', models.PositiveSmallIntegerField(verbose_name='Tamanho')),
+                ('support', models.PositiveIntegerField(help_text='Quantidade de sorteios que contêm todos os números do conjunto', verbose_name='Suporte')),
+                ('min_support', models.PositiveIntegerField(help_text='Suporte mínimo usado na mineração', verbose_name='Suporte mínimo')),
+                ('computed_at_draw', models.PositiveIntegerField(help_text='Último concurso incluído na mineração', verbose_name='Último concurso')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lottery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frequent_itemsets', to='lotteries.lottery', verbose_name='Loteria')),
+            ],
+            options={
+                'verbose_name': 'Conjunto Frequente',
+                'verbose_name_plural': 'Conjuntos Frequentes',
+                'ordering': ['-support'],
+                'indexes': [models.Index(fields=['lottery', 'size', '-support'], name='stats_frequ_lottery_81f27f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_draw_lottery(apps, schema_editor):
+    DrawStatistics = apps.get_model("stats", "DrawStatistics")
+    Draw = apps.get_model("lotteries", "Draw")
+    DrawStatistics.objects.update(
+        lottery_id=Subquery(Draw.objects.filter(id=OuterRef("draw_id")).values("lottery_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotteries', '0002_alter_lottery_max_number'),
+        ('stats', '0005_frequentitemset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drawstatistics',
+            name='lottery',
+            field=models.ForeignKey(editable=False, help_text='Loteria do sorteio, copiada para indexar as consultas por loteria', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='draw_statistics', to='lotteries.lottery', verbose_name='Loteria'),
+        ),
+        migrations.RunPython(copy_draw_lottery, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='drawstatistics',
+            name='lottery',
+            field=models.ForeignKey(editable=False, help_text='Loteria do sorteio, copiada para indexar as consultas por loteria', on_delete=django.db.models.deletion.CASCADE, related_name='draw_statistics', to='lotteries.lottery', verbose_name='Loteria'),
+        ),
+        migrations.RemoveIndex(
+            model_name='drawstatistics',
+            name='stats_draws_even_co_36064d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='drawstatistics',
+            name='stats_draws_sum_val_fb590a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='drawstatistics',
+            name='stats_draws_prime_c_90948f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['lottery', 'even_count', 'sum_value'], name='stats_draws_lottery_e46b39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['lottery', 'sum_value'], name='stats_draws_lottery_9b9dd5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drawstatistics',
+            index=models.Index(fields=['lottery', 'prime_count'], name='stats_draws_lottery_e2171f_idx'),
+        ),
+    ]
@@ -1,12 +1,15 @@
 """
 Models for stats app.
 
-Defines DrawStatistics model for pre-calculated metrics.
+Defines DrawStatistics model for pre-calculated metrics,
+TheoreticalDistribution for exact per-lottery expectations,
+RandomnessAudit for stored randomness test results and
+FrequentItemset for mined sets of numbers drawn together.
 """
 
 from django.db import models
 
-from apps.lotteries.models import Draw
+from apps.lotteries.models import Draw, Lottery
 
 
 class DrawStatistics(models.Model):
@@ -23,6 +26,14 @@ class DrawStatistics(models.Model):
         related_name="stats",
         verbose_name="Sorteio",
     )
+    lottery = models.ForeignKey(
+        Lottery,
+        on_delete=models.CASCADE,
+        related_name="draw_statistics",
+        editable=False,
+        verbose_name="Loteria",
+        help_text="Loteria do sorteio, copiada para indexar as consultas por loteria",
+    )
 
     # Basic Metrics
     sum_value = models.IntegerField(
@@ -57,6 +68,48 @@ class DrawStatistics(models.Model):
         help_text="Quantidade de números repetidos do concurso anterior",
     )
 
+    # Extended Metrics
+    decade_distribution = models.JSONField(
+        default=list,
+        verbose_name="Distribuição por dezena",
+        help_text="Quantidade de números em cada dezena (0-9, 10-19, ...)",
+    )
+    row_distribution = models.JSONField(
+        default=list,
+        verbose_name="Distribuição por linha",
+        help_text="Quantidade de números em cada linha do volante",
+    )
+    column_distribution = models.JSONField(
+        default=list,
+        verbose_name="Distribuição por coluna",
+        help_text="Quantidade de números em cada coluna do volante",
+    )
+    max_consecutive_run = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Maior sequência",
+        help_text="Tamanho da maior sequência de números consecutivos",
+    )
+    multiples_of_3_count = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Múltiplos de 3",
+        help_text="Quantidade de números múltiplos de 3",
+    )
+    fibonacci_count = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Fibonacci",
+        help_text="Quantidade de números da sequência de Fibonacci",
+    )
+    mean_gap = models.FloatField(
+        default=0,
+        verbose_name="Intervalo médio",
+        help_text="Distância média entre números vizinhos (em ordem crescente)",
+    )
+    low_half_ratio = models.FloatField(
+        default=0,
+        verbose_name="Fração na metade inferior",
+        help_text="Fração dos números na metade inferior do intervalo da loteria",
+    )
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -65,6 +118,161 @@ class DrawStatistics(models.Model):
         verbose_name = "Estatística do Sorteio"
         verbose_name_plural = "Estatísticas dos Sorteios"
         ordering = ["-draw__number"]
+        indexes = [
+            models.Index(fields=["lottery", "even_count", "sum_value"]),
+            models.Index(fields=["lottery", "sum_value"]),
+            models.Index(fields=["lottery", "prime_count"]),
+        ]
 
     def __str__(self):
         return f"Stats - {self.draw}"
+
+    def save(self, *args, **kwargs):
+        """Copy the lottery of the draw before saving."""
+        if self.lottery_id is None:
+            self.lottery_id = self.draw.lottery_id
+        super().save(*args, **kwargs)
+
+
+class TheoreticalDistribution(models.Model):
+    """
+    Exact distribution of a metric over every possible game of a lottery.
+
+    counts[i] is how many of the C(n, k) combinations have the metric
+    equal to offset + i. Tables depend only on the lottery rules, so they
+    are rebuilt when the signature (k, min, max) no longer matches.
+    """
+
+    METRIC_CHOICES = [
+        ("sum", "Soma"),
+        ("evens", "Pares"),
+        ("primes", "Primos"),
+        ("consecutive", "Consecutivos"),
+    ]
+
+    lottery = models.ForeignKey(
+        Lottery,
+        on_delete=models.CASCADE,
+        related_name="theoretical_distributions",
+        verbose_name="Loteria",
+    )
+    metric = models.CharField(
+        max_length=20,
+        choices=METRIC_CHOICES,
+        verbose_name="Métrica",
+    )
+    signature = models.CharField(
+        max_length=50,
+        verbose_name="Assinatura",
+        help_text="Regras usadas no cálculo (quantidade:mínimo:máximo)",
+    )
+    offset = models.IntegerField(
+        verbose_name="Valor inicial",
+        help_text="Valor da métrica correspondente à primeira posição de counts",
+    )
+    counts = models.JSONField(
+        verbose_name="Contagens",
+        help_text="Quantidade de combinações para cada valor da métrica",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Distribuição Teórica"
+        verbose_name_plural = "Distribuições Teóricas"
+        unique_together = ["lottery", "metric"]
+
+    def __str__(self):
+        return f"{self.lottery} - {self.metric}"
+
+
+class RandomnessAudit(models.Model):
+    """
+    Latest statistical randomness audit of a lottery's full history.
+
+    results holds the test outcomes served by the API; state holds the
+    running counters that let new draws be folded in incrementally.
+    """
+
+    lottery = models.OneToOneField(
+        Lottery,
+        on_delete=models.CASCADE,
+        related_name="randomness_audit",
+        verbose_name="Loteria",
+    )
+    draw_number = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Último concurso",
+        help_text="Último concurso incluído na auditoria",
+    )
+    draws_analyzed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sorteios analisados",
+    )
+    results = models.JSONField(
+        default=dict,
+        verbose_name="Resultados",
+        help_text="Resultado de cada teste estatístico",
+    )
+    state = models.JSONField(
+        default=dict,
+        verbose_name="Estado",
+        help_text="Contadores acumulados para atualização incremental",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Auditoria de Aleatoriedade"
+        verbose_name_plural = "Auditorias de Aleatoriedade"
+
+    def __str__(self):
+        return f"Audit - {self.lottery} #{self.draw_number}"
+
+
+class FrequentItemset(models.Model):
+    """
+    A set of numbers drawn together in at least min_support draws.
+
+    Rows are replaced as a whole each time a lottery is mined.
+    """
+
+    lottery = models.ForeignKey(
+        Lottery,
+        on_delete=models.CASCADE,
+        related_name="frequent_itemsets",
+        verbose_name="Loteria",
+    )
+    numbers = models.JSONField(
+        verbose_name="Números",
+        help_text="Números do conjunto, em ordem crescente",
+    )
+    size = models.PositiveSmallIntegerField(
+        verbose_name="Tamanho",
+    )
+    support = models.PositiveIntegerField(
+        verbose_name="Suporte",
+        help_text="Quantidade de sorteios que contêm todos os números do conjunto",
+    )
+    min_support = models.PositiveIntegerField(
+        verbose_name="Suporte mínimo",
+        help_text="Suporte mínimo usado na mineração",
+    )
+    computed_at_draw = models.PositiveIntegerField(
+        verbose_name="Último concurso",
+        help_text="Último concurso incluído na mineração",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Conjunto Frequente"
+        verbose_name_plural = "Conjuntos Frequentes"
+        ordering = ["-support"]
+        indexes = [
+            models.Index(fields=["lottery", "size", "-support"]),
+        ]
+
+    def __str__(self):
+        return f"{self.lottery} - {self.numbers} ({self.support})"
@@ -0,0 +1,40 @@
+"""
+DRF Serializers for stats app.
+"""
+
+from rest_framework import serializers
+
+from .models import DrawStatistics, RandomnessAudit
+from .services.calculator import EXTENDED_METRIC_NAMES, METRIC_NAMES
+
+
+class DrawStatisticsSerializer(serializers.ModelSerializer):
+    """Serializer for DrawStatistics model."""
+
+    draw_number = serializers.IntegerField(source="draw.number", read_only=True)
+    draw_date = serializers.DateField(source="draw.draw_date", read_only=True)
+
+    class Meta:
+        model = DrawStatistics
+        fields = [
+            "id",
+            "draw",
+            "draw_number",
+            "draw_date",
+            *METRIC_NAMES,
+            *EXTENDED_METRIC_NAMES,
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class RandomnessAuditSerializer(serializers.ModelSerializer):
+    """Serializer for RandomnessAudit model."""
+
+    lottery = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    tests = serializers.JSONField(source="results", read_only=True)
+
+    class Meta:
+        model = RandomnessAudit
+        fields = ["lottery", "draw_number", "draws_analyzed", "tests", "updated_at"]
+        read_only_fields = fields
@@ -2,7 +2,18 @@
 Stats services package.
 """
 
+from .audit import RandomnessAuditor
 from .calculator import StatsCalculator
+from .itemsets import FrequentItemsetMiner
 from .manager import StatsManager
+from .recompute import BulkStatsRecomputer
+from .theoretical import TheoreticalDistributions
 
-__all__ = ["StatsCalculator", "StatsManager"]
+__all__ = [
+    "BulkStatsRecomputer",
+    "FrequentItemsetMiner",
+    "RandomnessAuditor",
+    "StatsCalculator",
+    "StatsManager",
+    "TheoreticalDistributions",
+]
@@ -0,0 +1,334 @@
+"""
+Randomness audit service.
+
+Runs statistical tests over a lottery's full draw history, working on the
+draws x numbers incidence matrix. Running counters are kept with the
+results so new draws are folded in without rereading the history.
+"""
+
+import logging
+
+import numpy as np
+from scipy import stats as scipy_stats
+
+from apps.lotteries.models import Draw, Lottery
+from apps.stats.models import RandomnessAudit
+
+logger = logging.getLogger(__name__)
+
+
+class RandomnessAuditor:
+    """
+    Computes and stores the randomness audit of a lottery.
+
+    Tests:
+        - number_frequency: chi-square of how often each number was drawn
+        - pair_uniformity: chi-square of how often each pair was drawn together
+          (skipped above MAX_PAIR_NUMBERS numbers, where the pair counts
+          would not fit in memory)
+        - parity_runs: Wald-Wolfowitz runs test on draws with more evens than odds
+        - gap_distribution: KS test of the gaps between appearances of a number
+          against the geometric distribution
+
+    Usage:
+        audit = RandomnessAuditor().run(lottery)
+        audit.results["pair_uniformity"]["p_value"]
+    """
+
+    CHUNK_SIZE = 5000
+    MAX_CHUNK_CELLS = 5_000_000  # incidence matrix cells folded at once
+    MAX_PAIR_NUMBERS = 100
+    OUTLIER_Z = 3.0
+    TOP_PAIRS = 10
+
+    def run(self, lottery: Lottery, from_number: int | None = None) -> RandomnessAudit:
+        """
+        Update the audit of a lottery with the draws it has not seen yet.
+
+        The history is reread from the start when the stored counters do not
+        match the lottery rules, or when a draw at or before the last audited
+        contest changed.
+
+        Args:
+            lottery: Lottery to audit
+            from_number: Lowest contest number that changed, if known
+
+        Returns:
+            The saved RandomnessAudit
+        """
+        audit, _ = RandomnessAudit.objects.get_or_create(lottery=lottery)
+        size = lottery.max_number - lottery.min_number + 1
+
+        resume = (
+            audit.state.get("min_number") == lottery.min_number
+            and audit.state.get("size") == size
+            and (audit.state.get("pairs") is None) == (size > self.MAX_PAIR_NUMBERS)
+            and (from_number is None or from_number > audit.draw_number)
+        )
+        if resume:
+            state = self._load_state(audit.state)
+            last_number = audit.draw_number
+        else:
+            state = self._empty_state(size)
+            last_number = 0
+
+        queryset = (
+            Draw.objects.filter(lottery=lottery, number__gt=last_number)
+            .order_by("number")
+            .values_list("number", "numbers")
+        )
+
+        # Wide ranges fold fewer draws at a time to bound the incidence matrix
+        fold_size = max(1, min(self.CHUNK_SIZE, self.MAX_CHUNK_CELLS // size))
+        chunk = []
+        for row in queryset.iterator(chunk_size=self.CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) >= fold_size:
+                self._fold(state, [r[1] for r in chunk], lottery.min_number)
+                last_number = chunk[-1][0]
+                chunk = []
+
+        if chunk:
+            self._fold(state, [r[1] for r in chunk], lottery.min_number)
+            last_number = chunk[-1][0]
+
+        audit.draw_number = last_number
+        audit.draws_analyzed = state["draws"]
+        audit.results = self.evaluate(state, lottery.min_number)
+        audit.state = self._dump_state(state, lottery.min_number, size)
+        audit.save()
+
+        logger.info(
+            f"Randomness audit of {lottery.slug} at #{last_number} "
+            f"({'incremental' if resume else 'full'}, {state['draws']} draws)"
+        )
+        return audit
+
+    @staticmethod
+    def incidence_matrix(draws: list[list[int]], min_number: int, size: int) -> np.ndarray:
+        """
+        Build the draws x numbers boolean incidence matrix.
+
+        Numbers outside [min_number, min_number + size) are ignored and
+        repeated numbers count once.
+        """
+        matrix = np.zeros((len(draws), size), dtype=bool)
+        for row, numbers in enumerate(draws):
+            columns = np.asarray(numbers, dtype=np.int64) - min_number
+            matrix[row, columns[(columns >= 0) & (columns < size)]] = True
+        return matrix
+
+    def _empty_state(self, size: int) -> dict:
+        return {
+            "draws": 0,
+            "incidences": 0,
+            "pair_slots": 0,
+            "counts": np.zeros(size, dtype=np.int64),
+            "pairs": np.zeros((size, size), dtype=np.int64) if size <= self.MAX_PAIR_NUMBERS else None,
+            "last_seen": np.full(size, -1, dtype=np.int64),
+            "gaps": np.zeros(1, dtype=np.int64),
+            "parity": [0, 0, 0, -1],  # above, below, runs, last symbol
+        }
+
+    def _load_state(self, stored: dict) -> dict:
+        size = stored["size"]
+        pairs = None
+        if stored["pairs"] is not None:
+            pairs = np.zeros((size, size), dtype=np.int64)
+            pairs[np.triu_indices(size, 1)] = stored["pairs"]
+        return {
+            "draws": stored["draws"],
+            "incidences": stored["incidences"],
+            "pair_slots": stored["pair_slots"],
+            "counts": np.array(stored["counts"], dtype=np.int64),
+            "pairs": pairs,
+            "last_seen": np.array(stored["last_seen"], dtype=np.int64),
+            "gaps": np.array(stored["gaps"], dtype=np.int64),
+            "parity": list(stored["parity"]),
+        }
+
+    def _dump_state(self, state: dict, min_number: int, size: int) -> dict:
+        return {
+            "min_number": min_number,
+            "size": size,
+            "draws": state["draws"],
+            "incidences": state["incidences"],
+            "pair_slots": state["pair_slots"],
+            "counts": state["counts"].tolist(),
+            "pairs": state["pairs"][np.triu_indices(size, 1)].tolist() if state["pairs"] is not None else None,
+            "last_seen": state["last_seen"].tolist(),
+            "gaps": state["gaps"].tolist(),
+            "parity": state["parity"],
+        }
+
+    def _fold(self, state: dict, draws: list[list[int]], min_number: int):
+        """Add a block of consecutive draws to the counters."""
+        matrix = self.incidence_matrix(draws, min_number, len(state["counts"]))
+        if not len(matrix):
+            return
+
+        start = state["draws"]
+        as_int = matrix.astype(np.int64)
+        per_draw = as_int.sum(axis=1)
+
+        state["counts"] += as_int.sum(axis=0)
+        if state["pairs"] is not None:
+            state["pairs"] += np.triu(as_int.T @ as_int, 1)
+        state["incidences"] += int(per_draw.sum())
+        state["pair_slots"] += int((per_draw * (per_draw - 1)).sum())
+
+        # Gaps: appearances sorted by (number, draw index), including the
+        # last appearance of each number before this block
+        columns, rows = np.nonzero(matrix.T)
+        seen = np.flatnonzero(state["last_seen"] >= 0)
+        columns = np.concatenate((seen, columns))
+        rows = np.concatenate((state["last_seen"][seen], rows + start))
+        order = np.lexsort((rows, columns))
+        columns, rows = columns[order], rows[order]
+
+        gaps = np.diff(rows)[columns[1:] == columns[:-1]]
+        if len(gaps):
+            histogram = np.bincount(gaps)
+            if len(histogram) > len(state["gaps"]):
+                state["gaps"] = np.pad(state["gaps"], (0, len(histogram) - len(state["gaps"])))
+            state["gaps"][: len(histogram)] += histogram
+
+        appeared = matrix.any(axis=0)
+        last_row = len(matrix) - 1 - np.argmax(matrix[::-1, appeared], axis=0)
+        state["last_seen"][appeared] = start + last_row
+
+        # Parity runs: 1 for draws with more evens than odds, 0 for fewer (ties skipped)
+        even_columns = (np.arange(matrix.shape[1]) + min_number) % 2 == 0
+        evens = as_int[:, even_columns].sum(axis=1)
+        balance = 2 * evens - per_draw
+        symbols = (balance[balance != 0] > 0).astype(np.int64)
+        if len(symbols):
+            above, below, runs, last = state["parity"]
+            runs += int(np.count_nonzero(np.diff(symbols))) + int(symbols[0] != last)
+            state["parity"] = [
+                above + int(symbols.sum()),
+                below + int(len(symbols) - symbols.sum()),
+                runs,
+                int(symbols[-1]),
+            ]
+
+        state["draws"] += len(matrix)
+
+    def evaluate(self, state: dict, min_number: int) -> dict:
+        """Run every test on the accumulated counters."""
+        if not state["draws"] or not state["incidences"]:
+            return {}
+
+        return {
+            "number_frequency": self._number_frequency(state, min_number),
+            "pair_uniformity": self._pair_uniformity(state, min_number),
+            "parity_runs": self._parity_runs(state),
+            "gap_distribution": self._gap_distribution(state),
+        }
+
+    def _number_frequency(self, state: dict, min_number: int) -> dict:
+        counts = state["counts"]
+        size = len(counts)
+        expected = state["incidences"] / size
+
+        chi2 = float(((counts - expected) ** 2).sum() / expected)
+
+        # Each number appears in a draw with probability expected / draws
+        probability = expected / state["draws"]
+        std = np.sqrt(state["draws"] * probability * (1 - probability)) if probability < 1 else 0.0
+        z_scores = (counts - expected) / std if std else np.zeros(size)
+        outliers = np.flatnonzero(np.abs(z_scores) > self.OUTLIER_Z)
+
+        return {
+            "chi2": round(chi2, 4),
+            "dof": size - 1,
+            "p_value": self._chi2_p_value(chi2, size - 1),
+            "expected_count": round(expected, 2),
+            "outliers": [
+                {
+                    "number": int(min_number + i),
+                    "count": int(counts[i]),
+                    "z": round(float(z_scores[i]), 2),
+                }
+                for i in outliers
+            ],
+        }
+
+    def _pair_uniformity(self, state: dict, min_number: int) -> dict:
+        if state["pairs"] is None:
+            return {"chi2": None, "dof": 0, "p_value": None, "most_frequent": [], "skipped": True}
+
+        size = len(state["counts"])
+        rows, columns = np.triu_indices(size, 1)
+        counts = state["pairs"][rows, columns]
+        if not len(counts) or not state["pair_slots"]:
+            return {"chi2": None, "dof": 0, "p_value": None, "most_frequent": []}
+
+        # pair_slots counts ordered pairs: sum of m(m - 1) over draws
+        expected = state["pair_slots"] / (size * (size - 1))
+        chi2 = float(((counts - expected) ** 2).sum() / expected)
+        dof = len(counts) - 1
+        top = np.argsort(counts, kind="stable")[::-1][: self.TOP_PAIRS]
+
+        return {
+            "chi2": round(chi2, 4),
+            "dof": dof,
+            "p_value": self._chi2_p_value(chi2, dof),
+            "expected_count": round(expected, 2),
+            "most_frequent": [
+                {
+                    "numbers": [int(min_number + rows[i]), int(min_number + columns[i])],
+                    "count": int(counts[i]),
+                }
+                for i in top
+            ],
+        }
+
+    def _parity_runs(self, state: dict) -> dict:
+        above, below, runs, _ = state["parity"]
+        total = above + below
+        if not above or not below:
+            return {"runs": runs, "expected_runs": None, "z": None, "p_value": None}
+
+        expected = 2 * above * below / total + 1
+        variance = (expected - 1) * (expected - 2) / (total - 1)
+        z = (runs - expected) / np.sqrt(variance) if variance > 0 else 0.0
+
+        return {
+            "runs": runs,
+            "expected_runs": round(expected, 2),
+            "z": round(float(z), 4),
+            "p_value": round(float(2 * scipy_stats.norm.sf(abs(z))), 6),
+        }
+
+    def _gap_distribution(self, state: dict) -> dict:
+        """
+        KS distance between observed gaps and the geometric distribution.
+
+        Gaps still open at the end of the history are not counted, and the
+        KS p-value is conservative for a discrete distribution.
+        """
+        histogram = state["gaps"]
+        total = int(histogram.sum())
+        if not total:
+            return {"gaps": 0, "ks_statistic": None, "p_value": None}
+
+        probability = state["incidences"] / (state["draws"] * len(state["counts"]))
+        lengths = np.arange(len(histogram))
+        empirical = np.cumsum(histogram) / total
+        geometric = 1 - (1 - probability) ** lengths
+        statistic = float(np.abs(empirical - geometric)[1:].max())
+
+        return {
+            "gaps": total,
+            "mean_gap": round(float((lengths * histogram).sum() / total), 4),
+            "expected_mean_gap": round(1 / probability, 4),
+            "ks_statistic": round(statistic, 6),
+            "p_value": round(float(scipy_stats.kstwo.sf(statistic, total)), 6),
+        }
+
+    @staticmethod
+    def _chi2_p_value(chi2: float, dof: int) -> float | None:
+        if dof < 1:
+            return None
+        return round(float(scipy_stats.chi2.sf(chi2, dof)), 6)
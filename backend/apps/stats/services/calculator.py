@@ -4,11 +4,52 @@ Metrics calculator service.
 Pure logic for calculating lottery number metrics.
 """
 
+import numpy as np
+
+METRIC_NAMES = (
+    "sum_value",
+    "even_count",
+    "odd_count",
+    "range_value",
+    "prime_count",
+    "consecutive_count",
+    "repeated_from_previous",
+)
+
+EXTENDED_METRIC_NAMES = (
+    "decade_distribution",
+    "row_distribution",
+    "column_distribution",
+    "max_consecutive_run",
+    "multiples_of_3_count",
+    "fibonacci_count",
+    "mean_gap",
+    "low_half_ratio",
+)
+
+# Public metric names accepted by the API, mapped to DrawStatistics fields
+PUBLIC_METRICS = {
+    "sum": "sum_value",
+    "evens": "even_count",
+    "odds": "odd_count",
+    "range": "range_value",
+    "primes": "prime_count",
+    "consecutive": "consecutive_count",
+    "repeated": "repeated_from_previous",
+    "max_run": "max_consecutive_run",
+    "multiples_of_3": "multiples_of_3_count",
+    "fibonacci": "fibonacci_count",
+    "mean_gap": "mean_gap",
+    "low_half_ratio": "low_half_ratio",
+}
 
 
 class StatsCalculator:
     """Calculates metrics for lottery draws."""
 
+    # Lotteries with more numbers than this have no slip grid (e.g. Federal)
+    MAX_GRID_NUMBERS = 100
+
     @staticmethod
     def calculate_metrics(numbers: list[int], previous_numbers: list[int] | None = None) -> dict:
         """
@@ -44,6 +85,158 @@ class StatsCalculator:
             "repeated_from_previous": StatsCalculator.count_repeated(numbers, previous_numbers),
         }
 
+    @staticmethod
+    def calculate_metrics_batch(
+        draws: np.ndarray, previous_draws: np.ndarray | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Calculate all metrics for many draws at once.
+
+        Args:
+            draws: 2-D integer array, one draw per row
+            previous_draws: Array of the same shape with the previous draw of
+                each row, for the repeat count. Rows filled with -1 have no
+                previous draw.
+
+        Returns:
+            Dict mapping each metric name to a column with one value per draw
+        """
+        draws = np.asarray(draws, dtype=np.int64)
+        if draws.ndim != 2:
+            raise ValueError("draws must be a 2-D array (one draw per row).")
+
+        rows, width = draws.shape
+        if rows == 0 or width == 0:
+            return {name: np.zeros(rows, dtype=np.int64) for name in METRIC_NAMES}
+
+        sorted_draws = np.sort(draws, axis=1)
+        evens = np.count_nonzero(draws % 2 == 0, axis=1)
+
+        if previous_draws is None:
+            repeated = np.zeros(rows, dtype=np.int64)
+        else:
+            previous_draws = np.asarray(previous_draws, dtype=np.int64)
+            # Compare every number with every number of the previous draw
+            matches = draws[:, :, None] == previous_draws[:, None, :]
+            repeated = np.count_nonzero(matches.any(axis=2), axis=1)
+
+        return {
+            "sum_value": draws.sum(axis=1),
+            "even_count": evens,
+            "odd_count": width - evens,
+            "range_value": sorted_draws[:, -1] - sorted_draws[:, 0],
+            "prime_count": StatsCalculator.prime_table(int(draws.max()))[draws].sum(axis=1),
+            "consecutive_count": np.count_nonzero(np.diff(sorted_draws, axis=1) == 1, axis=1),
+            "repeated_from_previous": repeated,
+        }
+
+    @staticmethod
+    def calculate_extended_metrics_batch(
+        draws: np.ndarray,
+        min_number: int,
+        max_number: int,
+        slip_columns: int = 10,
+    ) -> dict[str, np.ndarray]:
+        """
+        Calculate the extended metrics for many draws of one lottery at once.
+
+        Args:
+            draws: 2-D integer array, one draw per row
+            min_number: Smallest number of the lottery
+            max_number: Largest number of the lottery
+            slip_columns: Columns of the lottery slip (betting card) grid
+
+        Returns:
+            Dict mapping each metric name to a column with one value per draw.
+            Distributions are 2-D (one row of bucket counts per draw) and are
+            empty for lotteries too large to have a slip grid (e.g. Federal).
+        """
+        draws = np.asarray(draws, dtype=np.int64)
+        if draws.ndim != 2:
+            raise ValueError("draws must be a 2-D array (one draw per row).")
+
+        rows, width = draws.shape
+        if rows == 0 or width == 0:
+            return {
+                "decade_distribution": np.zeros((rows, 0), dtype=np.int64),
+                "row_distribution": np.zeros((rows, 0), dtype=np.int64),
+                "column_distribution": np.zeros((rows, 0), dtype=np.int64),
+                "max_consecutive_run": np.zeros(rows, dtype=np.int64),
+                "multiples_of_3_count": np.zeros(rows, dtype=np.int64),
+                "fibonacci_count": np.zeros(rows, dtype=np.int64),
+                "mean_gap": np.zeros(rows),
+                "low_half_ratio": np.zeros(rows),
+            }
+
+        sorted_draws = np.sort(draws, axis=1)
+        steps = np.diff(sorted_draws, axis=1)
+
+        # Longest run of +1 steps, scanning columns (vectorized over rows)
+        current = np.zeros(rows, dtype=np.int64)
+        longest = np.zeros(rows, dtype=np.int64)
+        for column in range(width - 1):
+            current = np.where(steps[:, column] == 1, current + 1, 0)
+            longest = np.maximum(longest, current)
+
+        span = max_number - min_number + 1
+        if span <= StatsCalculator.MAX_GRID_NUMBERS:
+            offsets = draws - min_number
+            decades = StatsCalculator._bucket_counts(draws // 10, max_number // 10 + 1)
+            slip_rows = StatsCalculator._bucket_counts(
+                offsets // slip_columns, (span - 1) // slip_columns + 1
+            )
+            slip_cols = StatsCalculator._bucket_counts(offsets % slip_columns, slip_columns)
+        else:
+            decades = slip_rows = slip_cols = np.zeros((rows, 0), dtype=np.int64)
+
+        return {
+            "decade_distribution": decades,
+            "row_distribution": slip_rows,
+            "column_distribution": slip_cols,
+            "max_consecutive_run": longest + 1,
+            "multiples_of_3_count": np.count_nonzero(draws % 3 == 0, axis=1),
+            "fibonacci_count": StatsCalculator.fibonacci_table(int(draws.max()))[draws].sum(axis=1),
+            "mean_gap": steps.mean(axis=1) if width > 1 else np.zeros(rows),
+            "low_half_ratio": np.count_nonzero(draws < min_number + span / 2, axis=1) / width,
+        }
+
+    @staticmethod
+    def _bucket_counts(buckets: np.ndarray, size: int) -> np.ndarray:
+        """Count bucket occurrences per row: (rows, k) bucket ids -> (rows, size) counts."""
+        rows = buckets.shape[0]
+        flat = (np.arange(rows)[:, None] * size + buckets).ravel()
+        return np.bincount(flat, minlength=rows * size).reshape(rows, size)
+
+    @staticmethod
+    def fibonacci_table(max_number: int) -> np.ndarray:
+        """
+        Build a Fibonacci membership lookup table.
+
+        Returns:
+            Boolean array where table[n] is True if n is in 1, 2, 3, 5, 8, ...
+        """
+        table = np.zeros(max(max_number, 1) + 1, dtype=bool)
+        a, b = 1, 2
+        while a <= max_number:
+            table[a] = True
+            a, b = b, a + b
+        return table
+
+    @staticmethod
+    def prime_table(max_number: int) -> np.ndarray:
+        """
+        Build a primality lookup table (sieve of Eratosthenes).
+
+        Returns:
+            Boolean array where table[n] is True if n is prime, for 0 <= n <= max_number
+        """
+        table = np.ones(max(max_number, 1) + 1, dtype=bool)
+        table[:2] = False
+        for n in range(2, int(max_number**0.5) + 1):
+            if table[n]:
+                table[n * n :: n] = False
+        return table
+
     @staticmethod
     def is_prime(n: int) -> bool:
         """Check if a number is prime."""
@@ -0,0 +1,123 @@
+"""
+Cross-lottery dashboard service.
+
+Builds the home page summary of every active lottery and caches it as
+rendered JSON bytes per catalog version, so serving it is a cache read.
+"""
+
+import json
+from collections import Counter
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.lotteries.models import Draw, Lottery
+from apps.lotteries.serializers import DrawListSerializer, LotteryMinimalSerializer
+from apps.lotteries.services import get_catalog_version
+
+from .manager import StatsManager
+
+DASHBOARD_TTL = 60 * 60 * 24  # 1 day; a new catalog version makes entries unreachable
+HOT_COLD_WINDOW = 50
+HOT_COLD_SIZE = 5
+DELAY_LEADERS_SIZE = 5
+
+
+def get_dashboard_bytes() -> bytes:
+    """Get the rendered dashboard, building it on a cache miss."""
+    payload = cache.get(_cache_key())
+    if payload is None:
+        payload = refresh_dashboard()
+    return payload
+
+
+def refresh_dashboard() -> bytes:
+    """Render the dashboard and cache it for the current catalog version."""
+    payload = json.dumps(build_dashboard(), cls=DjangoJSONEncoder).encode()
+    cache.set(_cache_key(), payload, DASHBOARD_TTL)
+    return payload
+
+
+def build_dashboard() -> dict:
+    """
+    Build the dashboard of all active lotteries.
+
+    Latest draws come from a single DISTINCT ON (lottery_id) query; number
+    frequencies and delays come from the (warmed) aggregated stats cache.
+    """
+    lotteries = list(Lottery.objects.filter(is_active=True).order_by("name"))
+    latest_draws = {
+        draw.lottery_id: draw
+        for draw in Draw.objects.filter(lottery__is_active=True)
+        .order_by("lottery_id", "-number")
+        .distinct("lottery_id")
+        .defer("raw_data")
+    }
+
+    manager = StatsManager()
+    entries = []
+    for lottery in lotteries:
+        draw = latest_draws.get(lottery.id)
+        if draw is None:
+            continue
+
+        recent = manager.get_aggregated_stats(lottery.slug, window=HOT_COLD_WINDOW)
+        history = manager.get_aggregated_stats(lottery.slug)
+
+        counts = Counter({item["number"]: item["count"] for item in recent.get("number_frequencies", [])})
+        hot, cold = hot_and_cold(counts, lottery.min_number, lottery.max_number)
+
+        entries.append({
+            "lottery": LotteryMinimalSerializer(lottery).data,
+            "latest_draw": DrawListSerializer(draw).data,
+            "next_draw": {
+                "number": draw.next_draw_number,
+                "date": draw.next_draw_date,
+                "estimate": draw.next_draw_estimate,
+            },
+            "hot_numbers": [{"number": number, "count": count} for number, count in hot],
+            "cold_numbers": [{"number": number, "count": count} for number, count in cold],
+            "delay_leaders": history.get("number_delays", [])[:DELAY_LEADERS_SIZE],
+        })
+
+    return {"hot_cold_window": HOT_COLD_WINDOW, "lotteries": entries}
+
+
+def hot_and_cold(
+    counts: Counter, min_number: int, max_number: int, size: int = HOT_COLD_SIZE
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Rank the most and least drawn numbers of a range.
+
+    Only the numbers that were drawn are counted: the numbers never drawn
+    are found by walking the range from either end, so wide ranges
+    (Federal: 100k numbers) cost no more than the drawn ones.
+
+    Args:
+        counts: Times each drawn number came out
+        min_number: Lowest number of the lottery
+        max_number: Highest number of the lottery
+        size: Numbers in each list
+
+    Returns:
+        Tuple of (hot, cold) lists of (number, count); hot by count then
+        number, cold from the least drawn, highest numbers first
+    """
+    ranked = sorted(
+        ((number, count) for number, count in counts.items() if count),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+    def undrawn(numbers: range) -> list[tuple[int, int]]:
+        return [(number, 0) for number in islice((n for n in numbers if not counts[n]), size)]
+
+    hot = ranked[:size]
+    hot += undrawn(range(min_number, max_number + 1))[: size - len(hot)]
+    cold = undrawn(range(max_number, min_number - 1, -1))
+    cold += ranked[::-1][: size - len(cold)]
+    return hot, cold
+
+
+def _cache_key() -> str:
+    return f"stats:dashboard:{get_catalog_version()}"
@@ -0,0 +1,206 @@
+"""
+Frequent-itemset mining over the draw history.
+
+Finds sets of numbers drawn together in at least N draws with Eclat: every
+number is a bitset over the draws (a Python int), and the support of a set
+is the popcount of the AND of its members' bitsets.
+
+At most FrequentItemsetMiner.MAX_RESULTS sets are kept; payloads flag
+with "truncated" when that cap was reached and rarer sets may be missing.
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+from itertools import islice
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.lotteries.models import Draw, Lottery
+from apps.stats.models import FrequentItemset
+
+logger = logging.getLogger(__name__)
+
+ITEMSETS_CACHE_TTL = 60 * 60 * 24 * 7  # rebuilt from the table on a miss
+
+
+class FrequentItemsetMiner:
+    """
+    Bounded-memory Eclat miner.
+
+    The search is depth first, so only one bitset per level is alive at a
+    time. At most max_results sets are kept (highest support first); once
+    that many are found, their lowest support becomes the pruning threshold.
+    The search space splits by first number, so branches can be mined in
+    parallel and merged with merge().
+
+    Usage:
+        miner = FrequentItemsetMiner(min_support=5)
+        bitsets = miner.bitsets(draws, lottery.min_number, lottery.max_number)
+        itemsets = miner.mine(bitsets)  # [((numbers...), support), ...]
+    """
+
+    MIN_SIZE = 2
+    MAX_SIZE = 5
+    MAX_RESULTS = 5000
+
+    def __init__(self, min_support: int, max_size: int = MAX_SIZE, max_results: int = MAX_RESULTS):
+        if min_support < 1:
+            raise ValueError("Minimum support must be a positive integer.")
+        self.min_support = min_support
+        self.max_size = max(self.MIN_SIZE, min(max_size, self.MAX_SIZE))
+        self.max_results = max_results
+
+    @staticmethod
+    def bitsets(draws: list[list[int]], min_number: int, max_number: int) -> dict[int, int]:
+        """
+        Build one bitset per drawn number, straight from the draw lists.
+
+        Numbers never drawn get no entry, so memory follows the draws and not
+        the range (Federal: 100k possible numbers).
+
+        Returns:
+            Dict of number -> int whose bit i is set if draw i contains it
+        """
+        bits: defaultdict[int, int] = defaultdict(int)
+        for row, numbers in enumerate(draws):
+            for number in set(numbers):
+                if min_number <= number <= max_number:
+                    bits[number] |= 1 << row
+        return dict(bits)
+
+    def mine(self, bitsets: dict[int, int], first_numbers: list[int] | None = None) -> list[tuple]:
+        """
+        Mine the frequent sets, optionally only those starting with given numbers.
+
+        Args:
+            bitsets: Output of bitsets()
+            first_numbers: Smallest number of the sets to mine (default: all)
+
+        Returns:
+            (numbers tuple, support) pairs, highest support first
+        """
+        self._heap: list[tuple[int, tuple]] = []
+        self._threshold = self.min_support
+
+        # A set is never more frequent than its members (Apriori pruning)
+        items = [
+            (number, bits)
+            for number, bits in sorted(bitsets.items())
+            if bits.bit_count() >= self.min_support
+        ]
+        firsts = None if first_numbers is None else set(first_numbers)
+
+        for index, (number, bits) in enumerate(items):
+            if firsts is None or number in firsts:
+                self._extend((number,), bits, items[index + 1 :])
+
+        return sorted(((itemset, support) for support, itemset in self._heap), key=_by_support)
+
+    def merge(self, *partials: list[tuple]) -> list[tuple]:
+        """Merge the results of several branches, keeping the best max_results."""
+        merged = heapq.merge(*(sorted(p, key=_by_support) for p in partials), key=_by_support)
+        return [(tuple(itemset), support) for itemset, support in islice(merged, self.max_results)]
+
+    def _extend(self, prefix: tuple, bits: int, candidates: list[tuple[int, int]]):
+        for index, (number, number_bits) in enumerate(candidates):
+            joined = bits & number_bits
+            support = joined.bit_count()
+            if support < self._threshold:
+                continue
+
+            itemset = (*prefix, number)
+            self._record(itemset, support)
+            if len(itemset) < self.max_size:
+                self._extend(itemset, joined, candidates[index + 1 :])
+
+    def _record(self, itemset: tuple, support: int):
+        if len(self._heap) < self.max_results:
+            heapq.heappush(self._heap, (support, itemset))
+        else:
+            heapq.heappushpop(self._heap, (support, itemset))
+
+        if len(self._heap) >= self.max_results:
+            self._threshold = max(self._threshold, self._heap[0][0])
+
+
+def _by_support(item: tuple) -> tuple:
+    itemset, support = item
+    return (-support, len(itemset), tuple(itemset))
+
+
+def load_draw_numbers(lottery: Lottery, up_to: int | None = None) -> list[list[int]]:
+    """Get the numbers of every draw of a lottery, up to a contest number."""
+    queryset = Draw.objects.filter(lottery=lottery)
+    if up_to is not None:
+        queryset = queryset.filter(number__lte=up_to)
+    return list(queryset.order_by("number").values_list("numbers", flat=True))
+
+
+def store_frequent_itemsets(
+    lottery: Lottery, itemsets: list[tuple], min_support: int, draw_number: int
+) -> dict:
+    """
+    Replace the stored itemsets of a lottery and refresh its cached payload.
+
+    Returns:
+        The cached payload
+    """
+    with transaction.atomic():
+        FrequentItemset.objects.filter(lottery=lottery).delete()
+        FrequentItemset.objects.bulk_create(
+            [
+                FrequentItemset(
+                    lottery=lottery,
+                    numbers=list(numbers),
+                    size=len(numbers),
+                    support=support,
+                    min_support=min_support,
+                    computed_at_draw=draw_number,
+                )
+                for numbers, support in itemsets
+            ],
+            batch_size=1000,
+        )
+
+    logger.info(f"Stored {len(itemsets)} frequent itemsets for {lottery.slug} (support >= {min_support})")
+    return _cache_payload(lottery.slug, min_support, draw_number, itemsets)
+
+
+def get_frequent_itemsets(lottery_slug: str) -> dict:
+    """
+    Get the mined itemsets of a lottery, from cache or from the results table.
+
+    Returns:
+        Dict with min_support, computed_at_draw, max_results, truncated
+        and the itemsets (highest support first); itemsets is empty if the
+        lottery was never mined
+    """
+    payload = cache.get(_cache_key(lottery_slug))
+    if payload is not None:
+        return payload
+
+    rows = list(
+        FrequentItemset.objects.filter(lottery__slug=lottery_slug)
+        .order_by("-support", "size")
+        .values_list("numbers", "support", "min_support", "computed_at_draw")
+    )
+    min_support, draw_number = (rows[0][2], rows[0][3]) if rows else (None, None)
+    return _cache_payload(lottery_slug, min_support, draw_number, [(row[0], row[1]) for row in rows])
+
+
+def _cache_payload(lottery_slug: str, min_support, draw_number, itemsets: list[tuple]) -> dict:
+    payload = {
+        "min_support": min_support,
+        "computed_at_draw": draw_number,
+        "max_results": FrequentItemsetMiner.MAX_RESULTS,
+        "truncated": len(itemsets) >= FrequentItemsetMiner.MAX_RESULTS,
+        "itemsets": [{"numbers": list(numbers), "support": support} for numbers, support in itemsets],
+    }
+    cache.set(_cache_key(lottery_slug), payload, ITEMSETS_CACHE_TTL)
+    return payload
+
+
+def _cache_key(lottery_slug: str) -> str:
+    return f"stats:{lottery_slug}:itemsets"
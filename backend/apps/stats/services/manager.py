@@ -4,18 +4,46 @@ Stats manager service.
 Manages aggregation and caching of lottery statistics.
 """
 
+import time
 from collections import Counter
+from collections.abc import Callable
 from datetime import date
 
+import numpy as np
 from django.core.cache import cache
+from django.db import connection, models
 
-from apps.lotteries.models import Draw
+from apps.lotteries.models import Draw, Lottery
+from apps.lotteries.services import (
+    LotteryVersion,
+    get_latest_draw_payload,
+    get_lottery_version,
+    next_lottery_version,
+    publish_lottery_version,
+)
+from apps.stats.models import DrawStatistics
+
+from .calculator import PUBLIC_METRICS
+from .theoretical import COLUMN_LOTTERIES, THEORETICAL_METRICS, TheoreticalDistributions
 
 
 class StatsManager:
-    """Manages retrieval and caching of stats."""
+    """
+    Manages retrieval and caching of stats.
+
+    Cache entries are stamped with the lottery version (latest draw number)
+    they were computed at. Expired or outdated entries keep being served
+    while a single background task recomputes them, so an expiry never
+    makes every concurrent request recompute the same window.
+    """
 
-    CACHE_TTL = 60 * 60  # 1 hour
+    CACHE_TTL = 60 * 60  # 1 hour until an entry is considered stale
+    STALE_TTL = 60 * 60 * 24  # stale entries are still served for 1 day
+    LOCK_TTL = 60  # max time a recomputation may hold the lock
+    LOCK_WAIT = 5.0  # seconds a cache miss waits for a concurrent computation
+    LOCK_POLL_INTERVAL = 0.1
+    WARM_WINDOWS = (10, 25, 50, 100, 500, None)  # None = all draws
+    COLUMN_LOTTERIES = COLUMN_LOTTERIES
 
     def get_aggregated_stats(
         self,
@@ -36,33 +64,332 @@ class StatsManager:
         Returns:
             Dict containing frequency maps and metric averages
         """
-        # Generate cache key
+        return self.fetch_aggregated_stats(lottery_slug, window, start_date, end_date)[0]
+
+    def fetch_aggregated_stats(
+        self,
+        lottery_slug: str,
+        window: int | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> tuple[dict, bool]:
+        """
+        Get aggregated statistics and whether they match the current version.
+
+        Same lookup as get_aggregated_stats; the flag is False when a stale
+        entry computed at an older version is served while it is refreshed.
+
+        Returns:
+            Tuple of (stats, current)
+        """
         cache_key = self._generate_cache_key(lottery_slug, window, start_date, end_date)
+        version = get_lottery_version(lottery_slug)
 
-        # Try to get from cache
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
+        entry = cache.get(cache_key)
+        if entry is not None:
+            if not self._is_fresh(entry, version):
+                # Serve stale data while a single worker refreshes it
+                self._schedule_refresh(lottery_slug, window, start_date, end_date)
+            return entry["data"], entry["version"] == version.token
 
-        # Fetch data
-        queryset = self._filter_draws(lottery_slug, window, start_date, end_date)
-        if not queryset.exists():
-            return {}
+        return self._compute_single_flight(
+            cache_key, lottery_slug, window, start_date, end_date, version
+        ), True
+
+    def refresh_aggregated_stats(
+        self,
+        lottery_slug: str,
+        window: int | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> dict:
+        """
+        Recompute and store aggregated statistics, releasing the refresh lock.
 
-        # Calculate aggregations
-        stats = self._calculate_aggregations(queryset)
+        Called by the background refresh task.
+        """
+        cache_key = self._generate_cache_key(lottery_slug, window, start_date, end_date)
+        try:
+            return self._compute_and_store(
+                cache_key,
+                lottery_slug,
+                window,
+                start_date,
+                end_date,
+                get_lottery_version(lottery_slug),
+            )
+        finally:
+            cache.delete(self._lock_key(cache_key))
 
-        # Cache result
-        cache.set(cache_key, stats, self.CACHE_TTL)
+    def get_timeseries(self, lottery_slug: str, metric: str, window: int) -> dict:
+        """
+        Get rolling mean and standard deviation of a metric across all contests.
 
-        return stats
+        Computed in one vectorized pass over cumulative sums and cached per
+        lottery version.
+
+        Args:
+            lottery_slug: Lottery identifier
+            metric: Public metric name (see PUBLIC_METRICS)
+            window: Rolling window size, in draws
+
+        Returns:
+            Dict with the contest numbers closing each window and the rolling
+            mean/std columns aligned with them
+
+        Raises:
+            ValueError: If the metric is unknown or the window is not positive
+        """
+        if metric not in PUBLIC_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if window < 1:
+            raise ValueError("Window must be a positive integer.")
+
+        def compute(version: LotteryVersion) -> dict:
+            rows = list(
+                DrawStatistics.objects.filter(lottery__slug=lottery_slug)
+                .order_by("draw__number")
+                .values_list("draw__number", PUBLIC_METRICS[metric])
+            )
+            contests = np.array([row[0] for row in rows], dtype=np.int64)
+            values = np.array([row[1] for row in rows], dtype=np.float64)
+
+            mean, std = self._rolling_mean_std(values, window)
+            return {
+                "metric": metric,
+                "window": window,
+                "computed_at_draw": version.draw_number,
+                "contests": contests[window - 1 :].tolist(),
+                "rolling_mean": np.round(mean, 4).tolist(),
+                "rolling_std": np.round(std, 4).tolist(),
+            }
+
+        return self.get_versioned(lottery_slug, f"ts:{metric}:w{window}", compute)
+
+    def get_distribution(self, lottery_slug: str, metric: str, bins: int = 20) -> dict:
+        """
+        Get the histogram and percentiles of a per-draw metric.
+
+        Computed in PostgreSQL (width_bucket, percentile_cont) over
+        DrawStatistics and cached per lottery version. Metrics with an
+        exact theoretical distribution also get the expected count of
+        each histogram bucket.
+
+        Args:
+            lottery_slug: Lottery identifier
+            metric: Public metric name (see PUBLIC_METRICS)
+            bins: Maximum number of histogram buckets
+
+        Raises:
+            ValueError: If the metric is unknown or bins is not positive
+        """
+        if metric not in PUBLIC_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if bins < 1:
+            raise ValueError("Bins must be a positive integer.")
+
+        def compute(version: LotteryVersion) -> dict:
+            theoretical = None
+            if metric in THEORETICAL_METRICS:
+                lottery = Lottery.objects.get(slug=lottery_slug)
+                table = TheoreticalDistributions().get(lottery)[metric]
+                if table[1]:
+                    theoretical = TheoreticalDistributions.probabilities(table)
+
+            return {
+                "metric": metric,
+                "computed_at_draw": version.draw_number,
+                **self._query_distribution(lottery_slug, PUBLIC_METRICS[metric], bins, theoretical),
+            }
+
+        return self.get_versioned(lottery_slug, f"dist:{metric}:b{bins}", compute)
+
+    def get_positional(self, lottery_slug: str) -> dict:
+        """
+        Get how often each number came out at each position.
+
+        Column lotteries (Super Sete) count digit x column from the numbers,
+        which are stored in column order; other lotteries count number x
+        draw position from numbers_draw_order. Cached per lottery version.
+
+        Args:
+            lottery_slug: Lottery identifier
+
+        Returns:
+            Dict with the positions x values count matrix and the most
+            frequent value of each position
+        """
+
+        def compute(version: LotteryVersion) -> dict:
+            lottery = Lottery.objects.get(slug=lottery_slug)
+            mode = "columns" if lottery_slug in self.COLUMN_LOTTERIES else "draw_order"
+            field = "numbers" if mode == "columns" else "numbers_draw_order"
+
+            rows = [
+                numbers
+                for numbers in Draw.objects.filter(lottery=lottery, **{f"{field}__isnull": False})
+                .values_list(field, flat=True)
+                .iterator()
+                if len(numbers) == lottery.numbers_count
+            ]
+            matrix = self._positional_matrix(
+                np.array(rows, dtype=np.int64).reshape(-1, lottery.numbers_count),
+                lottery.min_number,
+                lottery.max_number,
+            )
+            values = np.arange(lottery.min_number, lottery.max_number + 1)
+
+            return {
+                "mode": mode,
+                "computed_at_draw": version.draw_number,
+                "draws": len(rows),
+                "values": values.tolist(),
+                "expected_count": round(len(rows) / len(values), 4) if len(values) else 0,
+                "matrix": matrix.tolist(),
+                "most_frequent": [
+                    {
+                        "position": position + 1,
+                        "number": int(values[counts.argmax()]),
+                        "count": int(counts.max()),
+                    }
+                    for position, counts in enumerate(matrix)
+                    if len(rows)
+                ],
+            }
+
+        return self.get_versioned(lottery_slug, "positional", compute)
+
+    def get_versioned(
+        self,
+        lottery_slug: str,
+        name: str,
+        compute: Callable[[LotteryVersion], dict],
+    ) -> dict:
+        """
+        Get a payload cached for the current lottery version.
+
+        Args:
+            lottery_slug: Lottery identifier
+            name: Payload name, unique within the lottery
+            compute: Builds the payload for a version on a cache miss
+        """
+        version = get_lottery_version(lottery_slug)
+        cache_key = f"stats:{lottery_slug}:{name}:{version.token}"
+
+        data = cache.get(cache_key)
+        if data is None:
+            data = compute(version)
+            cache.set(cache_key, data, self.STALE_TTL)
+        return data
+
+    def warm_cache(self, lottery_slug: str) -> LotteryVersion:
+        """
+        Precompute the common payloads of a lottery, then publish its new version.
+
+        Entries are stored stamped with the upcoming version before it is
+        published, so the first readers after a sync already hit a warm cache.
+
+        Args:
+            lottery_slug: Lottery identifier
+
+        Returns:
+            The published LotteryVersion
+        """
+        version = next_lottery_version(lottery_slug)
+
+        for window in self.WARM_WINDOWS:
+            cache_key = self._generate_cache_key(lottery_slug, window, None, None)
+            self._compute_and_store(cache_key, lottery_slug, window, None, None, version)
+
+        get_latest_draw_payload(lottery_slug, version)
+
+        return publish_lottery_version(lottery_slug, version)
 
     def invalidate_cache(self, lottery_slug: str):
-        """Invalidate all stats caches for a lottery."""
-        # Note: Redis scanning/pattern matching is expensive.
-        # For simplicity, we mostly rely on TTL or explicit keys if known.
-        # Alternatively, we could version the keys.
-        cache.delete_pattern(f"stats:{lottery_slug}:*")
+        """
+        Invalidate all stats caches for a lottery.
+
+        Publishes a new lottery version instead of deleting keys: existing
+        entries become stale and are refreshed on their next read.
+        """
+        publish_lottery_version(lottery_slug)
+
+    def _is_fresh(self, entry: dict, version: LotteryVersion) -> bool:
+        """Check if a cache entry matches the current version and is not expired."""
+        return entry["version"] == version.token and entry["expires_at"] > time.time()
+
+    def _schedule_refresh(
+        self, slug: str, window: int | None, start: date | None, end: date | None
+    ):
+        """Enqueue a background refresh unless one is already running."""
+        from apps.stats.tasks import refresh_aggregated_stats
+
+        cache_key = self._generate_cache_key(slug, window, start, end)
+        if not cache.add(self._lock_key(cache_key), 1, self.LOCK_TTL):
+            return
+
+        refresh_aggregated_stats.delay(
+            slug,
+            window,
+            start.isoformat() if start else None,
+            end.isoformat() if end else None,
+        )
+
+    def _compute_single_flight(
+        self,
+        cache_key: str,
+        slug: str,
+        window: int | None,
+        start: date | None,
+        end: date | None,
+        version: LotteryVersion,
+    ) -> dict:
+        """Compute a missing entry, letting only one caller hit the database."""
+        lock_key = self._lock_key(cache_key)
+
+        if cache.add(lock_key, 1, self.LOCK_TTL):
+            try:
+                return self._compute_and_store(cache_key, slug, window, start, end, version)
+            finally:
+                cache.delete(lock_key)
+
+        # Another caller is computing this entry: wait for it
+        deadline = time.monotonic() + self.LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return entry["data"]
+
+        # The other computation is taking too long, compute without storing
+        queryset = self._filter_draws(slug, window, start, end)
+        return self._calculate_aggregations(queryset, version)
+
+    def _compute_and_store(
+        self,
+        cache_key: str,
+        slug: str,
+        window: int | None,
+        start: date | None,
+        end: date | None,
+        version: LotteryVersion,
+    ) -> dict:
+        """Calculate aggregations and store them stamped with the version."""
+        queryset = self._filter_draws(slug, window, start, end)
+        if not queryset.exists():
+            return {}
+
+        stats = self._calculate_aggregations(queryset, version)
+        cache.set(
+            cache_key,
+            {
+                "data": stats,
+                "version": version.token,
+                "expires_at": time.time() + self.CACHE_TTL,
+            },
+            self.STALE_TTL,
+        )
+        return stats
 
     def _generate_cache_key(self, slug: str, window: int | None, start: date | None, end: date | None) -> str:
         """Generate unique cache key."""
@@ -75,6 +402,137 @@ class StatsManager:
             key_parts.append(f"e{end.isoformat()}")
         return ":".join(key_parts)
 
+    def _lock_key(self, cache_key: str) -> str:
+        return f"{cache_key}:lock"
+
+    def _query_distribution(
+        self,
+        slug: str,
+        field: str,
+        bins: int,
+        theoretical: tuple[int, np.ndarray] | None = None,
+    ) -> dict:
+        """
+        Run the summary and histogram queries for a DrawStatistics column.
+
+        Args:
+            theoretical: Optional (offset, probabilities) of an integer metric,
+                used to add the expected count of each bucket
+        """
+        column = connection.ops.quote_name(field)
+        values_sql = f"""
+            SELECT ds.{column} AS v
+            FROM {DrawStatistics._meta.db_table} ds
+            JOIN {Lottery._meta.db_table} l ON l.id = ds.lottery_id
+            WHERE l.slug = %s
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH s AS ({values_sql})
+                SELECT count(*), min(v), max(v), avg(v), stddev_pop(v),
+                       percentile_cont(ARRAY[0.05, 0.25, 0.5, 0.75, 0.95])
+                           WITHIN GROUP (ORDER BY v)
+                FROM s
+                """,
+                [slug],
+            )
+            total, low, high, mean, std, percentiles = cursor.fetchone()
+
+            if not total:
+                return {"count": 0, "histogram": [], "percentiles": {}}
+
+            # Integer metrics get buckets aligned on whole values
+            is_integer = not isinstance(DrawStatistics._meta.get_field(field), models.FloatField)
+            upper = high + 1 if is_integer else high
+            buckets = min(bins, int(high - low) + 1) if is_integer else bins
+            if upper == low:
+                upper = low + 1
+            width = (upper - low) / buckets
+
+            # width_bucket puts v == upper in bucket n + 1: fold it into the last one
+            cursor.execute(
+                f"""
+                WITH s AS ({values_sql})
+                SELECT LEAST(width_bucket(v::float8, %s::float8, %s::float8, %s), %s) AS bucket,
+                       count(*)
+                FROM s
+                GROUP BY bucket
+                ORDER BY bucket
+                """,
+                [slug, low, upper, buckets, buckets],
+            )
+            counts = dict(cursor.fetchall())
+
+        histogram = [
+            {
+                "start": round(low + i * width, 4),
+                "end": round(low + (i + 1) * width, 4),
+                "count": counts.get(i + 1, 0),
+            }
+            for i in range(buckets)
+        ]
+
+        if theoretical is not None and is_integer:
+            # Bucket i holds the integers in [ceil(low + i*w), ceil(low + (i+1)*w))
+            offset, probabilities = theoretical
+            cumulative = np.concatenate(([0.0], np.cumsum(probabilities)))
+            edges = np.ceil(low + np.arange(buckets + 1) * width).astype(np.int64) - offset
+            mass = cumulative[np.clip(edges, 0, len(probabilities))]
+            for bucket, expected in zip(histogram, np.diff(mass) * total, strict=True):
+                bucket["expected"] = round(float(expected), 2)
+
+        return {
+            "count": total,
+            "min": low,
+            "max": high,
+            "mean": round(float(mean), 4),
+            "std": round(float(std), 4),
+            "percentiles": {
+                f"p{round(q * 100)}": round(float(value), 4)
+                for q, value in zip((0.05, 0.25, 0.5, 0.75, 0.95), percentiles, strict=True)
+            },
+            "histogram": histogram,
+        }
+
+    @staticmethod
+    def _positional_matrix(draws: np.ndarray, min_number: int, max_number: int) -> np.ndarray:
+        """
+        Count values per position with a single bincount.
+
+        Args:
+            draws: One draw per row, one position per column
+            min_number: Lowest possible value
+            max_number: Highest possible value
+
+        Returns:
+            positions x values matrix of counts (out-of-range values ignored)
+        """
+        positions = draws.shape[1]
+        span = max_number - min_number + 1
+        offsets = draws - min_number
+        valid = (offsets >= 0) & (offsets < span)
+
+        cells = (np.arange(positions) * span + offsets)[valid]
+        return np.bincount(cells, minlength=positions * span).reshape(positions, span)
+
+    @staticmethod
+    def _rolling_mean_std(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+        """Rolling mean and (population) standard deviation from cumulative sums."""
+        if len(values) < window:
+            return np.array([]), np.array([])
+
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        squares = np.concatenate(([0.0], np.cumsum(values**2)))
+
+        window_sums = sums[window:] - sums[:-window]
+        window_squares = squares[window:] - squares[:-window]
+
+        mean = window_sums / window
+        variance = np.maximum(window_squares / window - mean**2, 0.0)
+        return mean, np.sqrt(variance)
+
     def _filter_draws(self, slug: str, window: int | None, start: date | None, end: date | None):
         """Filter draws based on criteria."""
         qs = Draw.objects.filter(lottery__slug=slug, lottery__is_active=True).select_related("stats")
@@ -91,7 +549,7 @@ class StatsManager:
 
         return qs
 
-    def _calculate_aggregations(self, queryset) -> dict:
+    def _calculate_aggregations(self, queryset, version: LotteryVersion) -> dict:
         """Calculate aggregated metrics from queryset."""
         # Ensure we have the list in memory
         draws = list(queryset)
@@ -112,10 +570,15 @@ class StatsManager:
         total_consecutive = 0
         total_repeated = 0
 
+        # Draws since each number last appeared (draws are newest first)
+        number_delay = {}
+
         # Processing loop
-        for draw in draws:
+        for index, draw in enumerate(draws):
             # Numbers frequency
             number_frequency.update(draw.numbers)
+            for number in draw.numbers:
+                number_delay.setdefault(number, index)
 
             # Metrics
             if hasattr(draw, "stats"):
@@ -136,7 +599,12 @@ class StatsManager:
 
         return {
             "total_analyzed": total_draws,
+            "computed_at_draw": version.draw_number,
             "number_frequencies": most_frequent,
+            "number_delays": [
+                {"number": num, "delay": delay}
+                for num, delay in sorted(number_delay.items(), key=lambda item: (-item[1], item[0]))
+            ],
             "averages": {
                 "sum": round(total_sum / total_draws, 2),
                 "range": round(total_range / total_draws, 2),
@@ -145,5 +613,26 @@ class StatsManager:
                 "primes": round(total_primes / total_draws, 2),
                 "consecutive": round(total_consecutive / total_draws, 2),
                 "repeated": round(total_repeated / total_draws, 2),
-            }
+            },
+            "goodness_of_fit": self._goodness_of_fit(draws),
         }
+
+    def _goodness_of_fit(self, draws: list[Draw]) -> dict:
+        """Compare the analyzed draws with the exact theoretical distributions."""
+        draw_stats = [draw.stats for draw in draws if hasattr(draw, "stats")]
+        if not draw_stats:
+            return {}
+
+        theoretical = TheoreticalDistributions()
+        tables = theoretical.get(Lottery.objects.get(pk=draws[0].lottery_id))
+
+        result = {}
+        for metric, field in THEORETICAL_METRICS.items():
+            if not tables[metric][1]:
+                continue
+            observed = np.array([getattr(stats, field) for stats in draw_stats])
+            result[metric] = theoretical.goodness_of_fit(tables[metric], observed)
+            # Sums have hundreds of values: their comparison is the distribution endpoint
+            if metric != "sum":
+                result[metric]["frequencies"] = theoretical.expected_vs_observed(tables[metric], observed)
+        return result
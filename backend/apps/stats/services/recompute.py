@@ -0,0 +1,180 @@
+"""
+Bulk recompute service.
+
+Recomputes DrawStatistics for whole lotteries in a single streaming pass.
+"""
+
+import logging
+
+import numpy as np
+
+from apps.lotteries.models import Draw, Lottery
+from apps.stats.models import DrawStatistics
+
+from .calculator import EXTENDED_METRIC_NAMES, METRIC_NAMES, StatsCalculator
+
+logger = logging.getLogger(__name__)
+
+
+class BulkStatsRecomputer:
+    """
+    Recomputes per-draw statistics in chunks.
+
+    Draws are streamed ordered by (lottery, number) so the previous draw is
+    always the last one seen, and results are upserted with one query per chunk.
+
+    Usage:
+        recomputer = BulkStatsRecomputer()
+        counts = recomputer.recompute()  # {lottery_id: draws_processed}
+    """
+
+    CHUNK_SIZE = 2000
+    METRIC_FIELDS = [*METRIC_NAMES, *EXTENDED_METRIC_NAMES]
+    DEFAULT_SLIP_COLUMNS = 10
+    SLIP_COLUMNS = {"lotofacil": 5}  # slips that are not 10 numbers wide
+
+    def __init__(self):
+        self._geometry: dict[int, tuple[int, int, int]] = {}
+
+    def recompute(self, lottery_ids: list[int] | None = None) -> dict[int, int]:
+        """
+        Recompute statistics for every draw of the given lotteries.
+
+        Args:
+            lottery_ids: Lotteries to recompute (default: all)
+
+        Returns:
+            Dict mapping lottery id to the number of draws processed
+        """
+        queryset = Draw.objects.order_by("lottery_id", "number").values_list(
+            "id", "lottery_id", "number", "numbers"
+        )
+        if lottery_ids is not None:
+            queryset = queryset.filter(lottery_id__in=lottery_ids)
+
+        counts: dict[int, int] = {}
+        previous = None
+        chunk = []
+
+        for row in queryset.iterator(chunk_size=self.CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) >= self.CHUNK_SIZE:
+                previous = self._process_chunk(chunk, previous, counts)
+                chunk = []
+
+        if chunk:
+            self._process_chunk(chunk, previous, counts)
+
+        logger.info(f"Recomputed stats for {sum(counts.values())} draws.")
+        return counts
+
+    def recompute_draws(self, lottery_id: int, draw_ids: list[int]) -> int:
+        """
+        Recompute statistics for specific draws of a lottery.
+
+        The draws following the given ones are recomputed too, since their
+        repeat counts depend on them. Unknown IDs are ignored.
+
+        Args:
+            lottery_id: Lottery the draws belong to
+            draw_ids: IDs of the changed draws
+
+        Returns:
+            Number of draws recomputed
+        """
+        changed = set(
+            Draw.objects.filter(lottery_id=lottery_id, id__in=draw_ids).values_list(
+                "number", flat=True
+            )
+        )
+        if not changed:
+            return 0
+
+        affected = changed | {number + 1 for number in changed}
+        needed = affected | {number - 1 for number in affected}
+        rows = list(
+            Draw.objects.filter(lottery_id=lottery_id, number__in=needed)
+            .order_by("number")
+            .values_list("id", "lottery_id", "number", "numbers")
+        )
+        numbers_by_contest = {row[2]: row[3] for row in rows}
+
+        targets = [row for row in rows if row[2] in affected]
+        previous_numbers = [numbers_by_contest.get(row[2] - 1) for row in targets]
+        self._write(targets, previous_numbers)
+        return len(targets)
+
+    def _process_chunk(
+        self, chunk: list[tuple], previous: tuple | None, counts: dict[int, int]
+    ) -> tuple:
+        """
+        Compute and upsert the statistics of a chunk of draws.
+
+        Args:
+            chunk: (id, lottery_id, number, numbers) rows ordered by lottery/number
+            previous: Last row of the previous chunk
+            counts: Per-lottery counters, updated in place
+
+        Returns:
+            Last row of this chunk
+        """
+        previous_numbers = []
+        for row in chunk:
+            _, lottery_id, number, _ = row
+            if previous and previous[1] == lottery_id and previous[2] == number - 1:
+                previous_numbers.append(previous[3])
+            else:
+                previous_numbers.append(None)
+            counts[lottery_id] = counts.get(lottery_id, 0) + 1
+            previous = row
+
+        self._write(chunk, previous_numbers)
+        return previous
+
+    def _write(self, rows: list[tuple], previous_numbers: list[list[int] | None]):
+        """Compute the metrics of draw rows and upsert them in one query."""
+        # The batch calculator needs rectangular arrays from a single lottery
+        groups: dict[tuple[int, int], list[int]] = {}
+        for index, row in enumerate(rows):
+            groups.setdefault((row[1], len(row[3])), []).append(index)
+
+        objects = []
+        for (lottery_id, size), indexes in groups.items():
+            draws = np.array([rows[i][3] for i in indexes], dtype=np.int64).reshape(-1, size)
+            previous = np.full_like(draws, -1)
+            for position, i in enumerate(indexes):
+                if previous_numbers[i] and len(previous_numbers[i]) == size:
+                    previous[position] = previous_numbers[i]
+
+            min_number, max_number, slip_columns = self._lottery_geometry(lottery_id)
+            columns = {
+                **StatsCalculator.calculate_metrics_batch(draws, previous),
+                **StatsCalculator.calculate_extended_metrics_batch(
+                    draws, min_number, max_number, slip_columns
+                ),
+            }
+            for position, i in enumerate(indexes):
+                objects.append(
+                    DrawStatistics(
+                        draw_id=rows[i][0],
+                        lottery_id=lottery_id,
+                        **{name: columns[name][position].tolist() for name in self.METRIC_FIELDS},
+                    )
+                )
+
+        DrawStatistics.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=["draw"],
+            update_fields=[*self.METRIC_FIELDS, "updated_at"],
+        )
+
+    def _lottery_geometry(self, lottery_id: int) -> tuple[int, int, int]:
+        """Get (min_number, max_number, slip_columns) of a lottery, cached per instance."""
+        if lottery_id not in self._geometry:
+            slug, min_number, max_number = Lottery.objects.values_list(
+                "slug", "min_number", "max_number"
+            ).get(id=lottery_id)
+            slip_columns = self.SLIP_COLUMNS.get(slug, self.DEFAULT_SLIP_COLUMNS)
+            self._geometry[lottery_id] = (min_number, max_number, slip_columns)
+        return self._geometry[lottery_id]
@@ -0,0 +1,260 @@
+"""
+Exact theoretical distributions of draw metrics.
+
+For a lottery drawing k distinct numbers out of [min, max], every one of
+the C(n, k) combinations is equally likely. The distributions below count
+how many combinations produce each metric value, built from generating
+polynomials instead of enumerating combinations.
+
+An empty table (offset 0, no counts) means the distribution is not
+available for the lottery; callers skip the metric. Column lotteries (Super
+Sete: one digit per column, repeats allowed) do not follow the model and
+always get empty tables.
+
+Tables are built by the build_theoretical_distributions task, queued when a
+lottery is saved or when a request finds them missing; requests never build
+them inline.
+"""
+
+import logging
+import math
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from scipy import stats as scipy_stats
+
+from apps.lotteries.models import Lottery
+from apps.stats.models import TheoreticalDistribution
+
+from .calculator import StatsCalculator
+
+logger = logging.getLogger(__name__)
+
+# Metric name -> DrawStatistics / calculate_metrics_batch field
+THEORETICAL_METRICS = {
+    "sum": "sum_value",
+    "evens": "even_count",
+    "primes": "prime_count",
+    "consecutive": "consecutive_count",
+}
+
+COLUMN_LOTTERIES = {"supersete"}  # one value per column, numbers kept in column order
+
+
+class TheoreticalDistributions:
+    """
+    Build, persist and query exact metric distributions per lottery.
+    """
+
+    CACHE_TTL = 86400
+    BUILD_LOCK_TTL = 600  # max time a queued build keeps others from queueing
+    MIN_EXPECTED = 5.0  # Chi-square bins are pooled until they expect this many draws
+
+    # Cells (numbers x subset sizes x sums) the exact sum DP may fold; wider
+    # lotteries (Federal: 99999 numbers, ~500k sums) get no sum table
+    MAX_SUM_CELLS = 50_000_000
+
+    def get(self, lottery: Lottery) -> dict[str, tuple[int, list[int]]]:
+        """
+        Get the stored distribution tables of a lottery.
+
+        Missing tables are queued for building and reported empty meanwhile.
+
+        Returns:
+            Dict of metric name -> (offset, counts)
+        """
+        if lottery.slug in COLUMN_LOTTERIES:
+            return self.empty()
+
+        signature = self.signature(lottery)
+        cache_key = f"stats:theoretical:{lottery.id}:{signature}"
+
+        tables = cache.get(cache_key)
+        if tables is not None:
+            return tables
+
+        tables = {
+            row.metric: (row.offset, row.counts)
+            for row in TheoreticalDistribution.objects.filter(lottery=lottery, signature=signature)
+        }
+        if set(tables) != set(THEORETICAL_METRICS):
+            self.schedule_build(lottery)
+            return self.empty()
+
+        cache.set(cache_key, tables, self.CACHE_TTL)
+        return tables
+
+    def schedule_build(self, lottery: Lottery):
+        """Queue a build of the tables of a lottery unless one is already queued."""
+        from apps.stats.tasks import build_theoretical_distributions
+
+        if cache.add(f"stats:theoretical:{lottery.id}:build", 1, self.BUILD_LOCK_TTL):
+            transaction.on_commit(lambda: build_theoretical_distributions.delay(lottery.id))
+
+    def build(self, lottery: Lottery) -> dict[str, tuple[int, list[int]]]:
+        """Compute the tables of a lottery and store them."""
+        signature = self.signature(lottery)
+        if lottery.slug in COLUMN_LOTTERIES:
+            tables = self.empty()
+        else:
+            tables = self.compute(lottery.min_number, lottery.max_number, lottery.numbers_count)
+
+        TheoreticalDistribution.objects.bulk_create(
+            [
+                TheoreticalDistribution(
+                    lottery=lottery,
+                    metric=metric,
+                    signature=signature,
+                    offset=offset,
+                    counts=counts,
+                )
+                for metric, (offset, counts) in tables.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["lottery", "metric"],
+            update_fields=["signature", "offset", "counts", "updated_at"],
+        )
+        logger.info(f"Built theoretical distributions for {lottery.slug} ({signature})")
+        return tables
+
+    @staticmethod
+    def empty() -> dict[str, tuple[int, list[int]]]:
+        """Tables of a lottery the model does not cover."""
+        return {metric: (0, []) for metric in THEORETICAL_METRICS}
+
+    @staticmethod
+    def signature(lottery: Lottery) -> str:
+        return f"{lottery.numbers_count}:{lottery.min_number}:{lottery.max_number}"
+
+    @classmethod
+    def compute(cls, min_number: int, max_number: int, k: int) -> dict[str, tuple[int, list[int]]]:
+        """
+        Compute the exact distributions for k distinct numbers in [min_number, max_number].
+
+        Returns:
+            Dict of metric name -> (offset, counts), counts as Python ints
+        """
+        n = max_number - min_number + 1
+        if k < 1 or k > n:
+            return cls.empty()
+
+        numbers = np.arange(min_number, max_number + 1)
+        evens = int(np.count_nonzero(numbers % 2 == 0))
+        primes = int(StatsCalculator.prime_table(max_number)[numbers].sum())
+
+        return {
+            "sum": cls._sum_distribution(min_number, max_number, k),
+            "evens": (0, cls._split_distribution(evens, n - evens, k)),
+            "primes": (0, cls._split_distribution(primes, n - primes, k)),
+            "consecutive": (0, [math.comb(k - 1, c) * math.comb(n - k + 1, k - c) for c in range(k)]),
+        }
+
+    @staticmethod
+    def _sum_distribution(min_number: int, max_number: int, k: int) -> tuple[int, list[int]]:
+        """
+        Count k-subsets by sum: the coefficients of y^k in prod(1 + y * x^i).
+
+        ways[j, s] holds the number of j-subsets of the numbers seen so far
+        summing to s; each number is folded in with one shifted addition.
+        """
+        low = sum(range(min_number, min_number + k))
+        high = sum(range(max_number - k + 1, max_number + 1))
+
+        if (max_number - min_number + 1) * (k + 1) * (high + 1) > TheoreticalDistributions.MAX_SUM_CELLS:
+            return 0, []
+
+        # Counts overflow int64 for the larger games (Lotomania: C(100, 20))
+        dtype = np.int64 if math.comb(max_number - min_number + 1, k) < 2**62 else object
+        ways = np.zeros((k + 1, high + 1), dtype=dtype)
+        ways[0, 0] = 1
+
+        for number in range(min_number, max_number + 1):
+            ways[1:, number:] = ways[1:, number:] + ways[:-1, : high + 1 - number]
+
+        return low, [int(count) for count in ways[k, low:]]
+
+    @staticmethod
+    def _split_distribution(inside: int, outside: int, k: int) -> list[int]:
+        """Count k-subsets by how many numbers fall in a class of size `inside`."""
+        return [math.comb(inside, j) * math.comb(outside, k - j) for j in range(k + 1)]
+
+    @staticmethod
+    def probabilities(table: tuple[int, list[int]]) -> tuple[int, np.ndarray]:
+        """Convert a (offset, counts) table to (offset, probabilities)."""
+        offset, counts = table
+        total = sum(counts)
+        if not total:
+            return offset, np.zeros(0)
+        return offset, np.array([count / total for count in counts])
+
+    def goodness_of_fit(self, table: tuple[int, list[int]], observed: np.ndarray) -> dict:
+        """
+        Chi-square goodness of fit of observed metric values against a table.
+
+        Adjacent values are pooled until each bin expects at least
+        MIN_EXPECTED draws. Values outside the table are ignored.
+
+        Args:
+            table: (offset, counts) theoretical distribution
+            observed: Observed metric value of each draw
+
+        Returns:
+            Dict with chi2, dof, p_value and the number of draws tested
+        """
+        offset, probabilities = self.probabilities(table)
+        values = np.asarray(observed, dtype=np.int64) - offset
+        values = values[(values >= 0) & (values < len(probabilities))]
+        total = len(values)
+
+        if total == 0:
+            return {"draws": 0, "chi2": None, "dof": 0, "p_value": None}
+
+        observed_counts = np.bincount(values, minlength=len(probabilities))
+        expected_counts = probabilities * total
+
+        # Pool bins left to right, then fold a short tail into the last bin
+        bins_observed, bins_expected = [], []
+        acc_observed = acc_expected = 0.0
+        for obs, exp in zip(observed_counts, expected_counts, strict=True):
+            acc_observed += obs
+            acc_expected += exp
+            if acc_expected >= self.MIN_EXPECTED:
+                bins_observed.append(acc_observed)
+                bins_expected.append(acc_expected)
+                acc_observed = acc_expected = 0.0
+        if acc_expected > 0 or acc_observed > 0:
+            if bins_expected:
+                bins_observed[-1] += acc_observed
+                bins_expected[-1] += acc_expected
+            else:
+                bins_observed.append(acc_observed)
+                bins_expected.append(acc_expected)
+
+        dof = len(bins_expected) - 1
+        if dof < 1:
+            return {"draws": total, "chi2": None, "dof": 0, "p_value": None}
+
+        obs = np.array(bins_observed)
+        exp = np.array(bins_expected)
+        chi2 = float(((obs - exp) ** 2 / exp).sum())
+
+        return {
+            "draws": total,
+            "chi2": round(chi2, 4),
+            "dof": dof,
+            "p_value": round(float(scipy_stats.chi2.sf(chi2, dof)), 6),
+        }
+
+    def expected_vs_observed(self, table: tuple[int, list[int]], observed: np.ndarray) -> list[dict]:
+        """List observed and expected draw counts for every possible metric value."""
+        offset, probabilities = self.probabilities(table)
+        values = np.asarray(observed, dtype=np.int64) - offset
+        values = values[(values >= 0) & (values < len(probabilities))]
+        observed_counts = np.bincount(values, minlength=len(probabilities))
+        expected_counts = probabilities * len(values)
+
+        return [
+            {"value": offset + i, "observed": int(obs), "expected": round(float(exp), 2)}
+            for i, (obs, exp) in enumerate(zip(observed_counts, expected_counts, strict=True))
+        ]
@@ -1,18 +1,28 @@
 """
 Signals for stats app.
 
-Triggers computation when draws are created.
+Triggers computation when draws change, and rebuilds the theoretical
+distributions when a lottery is saved.
 """
 
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from apps.lotteries.models import Draw
-from apps.stats.tasks import compute_stats_for_draw
+from apps.lotteries.events import draw_events
+from apps.lotteries.models import Lottery
+from apps.stats.tasks import build_theoretical_distributions, compute_stats_for_draws
 
 
-@receiver(post_save, sender=Draw)
-def trigger_stats_computation(sender, instance, created, **kwargs):
-    """Trigger stats task when a Draw is saved."""
-    # We trigger even on updates to ensure stats are in sync with numbers
-    compute_stats_for_draw.delay(instance.id)
+def trigger_stats_computation(lottery_id: int, draw_ids: list[int]):
+    """Trigger one stats task per lottery for the draws changed in a transaction."""
+    compute_stats_for_draws.delay(lottery_id, draw_ids)
+
+
+draw_events.subscribe(trigger_stats_computation)
+
+
+@receiver(post_save, sender=Lottery)
+def rebuild_theoretical_distributions(sender, instance, **kwargs):
+    """Precompute the tables for the lottery rules, off the request path."""
+    transaction.on_commit(lambda: build_theoretical_distributions.delay(instance.id))
@@ -3,17 +3,29 @@ Celery tasks for stats app.
 """
 
 import logging
+from datetime import date
 
-from celery import shared_task
-from django.db import transaction
+from celery import chord, shared_task
+from django.core.cache import cache
+from django.db.models import Max, Min
 
-from apps.lotteries.models import Draw
-from apps.stats.models import DrawStatistics
-from apps.stats.services.calculator import StatsCalculator
+from apps.lotteries.models import Draw, Lottery
+from apps.stats.services.audit import RandomnessAuditor
+from apps.stats.services.dashboard import refresh_dashboard
+from apps.stats.services.itemsets import (
+    FrequentItemsetMiner,
+    load_draw_numbers,
+    store_frequent_itemsets,
+)
 from apps.stats.services.manager import StatsManager
+from apps.stats.services.recompute import BulkStatsRecomputer
+from apps.stats.services.theoretical import TheoreticalDistributions
 
 logger = logging.getLogger(__name__)
 
+ITEMSET_BRANCHES = 8  # parallel mining subtasks per lottery
+DEFAULT_MIN_SUPPORT = 5
+
 
 @shared_task(bind=True, max_retries=3)
 def compute_stats_for_draw(self, draw_id: int):
@@ -29,37 +41,226 @@ def compute_stats_for_draw(self, draw_id: int):
         logger.error(f"Draw {draw_id} not found.")
         return
 
-    # Fetch previous draw for comparison
-    previous_draw = Draw.objects.filter(
-        lottery=draw.lottery,
-        number=draw.number - 1
-    ).first()
+    BulkStatsRecomputer().recompute_draws(draw.lottery_id, [draw.id])
 
-    previous_numbers = previous_draw.numbers if previous_draw else None
+    logger.info(f"Stats computed for Draw {draw.id} ({draw.lottery.slug} #{draw.number})")
 
-    # Calculate metrics
-    metrics = StatsCalculator.calculate_metrics(draw.numbers, previous_numbers)
+    # Warm the caches, which also invalidates the old ones
+    warm_stats_cache.delay(draw.lottery.slug)
 
-    # Persist
-    with transaction.atomic():
-        stats, created = DrawStatistics.objects.update_or_create(
-            draw=draw,
-            defaults=metrics
-        )
 
-    logger.info(f"Stats computed for Draw {draw.id} ({draw.lottery.slug} #{draw.number})")
+@shared_task(bind=True, max_retries=3)
+def compute_stats_for_draws(self, lottery_id: int, draw_ids: list[int]):
+    """
+    Compute statistics for a batch of changed draws of one lottery.
+
+    Dispatched once per committed transaction by the draw event bus.
+
+    Args:
+        lottery_id: ID of the Lottery the draws belong to
+        draw_ids: IDs of the changed Draw objects
+    """
+    slug = Lottery.objects.filter(id=lottery_id).values_list("slug", flat=True).first()
+    if slug is None:
+        logger.error(f"Lottery {lottery_id} not found.")
+        return
+
+    count = BulkStatsRecomputer().recompute_draws(lottery_id, draw_ids)
+    logger.info(f"Stats computed for {count} draws of {slug}")
 
-    # Invalidate caches
+    if count:
+        warm_stats_cache.delay(slug)
+
+        first_changed = Draw.objects.filter(id__in=draw_ids).aggregate(first=Min("number"))["first"]
+        run_randomness_audit.delay(lottery_id, first_changed)
+
+
+@shared_task(ignore_result=True)
+def warm_stats_cache(lottery_slug: str):
+    """
+    Precompute common stats windows and payloads, publish the new version
+    and render the dashboard.
+
+    Args:
+        lottery_slug: Lottery identifier
+    """
     manager = StatsManager()
-    manager.invalidate_cache(draw.lottery.slug)
+    version = manager.warm_cache(lottery_slug)
+    logger.info(f"Warmed stats cache for {lottery_slug} at version {version.token}")
+
+    # The publish bumped the catalog version: render the dashboard for it
+    refresh_dashboard_cache.delay()
+
 
 @shared_task
-def recompute_all_stats():
-    """Recompute stats for all existing draws."""
-    draws = Draw.objects.all()
-    count = 0
-    for draw in draws:
-        compute_stats_for_draw.delay(draw.id)
-        count += 1
-
-    logger.info(f"Queued stats computation for {count} draws.")
+def recompute_all_stats(lottery_slug: str | None = None) -> dict:
+    """
+    Recompute stats for all existing draws in a single chunked pass.
+
+    Args:
+        lottery_slug: Restrict the recompute to one lottery (default: all)
+
+    Returns:
+        Dict mapping lottery slug to the number of draws recomputed
+    """
+    lotteries = Lottery.objects.all()
+    if lottery_slug:
+        lotteries = lotteries.filter(slug=lottery_slug)
+    slugs = dict(lotteries.values_list("id", "slug"))
+
+    counts = BulkStatsRecomputer().recompute(list(slugs))
+
+    # One cache invalidation per lottery, after everything is written
+    for lottery_id in counts:
+        warm_stats_cache.delay(slugs[lottery_id])
+
+    return {slugs[lottery_id]: count for lottery_id, count in counts.items()}
+
+
+@shared_task(ignore_result=True)
+def build_theoretical_distributions(lottery_id: int):
+    """
+    Build and store the theoretical distribution tables of a lottery.
+
+    Publishes a new lottery version afterwards, so cached stats computed
+    without the tables are refreshed.
+
+    Args:
+        lottery_id: ID of the Lottery
+    """
+    try:
+        lottery = Lottery.objects.get(id=lottery_id)
+    except Lottery.DoesNotExist:
+        logger.error(f"Lottery {lottery_id} not found.")
+        return
+
+    try:
+        TheoreticalDistributions().build(lottery)
+    finally:
+        cache.delete(f"stats:theoretical:{lottery.id}:build")
+    StatsManager().invalidate_cache(lottery.slug)
+
+
+@shared_task(ignore_result=True)
+def refresh_dashboard_cache():
+    """Render the cross-lottery dashboard for the current catalog version."""
+    refresh_dashboard()
+
+
+@shared_task(ignore_result=True)
+def run_randomness_audit(lottery_id: int, from_number: int | None = None):
+    """
+    Update the randomness audit of a lottery.
+
+    New draws are folded into the stored counters; the full history is
+    reread only when an already audited draw changed.
+
+    Args:
+        lottery_id: ID of the Lottery to audit
+        from_number: Lowest contest number that changed (default: only new draws)
+    """
+    try:
+        lottery = Lottery.objects.get(id=lottery_id)
+    except Lottery.DoesNotExist:
+        logger.error(f"Lottery {lottery_id} not found.")
+        return
+
+    RandomnessAuditor().run(lottery, from_number)
+
+
+@shared_task
+def mine_frequent_itemsets(
+    lottery_slug: str,
+    min_support: int = DEFAULT_MIN_SUPPORT,
+    max_size: int = FrequentItemsetMiner.MAX_SIZE,
+) -> dict:
+    """
+    Mine the sets of 2 to max_size numbers drawn together at least min_support times.
+
+    The search is split by smallest number into ITEMSET_BRANCHES subtasks
+    mined in parallel; a chord callback merges them into the results table.
+
+    Args:
+        lottery_slug: Lottery identifier
+        min_support: Minimum number of draws containing the whole set
+        max_size: Largest set size (at most 5)
+
+    Returns:
+        Dict with the dispatch status
+    """
+    try:
+        lottery = Lottery.objects.get(slug=lottery_slug)
+    except Lottery.DoesNotExist:
+        logger.error(f"Lottery not found: {lottery_slug}")
+        return {"status": "error", "message": f"Lottery not found: {lottery_slug}"}
+
+    # Every branch mines the same snapshot of the history
+    draw_number = Draw.objects.filter(lottery=lottery).aggregate(last=Max("number"))["last"] or 0
+    numbers = list(range(lottery.min_number, lottery.max_number + 1))
+    branches = [numbers[i::ITEMSET_BRANCHES] for i in range(ITEMSET_BRANCHES) if numbers[i::ITEMSET_BRANCHES]]
+
+    chord(
+        mine_itemset_branch.s(lottery_slug, branch, min_support, max_size, draw_number)
+        for branch in branches
+    )(save_frequent_itemsets.s(lottery_slug, min_support, draw_number))
+
+    return {"status": "dispatched", "branches": len(branches), "draw_number": draw_number}
+
+
+@shared_task
+def mine_itemset_branch(
+    lottery_slug: str,
+    first_numbers: list[int],
+    min_support: int,
+    max_size: int,
+    draw_number: int,
+) -> list:
+    """
+    Mine the frequent sets whose smallest number is one of first_numbers.
+
+    Returns:
+        [numbers, support] pairs, highest support first
+    """
+    lottery = Lottery.objects.get(slug=lottery_slug)
+    miner = FrequentItemsetMiner(min_support, max_size)
+    bitsets = miner.bitsets(load_draw_numbers(lottery, draw_number), lottery.min_number, lottery.max_number)
+    return miner.mine(bitsets, first_numbers)
+
+
+@shared_task
+def save_frequent_itemsets(branch_results: list, lottery_slug: str, min_support: int, draw_number: int) -> int:
+    """
+    Merge the mined branches and replace the stored itemsets of a lottery.
+
+    Returns:
+        Number of itemsets stored
+    """
+    lottery = Lottery.objects.get(slug=lottery_slug)
+    itemsets = FrequentItemsetMiner(min_support).merge(*branch_results)
+    store_frequent_itemsets(lottery, itemsets, min_support, draw_number)
+    return len(itemsets)
+
+
+@shared_task(ignore_result=True)
+def refresh_aggregated_stats(
+    lottery_slug: str,
+    window: int | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+):
+    """
+    Recompute a stale aggregated stats cache entry in the background.
+
+    Args:
+        lottery_slug: Lottery identifier
+        window: Number of last draws to consider
+        start_date: Filter start date (ISO format)
+        end_date: Filter end date (ISO format)
+    """
+    manager = StatsManager()
+    manager.refresh_aggregated_stats(
+        lottery_slug,
+        window,
+        date.fromisoformat(start_date) if start_date else None,
+        date.fromisoformat(end_date) if end_date else None,
+    )
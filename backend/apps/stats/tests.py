@@ -2,13 +2,42 @@
 Tests for stats app.
 """
 
+import json
+import math
+import threading
+import time
+from collections import Counter
+from itertools import combinations
+from unittest.mock import patch
 
+import numpy as np
 import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from rest_framework import status
+from scipy import stats as scipy_stats
 
 from apps.lotteries.models import Draw, Lottery
+from apps.lotteries.services import (
+    get_latest_draw_payload,
+    get_lottery_version,
+    next_lottery_version,
+    publish_lottery_version,
+)
 from apps.stats.models import DrawStatistics
+from apps.stats.services.audit import RandomnessAuditor
 from apps.stats.services.calculator import StatsCalculator
+from apps.stats.services.dashboard import hot_and_cold
+from apps.stats.services.itemsets import (
+    FrequentItemsetMiner,
+    get_frequent_itemsets,
+    store_frequent_itemsets,
+)
+from apps.stats.services.manager import StatsManager
+from apps.stats.services.recompute import BulkStatsRecomputer
+from apps.stats.services.theoretical import TheoreticalDistributions
+from apps.stats.tasks import build_theoretical_distributions, mine_frequent_itemsets
 
 
 @pytest.fixture
@@ -23,36 +52,40 @@ def lottery(db):
     )
 
 @pytest.fixture
-def draws(db, lottery):
+def draws(db, lottery, django_capture_on_commit_callbacks):
     """Create a sequence of draws for testing."""
     draws = []
-    # Draw 1: [2, 4, 6, 8, 10, 12] (All even, consecutive)
-    d1 = Draw.objects.create(
-        lottery=lottery,
-        number=1,
-        draw_date="2025-01-01",
-        numbers=[2, 4, 6, 8, 10, 12],
-    )
-    # Trigger signal should create stats
-    draws.append(d1)
-
-    # Draw 2: [1, 3, 5, 7, 11, 13] (All odd, all primes)
-    d2 = Draw.objects.create(
-        lottery=lottery,
-        number=2,
-        draw_date="2025-01-02",
-        numbers=[1, 3, 5, 7, 11, 13],
-    )
-    draws.append(d2)
-
-    # Draw 3: [1, 2, 3, 4, 5, 6] (Mixed)
-    d3 = Draw.objects.create(
-        lottery=lottery,
-        number=3,
-        draw_date="2025-01-03",
-        numbers=[1, 2, 3, 4, 5, 6],
-    )
-    draws.append(d3)
+    # Stats are computed once the transaction commits
+    with django_capture_on_commit_callbacks(execute=True):
+        # Draw 1: [2, 4, 6, 8, 10, 12] (All even, consecutive)
+        d1 = Draw.objects.create(
+            lottery=lottery,
+            number=1,
+            draw_date="2025-01-01",
+            numbers=[2, 4, 6, 8, 10, 12],
+            raw_data={"numero": 1},
+        )
+        draws.append(d1)
+
+        # Draw 2: [1, 3, 5, 7, 11, 13] (All odd, all primes)
+        d2 = Draw.objects.create(
+            lottery=lottery,
+            number=2,
+            draw_date="2025-01-02",
+            numbers=[1, 3, 5, 7, 11, 13],
+            raw_data={"numero": 2},
+        )
+        draws.append(d2)
+
+        # Draw 3: [1, 2, 3, 4, 5, 6] (Mixed)
+        d3 = Draw.objects.create(
+            lottery=lottery,
+            number=3,
+            draw_date="2025-01-03",
+            numbers=[1, 2, 3, 4, 5, 6],
+            raw_data={"numero": 3},
+        )
+        draws.append(d3)
 
     return draws
 
@@ -83,29 +116,82 @@ class TestStatsCalculator:
         count = StatsCalculator.count_repeated(curr, prev)
         assert count == 3 # 4, 5, 6
 
+    def test_batch_matches_single_draw_metrics(self):
+        rng = np.random.default_rng(42)
+        draws = np.array([rng.choice(np.arange(1, 61), 6, replace=False) for _ in range(50)])
+        previous = np.vstack([np.full(6, -1), draws[:-1]])
+
+        columns = StatsCalculator.calculate_metrics_batch(draws, previous)
+
+        for i, numbers in enumerate(draws.tolist()):
+            expected = StatsCalculator.calculate_metrics(
+                numbers, draws[i - 1].tolist() if i else None
+            )
+            assert {name: int(column[i]) for name, column in columns.items()} == expected
+
 
 @pytest.mark.django_db
 class TestStatsIntegration:
     """Test database integration and signals."""
 
-    def test_stats_creation_on_draw_save(self, lottery):
+    def test_stats_creation_on_draw_save(self, lottery, django_capture_on_commit_callbacks):
         """Test that stats are computed via Task/Signal when draw is saved."""
         # Note: In tests with CELERY_TASK_ALWAYS_EAGER = True (default pytest-django),
-        # tasks run synchronously.
+        # tasks run synchronously. The task is only dispatched after commit.
+
+        with django_capture_on_commit_callbacks(execute=True):
+            draw = Draw.objects.create(
+                lottery=lottery,
+                number=1,
+                draw_date="2025-01-01",
+                numbers=[2, 3, 5, 7, 11, 13],
+            )
+
+        # Verify stats created
+        assert DrawStatistics.objects.filter(draw=draw).exists()
+
+        stats = draw.stats
+        assert stats.prime_count == 6
+        assert stats.sum_value == 41
+
+    def test_draw_events_coalesced_per_transaction(
+        self, lottery, django_capture_on_commit_callbacks
+    ):
+        """Draws saved in one transaction dispatch a single batched stats task."""
+        with patch("apps.stats.tasks.compute_stats_for_draws.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                created = [
+                    Draw.objects.create(
+                        lottery=lottery,
+                        number=number,
+                        draw_date="2025-01-01",
+                        numbers=[1, 2, 3, 4, 5, number + 6],
+                        raw_data={"numero": number},
+                    )
+                    for number in range(1, 4)
+                ]
+                assert not delay.called
+
+        delay.assert_called_once_with(lottery.id, [draw.id for draw in created])
 
+    def test_field_only_update_does_not_dispatch(
+        self, lottery, django_capture_on_commit_callbacks
+    ):
+        """Saving fields that do not affect stats publishes no event."""
         draw = Draw.objects.create(
             lottery=lottery,
             number=1,
             draw_date="2025-01-01",
             numbers=[2, 3, 5, 7, 11, 13],
+            raw_data={"numero": 1},
         )
 
-        # Verify stats created
-        assert DrawStatistics.objects.filter(draw=draw).exists()
+        with patch("apps.stats.tasks.compute_stats_for_draws.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                draw.location = "ESPAÇO DA SORTE"
+                draw.save(update_fields=["location"])
 
-        stats = draw.stats
-        assert stats.prime_count == 6
-        assert stats.sum_value == 41
+        assert not delay.called
 
     def test_api_aggregated_stats(self, db, client, draws, lottery):
         """Test the aggregated stats endpoint."""
@@ -139,3 +225,713 @@ class TestStatsIntegration:
 
         # Should be stats from Draw 3 only [1,2,3,4,5,6]
         assert data["averages"]["sum"] == 21.0
+
+
+@pytest.mark.django_db
+class TestBulkRecompute:
+    """Test the chunked bulk recompute of DrawStatistics."""
+
+    def test_recompute_uses_previous_draw_across_chunks(self, lottery):
+        for number, numbers in enumerate(
+            [[1, 2, 3, 4, 5, 6], [4, 5, 6, 7, 8, 9], [7, 8, 9, 10, 11, 12]], start=1
+        ):
+            Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date=f"2025-01-0{number}",
+                numbers=numbers,
+                raw_data={"numero": number},
+            )
+        DrawStatistics.objects.all().delete()
+
+        recomputer = BulkStatsRecomputer()
+        recomputer.CHUNK_SIZE = 2
+        counts = recomputer.recompute()
+
+        assert counts == {lottery.id: 3}
+        repeated = list(
+            DrawStatistics.objects.order_by("draw__number").values_list(
+                "repeated_from_previous", flat=True
+            )
+        )
+        assert repeated == [0, 3, 3]
+
+    def test_recompute_persists_extended_metrics(self, lottery):
+        draw = Draw.objects.create(
+            lottery=lottery,
+            number=1,
+            draw_date="2025-01-01",
+            numbers=[1, 2, 3, 10, 11, 60],
+            raw_data={"numero": 1},
+        )
+
+        BulkStatsRecomputer().recompute_draws(lottery.id, [draw.id])
+
+        stats = DrawStatistics.objects.get(draw=draw)
+        assert stats.decade_distribution == [3, 2, 0, 0, 0, 0, 1]
+        assert stats.row_distribution == [4, 1, 0, 0, 0, 1]
+        assert stats.max_consecutive_run == 3
+        assert stats.multiples_of_3_count == 2
+        assert stats.fibonacci_count == 3
+        assert stats.mean_gap == pytest.approx(11.8)
+        assert stats.low_half_ratio == pytest.approx(5 / 6)
+        assert stats.lottery_id == lottery.id
+        assert DrawStatistics.objects.filter(
+            lottery=lottery, sum_value__range=(80, 90), even_count=3
+        ).exists()
+
+
+@pytest.mark.django_db
+class TestDrawStatisticsEndpoints:
+    """Test per-draw and per-lottery statistics endpoints."""
+
+    @pytest.fixture
+    def stats_draws(self, lottery):
+        created = [
+            Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date=f"2025-01-0{number}",
+                numbers=[1, 2, 3, 4, 5, 6 + number],
+                raw_data={"numero": number},
+            )
+            for number in range(1, 6)
+        ]
+        BulkStatsRecomputer().recompute_draws(lottery.id, [draw.id for draw in created])
+        return created
+
+    def test_draw_stats_detail(self, client, stats_draws):
+        draw = stats_draws[0]
+        response = client.get(f"/api/stats/draws/{draw.id}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["draw_number"] == 1
+        assert response.json()["sum_value"] == 22
+
+    def test_lottery_stats_keyset_pagination(self, client, lottery, stats_draws):
+        response = client.get(f"/api/stats/lotteries/{lottery.slug}/?limit=2")
+
+        assert response.status_code == status.HTTP_200_OK
+        rows = json.loads(b"".join(response.streaming_content))
+        assert [row["draw_number"] for row in rows] == [5, 4]
+        assert "after=4" in response["Link"]
+
+        response = client.get(f"/api/stats/lotteries/{lottery.slug}/?after=2&limit=2")
+        rows = json.loads(b"".join(response.streaming_content))
+        assert [row["draw_number"] for row in rows] == [1]
+        assert "Link" not in response
+
+    def test_lottery_stats_columnar_layout(self, client, lottery, stats_draws):
+        response = client.get(
+            f"/api/stats/lotteries/{lottery.slug}/?layout=columns&min_sum=24"
+        )
+
+        columns = json.loads(b"".join(response.streaming_content))
+        assert columns["draw_number"] == [5, 4, 3]
+        assert columns["sum_value"] == [26, 25, 24]
+
+        empty = client.get(f"/api/stats/lotteries/{lottery.slug}/?layout=columns&min_sum=1000")
+        columns = json.loads(b"".join(empty.streaming_content))
+        assert columns["draw_number"] == [] and columns["sum_value"] == []
+
+
+@pytest.mark.django_db
+class TestTimeSeries:
+    """Test rolling-window metric series."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_rolling_mean_and_std(self, lottery):
+        sums = []
+        for number in range(1, 6):
+            numbers = [1, 2, 3, 4, 5, 6 + number]
+            sums.append(sum(numbers))
+            draw = Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=numbers,
+                raw_data={"numero": number},
+            )
+            BulkStatsRecomputer().recompute_draws(lottery.id, [draw.id])
+
+        series = StatsManager().get_timeseries(lottery.slug, "sum", 3)
+
+        assert series["contests"] == [3, 4, 5]
+        assert series["rolling_mean"] == [
+            pytest.approx(np.mean(sums[i - 3 : i])) for i in range(3, 6)
+        ]
+        assert series["rolling_std"] == [
+            pytest.approx(np.std(sums[i - 3 : i]), abs=1e-4) for i in range(3, 6)
+        ]
+
+    def test_unknown_metric_rejected(self, lottery):
+        with pytest.raises(ValueError):
+            StatsManager().get_timeseries(lottery.slug, "nope", 3)
+
+    def test_unknown_lottery_not_cached(self, client, lottery):
+        response = client.get("/api/stats/nope/timeseries/?metric=sum")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert cache.get("stats:nope:ts:sum:w50:0.0") is None
+
+
+@pytest.mark.django_db
+class TestDistribution:
+    """Test metric histograms and percentiles."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="width_bucket/percentile_cont are PostgreSQL-only"
+    )
+    def test_histogram_counts_every_draw(self, lottery):
+        sums = []
+        for number in range(1, 11):
+            numbers = [1, 2, 3, 4, 5, 6 + number]
+            sums.append(sum(numbers))
+            draw = Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=numbers,
+                raw_data={"numero": number},
+            )
+            BulkStatsRecomputer().recompute_draws(lottery.id, [draw.id])
+
+        distribution = StatsManager().get_distribution(lottery.slug, "sum", bins=5)
+
+        assert distribution["count"] == 10
+        assert distribution["min"] == min(sums)
+        assert distribution["max"] == max(sums)
+        assert distribution["percentiles"]["p50"] == pytest.approx(np.median(sums))
+        assert len(distribution["histogram"]) == 5
+        assert sum(b["count"] for b in distribution["histogram"]) == 10
+
+    def test_unknown_metric_rejected(self, lottery):
+        with pytest.raises(ValueError):
+            StatsManager().get_distribution(lottery.slug, "nope")
+
+    def test_unknown_or_inactive_lottery_not_found(self, client, lottery):
+        assert client.get("/api/stats/nope/distribution/?metric=evens").status_code == 404
+
+        Lottery.objects.filter(pk=lottery.pk).update(is_active=False)
+        cache.clear()
+        response = client.get(f"/api/stats/{lottery.slug}/distribution/?metric=evens")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestTheoreticalDistributions:
+    """Test exact combinatorial distributions."""
+
+    def test_matches_enumeration(self):
+        tables = TheoreticalDistributions.compute(1, 20, 5)
+
+        expected = {metric: Counter() for metric in tables}
+        for combo in combinations(range(1, 21), 5):
+            expected["sum"][sum(combo)] += 1
+            expected["evens"][StatsCalculator.count_evens(combo)] += 1
+            expected["primes"][StatsCalculator.count_primes(combo)] += 1
+            expected["consecutive"][StatsCalculator.count_consecutive_pairs(list(combo))] += 1
+
+        for metric, (offset, counts) in tables.items():
+            assert {offset + i: c for i, c in enumerate(counts) if c} == dict(expected[metric])
+
+    def test_large_counts_are_exact(self):
+        offset, counts = TheoreticalDistributions.compute(0, 99, 20)["sum"]
+
+        assert offset == sum(range(20))
+        assert sum(counts) == 535983370403809682970  # C(100, 20)
+
+    @pytest.mark.django_db
+    def test_tables_are_built_off_the_request_path(self, lottery, django_capture_on_commit_callbacks):
+        cache.clear()
+        with patch("apps.stats.tasks.build_theoretical_distributions.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                tables = TheoreticalDistributions().get(lottery)
+                TheoreticalDistributions().get(lottery)
+
+        assert all(counts == [] for _, counts in tables.values())
+        assert not lottery.theoretical_distributions.exists()
+        delay.assert_called_once_with(lottery.id)
+
+        build_theoretical_distributions(lottery.id)
+
+        assert lottery.theoretical_distributions.count() == 4
+        assert TheoreticalDistributions().get(lottery)["evens"][1]
+
+    @pytest.mark.django_db
+    def test_column_lotteries_have_no_tables(self):
+        supersete = Lottery.objects.create(
+            name="Super Sete", slug="supersete", api_identifier="supersete",
+            numbers_count=7, min_number=0, max_number=9,
+        )
+        build_theoretical_distributions(supersete.id)
+
+        assert TheoreticalDistributions().get(supersete) == TheoreticalDistributions.empty()
+        assert not supersete.theoretical_distributions.exclude(counts=[]).exists()
+
+    def test_wide_range_lottery_is_fast(self):
+        """Federal-sized ranges skip the exact sum table instead of running for minutes."""
+        started = time.monotonic()
+        tables = TheoreticalDistributions.compute(0, 99999, 5)
+
+        assert time.monotonic() - started < 5
+        assert tables["sum"] == (0, [])
+        assert sum(tables["evens"][1]) == math.comb(100000, 5)
+
+    @pytest.mark.django_db
+    def test_aggregated_stats_include_goodness_of_fit(self, client, lottery):
+        rng = np.random.default_rng(7)
+        Draw.objects.bulk_create([
+            Draw(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=sorted(rng.choice(np.arange(1, 61), 6, replace=False).tolist()),
+                raw_data={"numero": number},
+            )
+            for number in range(1, 201)
+        ])
+        BulkStatsRecomputer().recompute([lottery.id])
+        TheoreticalDistributions().build(lottery)
+        cache.clear()
+
+        response = client.get(f"/api/stats/{lottery.slug}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        fit = response.json()["goodness_of_fit"]
+        assert set(fit) == {"sum", "evens", "primes", "consecutive"}
+        for metric in ("sum", "evens", "primes"):
+            result = fit[metric]
+            assert result["draws"] == 200
+            assert result["dof"] >= 1
+            assert result["chi2"] >= 0
+            assert result["p_value"] == pytest.approx(scipy_stats.chi2.sf(result["chi2"], result["dof"]), abs=1e-3)
+        assert sum(row["observed"] for row in fit["evens"]["frequencies"]) == 200
+
+
+@pytest.mark.django_db
+class TestRandomnessAudit:
+    """Test the stored, incrementally updated randomness audit."""
+
+    def _create_draws(self, lottery, numbers_range):
+        rng = np.random.default_rng(numbers_range.start)
+        Draw.objects.bulk_create([
+            Draw(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=sorted(rng.choice(np.arange(1, 61), 6, replace=False).tolist()),
+                raw_data={"numero": number},
+            )
+            for number in numbers_range
+        ])
+
+    def test_incremental_matches_full_run(self, lottery):
+        auditor = RandomnessAuditor()
+        self._create_draws(lottery, range(1, 201))
+        auditor.run(lottery)
+        self._create_draws(lottery, range(201, 301))
+
+        incremental = auditor.run(lottery)
+        full = auditor.run(lottery, from_number=1)
+
+        assert incremental.draw_number == 300
+        assert incremental.draws_analyzed == 300
+        assert incremental.results == full.results
+        assert set(full.results) == {
+            "number_frequency",
+            "pair_uniformity",
+            "parity_runs",
+            "gap_distribution",
+        }
+
+    def test_gap_counts(self, lottery):
+        self._create_draws(lottery, range(1, 101))
+        audit = RandomnessAuditor().run(lottery)
+
+        # Every appearance but the first of each number closes one gap
+        appeared = len({n for numbers in Draw.objects.values_list("numbers", flat=True) for n in numbers})
+        assert audit.results["gap_distribution"]["gaps"] == 600 - appeared
+
+    def test_wide_range_lottery_skips_pairs(self, db):
+        federal = Lottery.objects.create(
+            name="Federal",
+            slug="federal",
+            api_identifier="federal",
+            numbers_count=5,
+            min_number=0,
+            max_number=99999,
+        )
+        rng = np.random.default_rng(3)
+        Draw.objects.bulk_create([
+            Draw(
+                lottery=federal,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=sorted(rng.choice(100000, 5, replace=False).tolist()),
+                raw_data={"numero": number},
+            )
+            for number in range(1, 121)
+        ])
+
+        auditor = RandomnessAuditor()
+        audit = auditor.run(federal)
+
+        assert audit.draws_analyzed == 120
+        assert audit.state["pairs"] is None
+        assert audit.results["pair_uniformity"]["skipped"] is True
+        assert audit.results["number_frequency"]["dof"] == 99999
+        assert audit.results["gap_distribution"]["gaps"] == 600 - len(
+            {n for numbers in Draw.objects.filter(lottery=federal).values_list("numbers", flat=True) for n in numbers}
+        )
+        assert auditor.run(federal).results == audit.results
+
+    def test_audit_endpoint(self, client, lottery):
+        self._create_draws(lottery, range(1, 51))
+        RandomnessAuditor().run(lottery)
+
+        response = client.get(f"/api/stats/{lottery.slug}/audit/")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["draw_number"] == 50
+        assert "pair_uniformity" in data["tests"]
+
+    def test_audit_endpoint_missing(self, client, lottery):
+        response = client.get(f"/api/stats/{lottery.slug}/audit/")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestPositionalStats:
+    """Test positional frequency matrices."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_draw_order_matrix(self, lottery):
+        orders = [[5, 1, 2, 3, 4, 6], [5, 2, 1, 3, 4, 7]]
+        for number, order in enumerate(orders, start=1):
+            Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=sorted(order),
+                numbers_draw_order=order,
+                raw_data={"numero": number},
+            )
+
+        data = StatsManager().get_positional(lottery.slug)
+
+        assert data["mode"] == "draw_order"
+        assert data["draws"] == 2
+        assert data["matrix"][0][5 - 1] == 2
+        assert data["most_frequent"][0] == {"position": 1, "number": 5, "count": 2}
+        assert sum(map(sum, data["matrix"])) == 12
+
+    def test_column_matrix(self):
+        matrix = StatsManager._positional_matrix(np.array([[0, 9, 9], [0, 1, 9]]), 0, 9)
+
+        assert matrix.shape == (3, 10)
+        assert matrix[0, 0] == 2
+        assert matrix[1].tolist() == [0, 1, 0, 0, 0, 0, 0, 0, 0, 1]
+        assert matrix[2, 9] == 2
+
+    def test_positional_endpoint(self, client, lottery):
+        orders = [[10, 1, 2, 3, 4, 5], [10, 2, 1, 3, 4, 6], [7, 2, 1, 3, 4, 5]]
+        for number, order in enumerate(orders, start=1):
+            Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=sorted(order),
+                numbers_draw_order=order,
+                raw_data={"numero": number},
+            )
+
+        response = client.get(f"/api/stats/{lottery.slug}/positional/")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["values"] == list(range(1, 61))
+        assert data["draws"] == 3
+        expected = np.zeros((6, 60), dtype=int)
+        for order in orders:
+            for position, value in enumerate(order):
+                expected[position, value - 1] += 1
+        assert data["matrix"] == expected.tolist()
+        assert data["matrix"][0][10 - 1] == 2
+        assert data["matrix"][1][:2] == [1, 2]
+        assert [item["number"] for item in data["most_frequent"]] == [10, 2, 1, 3, 4, 5]
+
+
+class TestFrequentItemsets:
+    """Test bitset Eclat mining."""
+
+    DRAWS = [[1, 2, 3, 4], [1, 2, 3, 5], [1, 2, 4, 5], [2, 3, 4, 5], [1, 2, 3, 4]]
+
+    def _brute_force(self, min_support, max_size=5):
+        found = {}
+        for size in range(2, max_size + 1):
+            for combo in combinations(range(1, 6), size):
+                support = sum(1 for draw in self.DRAWS if set(combo) <= set(draw))
+                if support >= min_support:
+                    found[combo] = support
+        return found
+
+    def test_matches_brute_force(self):
+        miner = FrequentItemsetMiner(min_support=2)
+        bitsets = miner.bitsets(self.DRAWS, 1, 5)
+
+        assert dict(miner.mine(bitsets)) == self._brute_force(2)
+
+    def test_branches_merge_to_full_result(self):
+        miner = FrequentItemsetMiner(min_support=2, max_size=3)
+        bitsets = miner.bitsets(self.DRAWS, 1, 5)
+
+        merged = miner.merge(miner.mine(bitsets, [1, 3, 5]), miner.mine(bitsets, [2, 4]))
+
+        assert merged == miner.mine(bitsets)
+        assert dict(merged) == self._brute_force(2, max_size=3)
+
+    def test_results_are_bounded(self):
+        miner = FrequentItemsetMiner(min_support=1, max_results=3)
+        result = miner.mine(miner.bitsets(self.DRAWS, 1, 5))
+
+        assert len(result) == 3
+        assert result[0] == ((1, 2), 4)
+
+    def test_bitsets_only_cover_drawn_numbers(self):
+        # Federal-like range: no per-number storage for the 100k possible numbers
+        bitsets = FrequentItemsetMiner.bitsets([[5, 99_999], [5, 42], [120_000]], 0, 99_999)
+
+        assert bitsets == {5: 0b011, 42: 0b010, 99_999: 0b001}
+
+    @pytest.mark.django_db
+    def test_task_stores_and_serves_itemsets(self, client, lottery):
+        cache.clear()
+        for number, numbers in enumerate(self.DRAWS, start=1):
+            Draw.objects.create(
+                lottery=lottery,
+                number=number,
+                draw_date="2025-01-01",
+                numbers=[*numbers, 59, 60],
+                raw_data={"numero": number},
+            )
+
+        mine_frequent_itemsets.delay(lottery.slug, min_support=4, max_size=2)
+
+        assert lottery.frequent_itemsets.count() > 0
+        response = client.get(f"/api/stats/{lottery.slug}/itemsets/", {"size": 2, "limit": 3})
+        assert response.status_code == status.HTTP_200_OK
+        # 2, 59 and 60 are in every draw
+        assert response.json()["itemsets"] == [
+            {"numbers": [2, 59], "support": 5},
+            {"numbers": [2, 60], "support": 5},
+            {"numbers": [59, 60], "support": 5},
+        ]
+        assert response.json()["truncated"] is False
+
+    @pytest.mark.django_db
+    def test_payload_flags_truncation(self, lottery, monkeypatch):
+        cache.clear()
+        monkeypatch.setattr(FrequentItemsetMiner, "MAX_RESULTS", 2)
+        miner = FrequentItemsetMiner(min_support=1, max_results=2)
+        itemsets = miner.mine(miner.bitsets(self.DRAWS, 1, 5))
+
+        payload = store_frequent_itemsets(lottery, itemsets, 1, len(self.DRAWS))
+
+        assert len(payload["itemsets"]) == 2
+        assert payload["truncated"] is True
+        cache.clear()
+        assert get_frequent_itemsets(lottery.slug)["truncated"] is True
+
+
+@pytest.mark.django_db
+class TestDashboard:
+    """Test the cross-lottery dashboard."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_number_delays(self, lottery, draws):
+        stats = StatsManager().get_aggregated_stats(lottery.slug)
+        delays = {item["number"]: item["delay"] for item in stats["number_delays"]}
+
+        # Draw 3 is the newest: its numbers have no delay
+        assert all(delays[number] == 0 for number in draws[-1].numbers)
+        assert delays == {**dict.fromkeys(range(1, 7), 0), 7: 1, 11: 1, 13: 1, 8: 2, 10: 2, 12: 2}
+        assert [item["number"] for item in stats["number_delays"]] == [8, 10, 12, 7, 11, 13, 1, 2, 3, 4, 5, 6]
+
+    def test_hot_and_cold_match_full_ranking(self):
+        """Same lists as ranking every number of the range, including mostly drawn ranges."""
+        for counts, high in ((Counter({3: 4, 7: 4, 1: 2, 10: 1}), 12), (Counter({3: 4, 1: 2, 2: 1, 5: 1}), 6)):
+            full = sorted(
+                ((number, counts[number]) for number in range(1, high + 1)), key=lambda item: (-item[1], item[0])
+            )
+
+            assert hot_and_cold(counts, 1, high) == (full[:5], full[::-1][:5])
+
+    def test_hot_and_cold_wide_range(self):
+        """Federal-sized ranges only walk past the drawn numbers."""
+        counts = Counter({99999: 3, 0: 1, 12345: 3})
+
+        hot, cold = hot_and_cold(counts, 0, 99999)
+
+        assert hot == [(12345, 3), (99999, 3), (0, 1), (1, 0), (2, 0)]
+        assert cold == [(99998, 0), (99997, 0), (99996, 0), (99995, 0), (99994, 0)]
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="DISTINCT ON is PostgreSQL-only")
+    def test_dashboard_endpoint(self, client, lottery, draws):
+        response = client.get("/api/dashboard/")
+
+        assert response.status_code == status.HTTP_200_OK
+        entry = response.json()["lotteries"][0]
+        assert entry["lottery"]["slug"] == lottery.slug
+        assert entry["latest_draw"]["number"] == draws[-1].number
+        assert len(entry["hot_numbers"]) == 5
+        assert len(entry["cold_numbers"]) == 5
+        assert entry["cold_numbers"][0]["count"] == 0
+
+        cached = client.get("/api/dashboard/", HTTP_IF_NONE_MATCH=response["ETag"])
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestStatsCache:
+    """Test versioned, stale-while-revalidate stats caching."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_stale_entry_served_while_refreshing(self, lottery):
+        """A stale entry is returned and only one refresh is scheduled."""
+        manager = StatsManager()
+        key = manager._generate_cache_key(lottery.slug, 10, None, None)
+        cache.set(key, {"data": {"total_analyzed": 1}, "version": "0.0", "expires_at": 0})
+
+        with patch("apps.stats.tasks.refresh_aggregated_stats.delay") as delay:
+            assert manager.get_aggregated_stats(lottery.slug, window=10) == {"total_analyzed": 1}
+            assert manager.get_aggregated_stats(lottery.slug, window=10) == {"total_analyzed": 1}
+
+        delay.assert_called_once_with(lottery.slug, 10, None, None)
+
+    def test_outdated_entry_sent_without_validators(self, client, lottery):
+        """Stale data from an older version must not be stored under the current ETag."""
+        version = publish_lottery_version(lottery.slug)
+        key = StatsManager()._generate_cache_key(lottery.slug, None, None, None)
+        cache.set(key, {"data": {"total_analyzed": 1}, "version": "0.0", "expires_at": 0})
+
+        with patch("apps.stats.tasks.refresh_aggregated_stats.delay"):
+            outdated = client.get(f"/api/stats/{lottery.slug}/")
+
+        assert outdated.status_code == status.HTTP_200_OK
+        assert outdated.json() == {"total_analyzed": 1}
+        assert "ETag" not in outdated and "Last-Modified" not in outdated
+        assert "no-cache" in outdated["Cache-Control"] and "public" not in outdated["Cache-Control"]
+
+        cache.set(key, {"data": {"total_analyzed": 2}, "version": version.token, "expires_at": time.time() + 60})
+        current = client.get(f"/api/stats/{lottery.slug}/")
+
+        assert current["ETag"] == f'"{lottery.slug}-{version.token}-v{settings.API_DATA_VERSION}"'
+        assert "public" in current["Cache-Control"]
+
+    def test_invalidate_publishes_new_version(self, lottery):
+        """Invalidation bumps the lottery version instead of deleting keys."""
+        before = get_lottery_version(lottery.slug)
+        StatsManager().invalidate_cache(lottery.slug)
+        after = get_lottery_version(lottery.slug)
+
+        assert after.revision == before.revision + 1
+        assert after.token != before.token
+
+    def test_concurrent_publishes_get_distinct_revisions(self, lottery):
+        """Versions reserved before publishing never share a revision."""
+        first = next_lottery_version(lottery.slug, draw_number=1)
+        second = next_lottery_version(lottery.slug, draw_number=1)
+
+        assert second.revision == first.revision + 1
+        publish_lottery_version(lottery.slug, second)
+        publish_lottery_version(lottery.slug, first)
+        assert get_lottery_version(lottery.slug) == second
+
+    def test_publish_never_rolls_back_a_concurrent_newer_version(self, lottery, monkeypatch):
+        """The compare-and-set of a slow older publish cannot overwrite a newer one."""
+        older = next_lottery_version(lottery.slug, draw_number=1)
+        newer = next_lottery_version(lottery.slug, draw_number=1)
+
+        class SlowCache:
+            """The shared cache, with reads stalling outside the main thread."""
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, key, *args, **kwargs):
+                value = cache.get(key, *args, **kwargs)
+                if threading.current_thread() is not threading.main_thread():
+                    time.sleep(0.1)  # the older publish reads, then stalls before writing
+                return value
+
+        monkeypatch.setattr("apps.lotteries.services.versioning.cache", SlowCache())
+        publisher = threading.Thread(target=publish_lottery_version, args=(lottery.slug, older))
+        publisher.start()
+        time.sleep(0.02)
+        publish_lottery_version(lottery.slug, newer)
+        publisher.join()
+        monkeypatch.undo()
+
+        assert get_lottery_version(lottery.slug) == newer
+
+    def test_evicted_version_does_not_repeat(self, lottery):
+        """A version rebuilt after eviction never matches entries stamped before it."""
+        Draw.objects.create(
+            lottery=lottery, number=1, draw_date="2025-01-01",
+            numbers=[2, 3, 5, 7, 11, 13], raw_data={"numero": 1},
+        )
+        before = get_lottery_version(lottery.slug)
+        cache.delete_many([f"lotteries:{lottery.slug}:version", f"lotteries:{lottery.slug}:revision"])
+
+        after = get_lottery_version(lottery.slug)
+
+        assert after.revision > before.revision
+        assert after.token != before.token
+
+    def test_warm_cache_precomputes_windows_before_publishing(self, lottery):
+        """Warm-up stores every standard window stamped with the published version."""
+        Draw.objects.create(
+            lottery=lottery,
+            number=1,
+            draw_date="2025-01-01",
+            numbers=[2, 3, 5, 7, 11, 13],
+            raw_data={"numero": 1},
+        )
+        manager = StatsManager()
+
+        version = manager.warm_cache(lottery.slug)
+
+        assert get_lottery_version(lottery.slug) == version
+        for window in manager.WARM_WINDOWS:
+            entry = cache.get(manager._generate_cache_key(lottery.slug, window, None, None))
+            assert entry["version"] == version.token
+            assert entry["data"]["computed_at_draw"] == 1
+        assert get_latest_draw_payload(lottery.slug, version)["number"] == 1
@@ -9,5 +9,12 @@ from . import views
 app_name = "stats"
 
 urlpatterns = [
+    path("draws/<int:draw_id>/", views.DrawStatisticsDetailView.as_view(), name="draw-stats"),
+    path("lotteries/<slug:slug>/", views.LotteryDrawStatisticsView.as_view(), name="lottery-draw-stats"),
     path("<slug:slug>/", views.AggregatedStatsView.as_view(), name="aggregated-stats"),
+    path("<slug:slug>/timeseries/", views.MetricTimeSeriesView.as_view(), name="metric-timeseries"),
+    path("<slug:slug>/distribution/", views.MetricDistributionView.as_view(), name="metric-distribution"),
+    path("<slug:slug>/positional/", views.PositionalStatsView.as_view(), name="positional-stats"),
+    path("<slug:slug>/itemsets/", views.FrequentItemsetsView.as_view(), name="frequent-itemsets"),
+    path("<slug:slug>/audit/", views.RandomnessAuditView.as_view(), name="randomness-audit"),
 ]
@@ -2,21 +2,45 @@
 DRF View for stats endpoints.
 """
 
+import json
 from datetime import datetime
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
+from apps.lotteries.conditional import (
+    conditional_catalog_get,
+    conditional_lottery_get,
+    mark_outdated,
+)
+from apps.lotteries.models import Lottery
+from apps.stats.models import DrawStatistics, RandomnessAudit
+from apps.stats.serializers import DrawStatisticsSerializer, RandomnessAuditSerializer
+from apps.stats.services.calculator import (
+    EXTENDED_METRIC_NAMES,
+    METRIC_NAMES,
+    PUBLIC_METRICS,
+)
+from apps.stats.services.dashboard import get_dashboard_bytes
+from apps.stats.services.itemsets import get_frequent_itemsets
 from apps.stats.services.manager import StatsManager
 
 
+@conditional_lottery_get
 class AggregatedStatsView(APIView):
     """
     Get aggregated statistics for a lottery.
     """
 
+    permission_classes = [AllowAny]
+
     @extend_schema(
         summary="Estatísticas Agregadas",
         description="Retorna estatísticas agregadas (frequências, médias) para uma janela de sorteios.",
@@ -48,5 +72,342 @@ class AggregatedStatsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        stats = manager.get_aggregated_stats(slug, window, start_date, end_date)
-        return Response(stats)
+        stats, current = manager.fetch_aggregated_stats(slug, window, start_date, end_date)
+        response = Response(stats)
+        return response if current else mark_outdated(response)
+
+
+@conditional_lottery_get
+class MetricTimeSeriesView(APIView):
+    """
+    Get the rolling mean/std of a per-draw metric across all contests.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Série temporal de métrica",
+        description=(
+            "Retorna média e desvio padrão móveis de uma métrica por sorteio "
+            "(soma, pares, primos, ...) ao longo de todos os concursos."
+        ),
+        tags=["Estatísticas"],
+        parameters=[
+            OpenApiParameter(
+                "metric", str, description=f"Métrica ({', '.join(PUBLIC_METRICS)})"
+            ),
+            OpenApiParameter("window", int, description="Janela móvel em sorteios (padrão: 50)"),
+        ],
+    )
+    def get(self, request, slug):
+        # Unknown slugs must not reach (and fill) the versioned cache
+        get_object_or_404(Lottery, slug=slug, is_active=True)
+        manager = StatsManager()
+
+        metric = request.query_params.get("metric", "sum")
+        try:
+            window = int(request.query_params.get("window", 50))
+            series = manager.get_timeseries(slug, metric, window)
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(series)
+
+
+@conditional_lottery_get
+class MetricDistributionView(APIView):
+    """
+    Get the histogram and percentiles of a per-draw metric.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Distribuição de métrica",
+        description=(
+            "Retorna histograma e percentis de uma métrica por sorteio "
+            "(soma, pares, primos, ...), calculados no banco de dados."
+        ),
+        tags=["Estatísticas"],
+        parameters=[
+            OpenApiParameter(
+                "metric", str, description=f"Métrica ({', '.join(PUBLIC_METRICS)})"
+            ),
+            OpenApiParameter("bins", int, description="Máximo de faixas do histograma (padrão: 20)"),
+        ],
+    )
+    def get(self, request, slug):
+        get_object_or_404(Lottery, slug=slug, is_active=True)
+        manager = StatsManager()
+
+        metric = request.query_params.get("metric", "sum")
+        try:
+            bins = min(int(request.query_params.get("bins", 20)), 200)
+            distribution = manager.get_distribution(slug, metric, bins)
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(distribution)
+
+
+@conditional_lottery_get
+class PositionalStatsView(APIView):
+    """
+    Get the positional frequency matrix of a lottery.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Frequência por posição",
+        description=(
+            "Retorna a matriz de frequência posição x número: coluna x dígito no "
+            "Super Sete, ordem do sorteio x número nas demais loterias."
+        ),
+        tags=["Estatísticas"],
+    )
+    def get(self, request, slug):
+        get_object_or_404(Lottery, slug=slug, is_active=True)
+        return Response(StatsManager().get_positional(slug))
+
+
+class FrequentItemsetsView(APIView):
+    """
+    Get the sets of numbers most often drawn together.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Conjuntos frequentes",
+        description=(
+            "Retorna os conjuntos de 2 a 5 números sorteados juntos com maior "
+            "frequência, calculados periodicamente sobre todo o histórico. São "
+            "guardados no máximo max_results conjuntos; truncated indica que o "
+            "limite foi atingido e conjuntos menos frequentes podem faltar."
+        ),
+        tags=["Estatísticas"],
+        parameters=[
+            OpenApiParameter("size", int, description="Filtra pelo tamanho do conjunto (2 a 5)"),
+            OpenApiParameter("limit", int, description="Máximo de conjuntos (padrão: 100, máx: 1000)"),
+        ],
+    )
+    def get(self, request, slug):
+        get_object_or_404(Lottery, slug=slug, is_active=True)
+
+        try:
+            size = request.query_params.get("size")
+            size = int(size) if size is not None else None
+            limit = min(int(request.query_params.get("limit", 100)), 1000)
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payload = get_frequent_itemsets(slug)
+        itemsets = payload["itemsets"]
+        if size is not None:
+            itemsets = [item for item in itemsets if len(item["numbers"]) == size]
+
+        return Response({**payload, "itemsets": itemsets[: max(limit, 0)]})
+
+
+class RandomnessAuditView(APIView):
+    """
+    Get the stored randomness audit of a lottery.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Auditoria de aleatoriedade",
+        description=(
+            "Retorna os testes estatísticos sobre todo o histórico da loteria: "
+            "qui-quadrado por número e por par, teste de sequências de paridade "
+            "e teste KS dos intervalos entre aparições."
+        ),
+        tags=["Estatísticas"],
+        responses={200: RandomnessAuditSerializer},
+    )
+    def get(self, request, slug):
+        audit = get_object_or_404(
+            RandomnessAudit.objects.select_related("lottery").defer("state"),
+            lottery__slug=slug,
+        )
+        return Response(RandomnessAuditSerializer(audit).data)
+
+
+@conditional_catalog_get
+class DashboardView(APIView):
+    """
+    Get the home page summary of every active lottery.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Painel das loterias",
+        description=(
+            "Retorna, para cada loteria ativa, o último sorteio, a estimativa do "
+            "próximo concurso, números quentes/frios e os números mais atrasados."
+        ),
+        tags=["Estatísticas"],
+    )
+    def get(self, request):
+        # Served as pre-rendered bytes, bypassing the DRF renderers
+        return HttpResponse(get_dashboard_bytes(), content_type="application/json")
+
+
+class DrawStatisticsDetailView(APIView):
+    """
+    Get the pre-calculated statistics of a single draw.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Estatísticas do sorteio",
+        description="Retorna as métricas pré-calculadas de um sorteio.",
+        tags=["Estatísticas"],
+        responses={200: DrawStatisticsSerializer},
+    )
+    def get(self, request, draw_id):
+        stats = get_object_or_404(
+            DrawStatistics.objects.select_related("draw"),
+            draw_id=draw_id,
+            draw__lottery__is_active=True,
+        )
+        return Response(DrawStatisticsSerializer(stats).data)
+
+
+@conditional_lottery_get
+class LotteryDrawStatisticsView(APIView):
+    """
+    Stream the pre-calculated statistics of every draw of a lottery.
+
+    Uses keyset pagination on the contest number (newest first): the `Link`
+    header points to the next page. Rows are streamed straight from
+    values_list() without hydrating model instances; the columnar layout
+    reads the page into memory first.
+    """
+
+    permission_classes = [AllowAny]
+
+    DEFAULT_LIMIT = 500
+    MAX_LIMIT = 10000
+    STREAM_CHUNK_SIZE = 2000
+
+    # (response key, queryset field)
+    COLUMNS = [
+        ("draw", "draw_id"),
+        ("draw_number", "draw__number"),
+        ("draw_date", "draw__draw_date"),
+        *((name, name) for name in (*METRIC_NAMES, *EXTENDED_METRIC_NAMES)),
+    ]
+
+    # Query param -> ORM lookup, for filtered historical queries
+    FILTERS = {
+        "min_sum": "sum_value__gte",
+        "max_sum": "sum_value__lte",
+        "even_count": "even_count",
+        "prime_count": "prime_count",
+    }
+
+    @extend_schema(
+        summary="Estatísticas por sorteio de uma loteria",
+        description=(
+            "Lista as métricas de cada sorteio, do mais recente ao mais antigo. "
+            "A próxima página é indicada no cabeçalho Link."
+        ),
+        tags=["Estatísticas"],
+        parameters=[
+            OpenApiParameter("after", int, description="Retorna concursos anteriores a este número"),
+            OpenApiParameter("limit", int, description="Quantidade de sorteios (padrão: 500, máx: 10000)"),
+            OpenApiParameter("layout", str, description="'rows' (padrão) ou 'columns' (formato colunar)"),
+            OpenApiParameter("min_sum", int, description="Soma mínima"),
+            OpenApiParameter("max_sum", int, description="Soma máxima"),
+            OpenApiParameter("even_count", int, description="Quantidade exata de pares"),
+            OpenApiParameter("prime_count", int, description="Quantidade exata de primos"),
+        ],
+    )
+    def get(self, request, slug):
+        params = request.query_params
+        try:
+            after = int(params["after"]) if "after" in params else None
+            limit = min(int(params.get("limit", self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+            filters = {
+                lookup: int(params[param])
+                for param, lookup in self.FILTERS.items()
+                if param in params
+            }
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        layout = params.get("layout", "rows")
+        if limit < 1 or layout not in ("rows", "columns"):
+            return Response(
+                {"error": "Invalid parameters format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = DrawStatistics.objects.filter(
+            lottery__slug=slug,
+            lottery__is_active=True,
+            **filters,
+        ).order_by("-draw__number")
+        if after is not None:
+            queryset = queryset.filter(draw__number__lt=after)
+
+        # Keyset cursor: the last contest of this page, if another page follows
+        boundary = list(queryset.values_list("draw__number", flat=True)[limit - 1 : limit + 1])
+        rows = queryset.values_list(*(field for _, field in self.COLUMNS))[:limit]
+
+        if layout == "columns":
+            content = self._columns_body(rows, limit)
+        else:
+            content = self._stream_rows(rows)
+
+        response = StreamingHttpResponse(content, content_type="application/json")
+        if len(boundary) == 2:
+            next_url = replace_query_param(request.build_absolute_uri(), "after", boundary[0])
+            response["Link"] = f'<{next_url}>; rel="next"'
+        return response
+
+    def _stream_rows(self, rows):
+        """Yield a JSON array of row objects, chunk by chunk."""
+        keys = [key for key, _ in self.COLUMNS]
+        yield "["
+        for index, values in enumerate(rows.iterator(chunk_size=self.STREAM_CHUNK_SIZE)):
+            prefix = "," if index else ""
+            yield prefix + json.dumps(dict(zip(keys, values, strict=True)), cls=DjangoJSONEncoder)
+        yield "]"
+
+    def _columns_body(self, rows, limit: int):
+        """
+        Yield a JSON object with one array per column.
+
+        Not streamed from the database: a column can only be written once
+        every row is read. The page (at most MAX_LIMIT rows) is read in one
+        pass over the cursor into per-column lists preallocated to `limit`.
+        """
+        columns = [[None] * limit for _ in self.COLUMNS]
+        count = 0
+        for count, values in enumerate(rows.iterator(chunk_size=self.STREAM_CHUNK_SIZE), start=1):
+            for column, value in zip(columns, values, strict=True):
+                column[count - 1] = value
+
+        yield "{"
+        for index, ((key, _), values) in enumerate(zip(self.COLUMNS, columns, strict=True)):
+            prefix = "," if index else ""
+            yield f"{prefix}{json.dumps(key)}:{json.dumps(values[:count], cls=DjangoJSONEncoder)}"
+        yield "}"
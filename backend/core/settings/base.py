@@ -137,6 +137,38 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Public API HTTP caching
+# Bump API_DATA_VERSION whenever response payloads change shape, so ETags change too
+API_DATA_VERSION = 1
+API_CACHE_MAX_AGE = config("API_CACHE_MAX_AGE", default=60, cast=int)  # seconds
+
+# CAIXA API client
+CAIXA_RATE_LIMIT = config("CAIXA_RATE_LIMIT", default=10.0, cast=float)  # requests per second, all workers
+CAIXA_BACKFILL_SHARE = config("CAIXA_BACKFILL_SHARE", default=0.8, cast=float)  # of the rate, rest kept for syncs
+CAIXA_BACKFILL_WORKERS = config("CAIXA_BACKFILL_WORKERS", default=8, cast=int)
+CAIXA_POOL_MAXSIZE = config("CAIXA_POOL_MAXSIZE", default=16, cast=int)  # kept-alive connections
+CAIXA_RESPONSE_CACHE_SIZE = config("CAIXA_RESPONSE_CACHE_SIZE", default=64, cast=int)
+CAIXA_ARCHIVE_RESPONSES = config("CAIXA_ARCHIVE_RESPONSES", default=True, cast=bool)
+
+# Circuit breaker shared by every worker: open after CAIXA_BREAKER_THRESHOLD
+# failed requests within CAIXA_BREAKER_WINDOW seconds, probe again after
+# CAIXA_BREAKER_COOLDOWN seconds
+CAIXA_BREAKER_THRESHOLD = config("CAIXA_BREAKER_THRESHOLD", default=5, cast=int)
+CAIXA_BREAKER_WINDOW = config("CAIXA_BREAKER_WINDOW", default=60, cast=int)
+CAIXA_BREAKER_COOLDOWN = config("CAIXA_BREAKER_COOLDOWN", default=300, cast=int)
+
+# Draw-calendar sync scheduling (times in TIME_ZONE)
+CAIXA_DRAW_TIME = config("CAIXA_DRAW_TIME", default="20:00")  # draws start at 20h (Brasília)
+CAIXA_RESULT_DELAY = config("CAIXA_RESULT_DELAY", default=30, cast=int)  # minutes before the first poll
+CAIXA_POLL_MIN_INTERVAL = config("CAIXA_POLL_MIN_INTERVAL", default=5, cast=int)  # minutes
+CAIXA_POLL_MAX_INTERVAL = config("CAIXA_POLL_MAX_INTERVAL", default=60, cast=int)  # minutes
+CAIXA_POLL_WINDOW = config("CAIXA_POLL_WINDOW", default=36, cast=int)  # hours of backoff polling
+CAIXA_POLL_OVERDUE_INTERVAL = config("CAIXA_POLL_OVERDUE_INTERVAL", default=360, cast=int)  # minutes
+# Polls of a stored result that catch later corrections, CAIXA_FOLLOWUP_INTERVAL
+# minutes after it landed and then at doubling intervals
+CAIXA_FOLLOWUP_POLLS = config("CAIXA_FOLLOWUP_POLLS", default=3, cast=int)
+CAIXA_FOLLOWUP_INTERVAL = config("CAIXA_FOLLOWUP_INTERVAL", default=60, cast=int)  # minutes
+
 # Simple JWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
@@ -16,6 +16,8 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
+from apps.stats.views import DashboardView
+
 # API URL patterns
 api_urlpatterns = [
     # JWT Authentication
@@ -30,6 +32,7 @@ api_urlpatterns = [
         name="swagger-ui",
     ),
     # App URLs
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
     path("generator/", include("apps.generator.urls")),
     path("lotteries/", include("apps.lotteries.urls")),
     path("stats/", include("apps.stats.urls")),